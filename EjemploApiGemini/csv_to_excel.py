@@ -1,8 +1,14 @@
 #!/usr/bin/env python3
 """
 Script para convertir los resultados CSV a Excel con formato mejorado
+
+Uso:
+    python csv_to_excel.py                                  # data/output/results.csv
+    python csv_to_excel.py --db data/output/results.db      # última ejecución del almacén SQLite
+    python csv_to_excel.py --db data/output/results.db --run-id 20240501T060000-1234
 """
 
+import argparse
 import pandas as pd
 import json
 from pathlib import Path
@@ -11,29 +17,77 @@ from openpyxl import Workbook
 from openpyxl.styles import Font, Alignment, PatternFill, Border, Side
 from openpyxl.utils.dataframe import dataframe_to_rows
 
-def create_excel_report():
-    """Crea un reporte en Excel con los resultados de la automatización"""
+from framework import blobs
+from framework.end import RESULT_COLUMNS
+from framework.init import load_config
+
+# Límite de caracteres por celda de Excel
+EXCEL_CELL_LIMIT = 32767
+
+
+def blob_reader():
+    """Almacén de blobs de settings.json (respuestas guardadas solo como hash)"""
+    return blobs.reader_from_config(load_config())
+
+
+def load_from_store(db_path, run_id=None):
+    """
+    Lee los exitosos y el reporte de una ejecución desde el almacén SQLite
+
+    Returns:
+        Tupla (DataFrame con las columnas de results.csv, reporte) o None si no hay datos
+    """
+    from framework.results_store import COMPLETED, ResultsStore, export_row
+
+    store = ResultsStore(db_path, blobs=blob_reader())
+    run_id = run_id or store.latest_run_id()
+    execution_data = store.run_report(run_id) if run_id else None
+    if execution_data is None:
+        print(f"❌ No hay una ejecución terminada {run_id or ''} en {db_path}")
+        return None
+    rows = [export_row(row, store.response(row)) for row in store.query(run_id=run_id, status=COMPLETED)]
+    return pd.DataFrame(rows, columns=RESULT_COLUMNS), execution_data
+
+
+def create_excel_report(db_path=None, run_id=None):
+    """
+    Crea un reporte en Excel con los resultados de la automatización
+
+    Args:
+        db_path: Almacén de resultados SQLite; por defecto se leen results.csv y execution_report.json
+        run_id: Ejecución del almacén a exportar (por defecto, la última)
+    """
     
     # Rutas de archivos
     csv_file = Path("data/output/results.csv")
     report_file = Path("data/output/execution_report.json")
     excel_file = Path("data/output/resultados_completos.xlsx")
     
-    # Verificar que existan los archivos
-    if not csv_file.exists():
-        print(f"❌ No se encontró el archivo: {csv_file}")
-        return
-    
-    if not report_file.exists():
-        print(f"❌ No se encontró el archivo: {report_file}")
-        return
-    
-    print("📊 Creando reporte en Excel...")
-    
-    # Leer datos
-    df_results = pd.read_csv(csv_file)
-    with open(report_file, 'r', encoding='utf-8') as f:
-        execution_data = json.load(f)
+    if db_path:
+        loaded = load_from_store(db_path, run_id)
+        if loaded is None:
+            return
+        df_results, execution_data = loaded
+        print(f"📊 Creando reporte en Excel desde {db_path}...")
+    else:
+        # Verificar que existan los archivos
+        if not csv_file.exists():
+            print(f"❌ No se encontró el archivo: {csv_file}")
+            return
+        
+        if not report_file.exists():
+            print(f"❌ No se encontró el archivo: {report_file}")
+            return
+        
+        print("📊 Creando reporte en Excel...")
+        
+        # Leer datos (con el almacén de blobs, results.csv trae solo el hash de cada respuesta)
+        df_results = pd.read_csv(csv_file)
+        if 'response_hash' in df_results.columns:
+            reader = blob_reader()
+            df_results['generated_response'] = [reader.get(digest) for digest in df_results['response_hash']]
+        with open(report_file, 'r', encoding='utf-8') as f:
+            execution_data = json.load(f)
     
     # Crear el workbook de Excel
     wb = Workbook()
@@ -123,7 +177,10 @@ def create_excel_report():
     ws_details = wb.create_sheet(title="Resultados Detallados")
     
     # Encabezados
-    headers = ["ID", "Prompt Original", "Respuesta Generada", "Estado", "Modelo Usado", "Longitud Respuesta", "Procesado"]
+    headers = ["ID", "Prompt Original", "Respuesta Generada", "Estado", "Modelo Usado", "Longitud Respuesta", "Procesado",
+               "Respuesta Completa"]
+    # Las respuestas que no entran en una celda quedan completas en el almacén de blobs
+    full_responses = None
     
     for col, header in enumerate(headers, start=1):
         cell = ws_details.cell(row=1, column=col, value=header)
@@ -136,7 +193,10 @@ def create_excel_report():
     for row_idx, row in enumerate(df_results.itertuples(), start=2):
         # Truncar respuesta si es muy larga para Excel
         response_text = row.generated_response
-        if len(response_text) > 32767:  # Límite de Excel
+        full_response = None
+        if len(response_text) > EXCEL_CELL_LIMIT:
+            full_responses = full_responses or blob_reader()
+            full_response = str(full_responses.path_for(full_responses.put(response_text)))
             response_text = response_text[:32760] + "..."
         
         data_row = [
@@ -146,7 +206,8 @@ def create_excel_report():
             row.status,
             row.model_used,
             row.response_length,
-            row.processed_at
+            row.processed_at,
+            full_response
         ]
         
         for col_idx, value in enumerate(data_row, start=1):
@@ -168,6 +229,7 @@ def create_excel_report():
     ws_details.column_dimensions['E'].width = 20
     ws_details.column_dimensions['F'].width = 15
     ws_details.column_dimensions['G'].width = 25
+    ws_details.column_dimensions['H'].width = 40
     
     # Ajustar altura de filas para texto largo
     for row in range(2, len(df_results) + 2):
@@ -197,4 +259,8 @@ def create_excel_report():
     return excel_file
 
 if __name__ == "__main__":
-    create_excel_report()
+    parser = argparse.ArgumentParser(description="Reporte Excel de los resultados")
+    parser.add_argument('--db', help='Leer del almacén de resultados SQLite en lugar de results.csv')
+    parser.add_argument('--run-id', help='Con --db, ejecución a exportar (por defecto, la última)')
+    args = parser.parse_args()
+    create_excel_report(args.db, args.run_id)
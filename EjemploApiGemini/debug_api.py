@@ -6,6 +6,21 @@ Script de diagnóstico para verificar la configuración de la API de Gemini
 import os
 from dotenv import load_dotenv
 
+
+def genai_client(api_key, timeout_seconds):
+    from google import genai
+    return genai.Client(api_key=api_key,
+                        http_options=genai.types.HttpOptions(timeout=int(timeout_seconds * 1000)))
+
+
+def describe_error(message):
+    if "API key not valid" in message:
+        return "API Key NO VÁLIDA"
+    if "PERMISSION_DENIED" in message:
+        return "Sin permisos para usar la API"
+    return f"Error: {message}"
+
+
 def debug_api_config():
     print("🔍 DIAGNÓSTICO DE CONFIGURACIóN DE API GEMINI")
     print("=" * 50)
@@ -35,45 +50,31 @@ def debug_api_config():
     else:
         print("⚠️ Formato no estándar para Google API Key")
 
-    # Test básico de conexión
+    # Prueba de salud: todos los modelos a la vez, con timeout
     print("\n🔗 Probando conexión con Gemini...")
     try:
-        from google import genai
-        client = genai.Client(api_key=api_key)
-        
-        # Test con modelo simple
-        contents = [genai.types.Content(
-            role="user",
-            parts=[genai.types.Part.from_text("Hello")]
-        )]
-        
-        models_to_try = ["gemini-2.0-flash-exp", "gemini-1.5-flash"]
-        
-        for model in models_to_try:
-            try:
-                response = list(client.models.generate_content_stream(
-                    model=model,
-                    contents=contents,
-                    config=genai.types.GenerateContentConfig()
-                ))
-                if response:
-                    print(f"✅ API Key VÁLIDA con {model}")
-                    print(f"📝 Respuesta: {response[0].text[:50]}...")
-                    break
-            except Exception:
-                continue
-        else:
-            print("❌ No se pudo conectar con ningún modelo")
-            
+        from framework import health
+        from framework.init import load_config
+
+        settings = {**health.DEFAULT_HEALTH_CONFIG, **load_config().get('health_check', {})}
+        models = settings['models'] or ["gemini-2.5-flash", "gemini-2.5-pro"]
+        client = genai_client(api_key, settings['timeout_seconds'])
+        probes = health.probe_models(client, models, settings['prompt'], settings['timeout_seconds'])
+
+        print(f"{'Modelo':<24}{'Conexión':>10}{'1er chunk':>11}  Estado")
+        for probe in probes:
+            connect = f"{probe['connect_seconds']:.2f}s" if probe['connect_seconds'] is not None else '-'
+            first = f"{probe['first_chunk_seconds']:.2f}s" if probe['first_chunk_seconds'] is not None else '-'
+            status = '✅ OK' if probe['healthy'] else f"❌ {describe_error(probe['error'])}"
+            print(f"{probe['model']:<24}{connect:>10}{first:>11}  {status}")
+
+        best = health.fastest(probes)
+        print(f"\n✅ API Key VÁLIDA; modelo más rápido: {best}" if best else "\n❌ No se pudo conectar con ningún modelo")
+
     except ImportError:
         print("❌ Módulo google.genai no disponible")
     except Exception as e:
-        if "API key not valid" in str(e):
-            print("❌ API Key NO VÁLIDA")
-        elif "PERMISSION_DENIED" in str(e):
-            print("❌ Sin permisos para usar la API")
-        else:
-            print(f"❌ Error: {e}")
+        print(f"❌ {describe_error(str(e))}")
 
     print("\n🎯 RECOMENDACIONES:")
     if not api_key or "demo_key" in api_key or "tu_clave" in api_key:
@@ -3,9 +3,9 @@ Framework de automatización para generación de prompts con Gemini
 Basado en el REFramework de UiPath
 """
 
-from . import init, get_transaction, process, handle_error, end, utils
+from . import init, get_transaction, process, handle_error, end, blobs, cassettes, circuit_breaker, condense, daemon, deadline, health, models, progress, readers, reorder, results_store, routing, scheduler, similarity, stats, structured, tokens, tracing, utils, work_queue
 
 __version__ = "1.0.0"
 __author__ = "Equipo de Automatización"
 
-__all__ = ['init', 'get_transaction', 'process', 'handle_error', 'end', 'utils']
+__all__ = ['init', 'get_transaction', 'process', 'handle_error', 'end', 'blobs', 'cassettes', 'circuit_breaker', 'condense', 'daemon', 'deadline', 'health', 'models', 'progress', 'readers', 'reorder', 'results_store', 'routing', 'scheduler', 'similarity', 'stats', 'structured', 'tokens', 'tracing', 'utils', 'work_queue']
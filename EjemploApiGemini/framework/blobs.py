@@ -0,0 +1,131 @@
+"""
+Almacén de respuestas direccionado por contenido
+Cada respuesta se guarda una sola vez, comprimida, con su SHA-256 como nombre y
+repartida en subdirectorios; los archivos de resultados llevan solo el hash y la
+longitud, y la respuesta se lee del almacén cuando hace falta
+"""
+
+import gzip
+import hashlib
+import os
+import threading
+from pathlib import Path
+from typing import Dict, Any, Optional
+
+try:
+    import zstandard
+except ImportError:
+    # zstd es opcional: sin el paquete se comprime con gzip
+    zstandard = None
+
+DEFAULT_BLOBS_CONFIG = {
+    'enabled': False,
+    'path': 'data/blobs',
+    'compression': 'gzip',
+    'level': 6
+}
+
+_EXTENSIONS = {'gzip': '.gz', 'zstd': '.zst'}
+
+
+def content_hash(text: str) -> str:
+    return hashlib.sha256(text.encode('utf-8')).hexdigest()
+
+
+class BlobStore:
+    """Blobs en `root/ab/cd/<sha256>.gz` (o .zst); escribir dos veces lo mismo no ocupa más espacio"""
+
+    def __init__(self, root: str, compression: str = 'gzip', level: int = 6):
+        if compression not in _EXTENSIONS:
+            raise ValueError(f"Compresión inválida: {compression} (gzip o zstd)")
+        if compression == 'zstd' and zstandard is None:
+            raise ImportError("La compresión zstd requiere zstandard: pip install zstandard")
+        self.root = Path(root)
+        self.compression = compression
+        self.level = level
+        self.written = 0
+        self.deduplicated = 0
+        self.bytes_written = 0
+        self._lock = threading.Lock()
+
+    def path_for(self, digest: str, compression: Optional[str] = None) -> Path:
+        extension = _EXTENSIONS[compression or self.compression]
+        return self.root / digest[:2] / digest[2:4] / f"{digest}{extension}"
+
+    def _compress(self, data: bytes) -> bytes:
+        if self.compression == 'zstd':
+            return zstandard.ZstdCompressor(level=self.level).compress(data)
+        return gzip.compress(data, compresslevel=self.level, mtime=0)
+
+    def put(self, text: str) -> str:
+        """Guarda el texto si no existe y devuelve su hash"""
+        digest = content_hash(text)
+        path = self.path_for(digest)
+        if path.exists():
+            with self._lock:
+                self.deduplicated += 1
+            return digest
+        data = self._compress(text.encode('utf-8'))
+        path.parent.mkdir(parents=True, exist_ok=True)
+        # Escritura atómica: un lector nunca ve un blob a medias
+        tmp_path = path.with_name(f"{path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+        with open(tmp_path, 'wb') as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+        with self._lock:
+            self.written += 1
+            self.bytes_written += len(data)
+        return digest
+
+    def get(self, digest: str) -> str:
+        """Texto de un blob (gzip o zstd, según el archivo que exista)"""
+        for compression in _EXTENSIONS:
+            path = self.path_for(digest, compression)
+            if not path.exists():
+                continue
+            with open(path, 'rb') as f:
+                data = f.read()
+            if compression == 'zstd':
+                if zstandard is None:
+                    raise ImportError("Leer blobs .zst requiere zstandard: pip install zstandard")
+                return zstandard.ZstdDecompressor().decompress(data).decode('utf-8')
+            return gzip.decompress(data).decode('utf-8')
+        raise FileNotFoundError(f"No existe el blob {digest} en {self.root}")
+
+    def summary(self) -> Dict[str, Any]:
+        """Sección del reporte de ejecución"""
+        return {'path': str(self.root), 'compression': self.compression, 'written': self.written,
+                'deduplicated': self.deduplicated, 'bytes_written': self.bytes_written}
+
+
+_store: Optional[BlobStore] = None
+_store_lock = threading.Lock()
+
+
+def get_store(config: Dict[str, Any]) -> Optional[BlobStore]:
+    """Almacén único del proceso; None si está desactivado"""
+    global _store
+    settings = {**DEFAULT_BLOBS_CONFIG, **config.get('blobs', {})}
+    if not settings['enabled']:
+        return None
+    with _store_lock:
+        if _store is None:
+            _store = BlobStore(settings['path'], settings['compression'], settings['level'])
+        return _store
+
+
+def reader_from_config(config: Dict[str, Any]) -> BlobStore:
+    """Almacén para leer (esté o no activa la escritura de blobs)"""
+    settings = {**DEFAULT_BLOBS_CONFIG, **config.get('blobs', {})}
+    compression = settings['compression'] if settings['compression'] != 'zstd' or zstandard else 'gzip'
+    return BlobStore(settings['path'], compression, settings['level'])
+
+
+def active_store() -> Optional[BlobStore]:
+    return _store
+
+
+def reset() -> None:
+    global _store
+    with _store_lock:
+        _store = None
@@ -0,0 +1,128 @@
+"""
+Grabación y reproducción de respuestas de Gemini (cassettes)
+En modo 'record' cada respuesta en streaming se guarda con sus chunks y el tiempo
+entre ellos; en modo 'replay' se sirven de vuelta sin red ni cuota, al ritmo
+original o lo más rápido posible, para benchmarks reproducibles del pipeline
+"""
+
+import hashlib
+import json
+import os
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Any, Iterable, Iterator, Optional
+
+from .tokens import usage_to_dict
+from .utils import setup_logger
+
+RECORD = 'record'
+REPLAY = 'replay'
+
+DEFAULT_CASSETTE_CONFIG = {
+    'mode': None,
+    'path': 'data/cassettes',
+    'pace': 'original'
+}
+
+
+class CassetteNotFoundError(LookupError):
+    """No hay una grabación para la solicitud en modo replay"""
+
+
+class RecordedChunk:
+    """Chunk reproducido; expone .text y .usage_metadata como los chunks del SDK"""
+
+    __slots__ = ('text', 'usage_metadata')
+
+    def __init__(self, text: str, usage_metadata: Optional[Dict[str, int]] = None):
+        self.text = text
+        self.usage_metadata = usage_metadata
+
+
+def cassette_key(model: str, prompt_text: str, options: Dict[str, Any], system_instruction: str = '') -> str:
+    """Hash estable de todo lo que determina la respuesta"""
+    payload = json.dumps({
+        'model': model,
+        'prompt': prompt_text,
+        'thinking_budget': options.get('thinking_budget'),
+        'google_search': bool(options.get('google_search')),
+        'structured': bool(options.get('structured')),
+        'system_instruction': system_instruction
+    }, sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+class CassetteStore:
+    """Un archivo JSON por solicitud dentro de `path`, nombrado por su clave"""
+
+    def __init__(self, path: str, mode: str, pace: str = 'original'):
+        if mode not in (RECORD, REPLAY):
+            raise ValueError(f"Modo de cassette inválido: {mode}")
+        self.path = Path(path)
+        self.mode = mode
+        self.pace = pace
+        self.logger = setup_logger('cassettes')
+        self.path.mkdir(parents=True, exist_ok=True)
+
+    @property
+    def replaying(self) -> bool:
+        return self.mode == REPLAY
+
+    def _file(self, key: str) -> Path:
+        return self.path / f"{key}.json"
+
+    def load(self, key: str) -> Optional[Dict[str, Any]]:
+        try:
+            with open(self._file(key), 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return None
+
+    def save(self, key: str, cassette: Dict[str, Any]) -> None:
+        """Escritura atómica (varios workers pueden grabar a la vez)"""
+        target = self._file(key)
+        tmp_path = target.with_name(f"{target.name}.{os.getpid()}.tmp")
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(cassette, f, ensure_ascii=False)
+        os.replace(tmp_path, target)
+
+    def record(self, key: str, model: str, stream: Iterable[Any]) -> Iterator[Any]:
+        """
+        Envuelve el stream del SDK: reenvía cada chunk y al terminar guarda la grabación
+
+        El delay de cada chunk es el tiempo desde el chunk anterior (o desde la solicitud,
+        para el primero), así el replay reproduce también el tiempo hasta el primer chunk
+        """
+        chunks = []
+        last = time.perf_counter()
+        for chunk in stream:
+            now = time.perf_counter()
+            entry = {'text': chunk.text or '', 'delay': round(now - last, 4)}
+            usage = usage_to_dict(getattr(chunk, 'usage_metadata', None))
+            if usage:
+                entry['usage'] = usage
+            chunks.append(entry)
+            last = now
+            yield chunk
+        self.save(key, {'key': key, 'model': model, 'recorded_at': datetime.now().isoformat(),
+                        'chunks': chunks})
+        self.logger.debug("Cassette %s grabado (%d chunks)", key[:12], len(chunks))
+
+    def replay(self, key: str) -> Iterator[RecordedChunk]:
+        """Sirve los chunks grabados; con pace 'original' respeta los tiempos entre chunks"""
+        cassette = self.load(key)
+        if cassette is None:
+            raise CassetteNotFoundError(f"No hay cassette para la solicitud {key[:12]} en {self.path}")
+        for chunk in cassette['chunks']:
+            if self.pace == 'original' and chunk['delay'] > 0:
+                time.sleep(chunk['delay'])
+            yield RecordedChunk(chunk['text'], chunk.get('usage'))
+
+
+def from_config(config: Dict[str, Any]) -> Optional[CassetteStore]:
+    """Crea el almacén según la sección 'cassettes'; None si el modo está desactivado"""
+    settings = {**DEFAULT_CASSETTE_CONFIG, **config.get('cassettes', {})}
+    if not settings['mode']:
+        return None
+    return CassetteStore(settings['path'], settings['mode'], settings['pace'])
@@ -0,0 +1,166 @@
+"""
+Circuit breaker para las llamadas a Gemini
+Se abre cuando la tasa de SystemException o los fallos consecutivos superan un umbral;
+mientras está abierto las llamadas esperan (el despacho se pausa) en lugar de fallar,
+luego deja pasar llamadas de prueba (half-open) y se cierra solo si responden bien
+"""
+
+import threading
+import time
+from collections import deque
+from datetime import datetime
+from typing import Dict, Any, Callable, List, Optional
+
+from .utils import setup_logger
+
+CLOSED = 'closed'
+OPEN = 'open'
+HALF_OPEN = 'half_open'
+
+DEFAULT_BREAKER_CONFIG = {
+    'enabled': False,
+    'consecutive_failures': 5,
+    'failure_rate': 0.5,
+    'window': 20,
+    'min_calls': 10,
+    'open_seconds': 30,
+    'max_open_seconds': 600,
+    'half_open_probes': 1
+}
+
+
+class CircuitBreaker:
+    """Estado compartido por todos los workers del proceso"""
+
+    def __init__(self, consecutive_failures: int = 5, failure_rate: float = 0.5, window: int = 20,
+                 min_calls: int = 10, open_seconds: float = 30, max_open_seconds: float = 600,
+                 half_open_probes: int = 1, clock: Callable[[], float] = time.monotonic):
+        self.consecutive_threshold = consecutive_failures
+        self.failure_rate = failure_rate
+        self.min_calls = min_calls
+        self.open_seconds = open_seconds
+        self.max_open_seconds = max_open_seconds
+        self.half_open_probes = half_open_probes
+        self.clock = clock
+        self.logger = setup_logger('circuit_breaker')
+
+        self.state = CLOSED
+        self.transitions: List[Dict[str, Any]] = []
+        self.paused_seconds = 0.0
+        self._outcomes = deque(maxlen=window)
+        self._consecutive = 0
+        self._cooldown = open_seconds
+        self._opened_at = 0.0
+        self._probes = 0
+        self._probe_successes = 0
+        self._cond = threading.Condition()
+
+    def _transition(self, state: str, reason: str) -> None:
+        self.transitions.append({'at': datetime.now().isoformat(), 'from': self.state, 'to': state,
+                                 'reason': reason})
+        log = self.logger.warning if state == OPEN else self.logger.info
+        log("Circuit breaker %s -> %s: %s", self.state, state, reason)
+        self.state = state
+        if state == OPEN:
+            self._opened_at = self.clock()
+        elif state == HALF_OPEN:
+            self._probes = self._probe_successes = 0
+        else:
+            self._outcomes.clear()
+            self._consecutive = 0
+            self._cooldown = self.open_seconds
+        self._cond.notify_all()
+
+    def acquire(self) -> bool:
+        """
+        Espera hasta que se permita una llamada
+
+        Returns:
+            True si la llamada es una prueba half-open (debe informarse con probe=True)
+        """
+        with self._cond:
+            waited_from = None
+            try:
+                while True:
+                    if self.state == CLOSED:
+                        return False
+                    if self.state == OPEN:
+                        remaining = self._opened_at + self._cooldown - self.clock()
+                        if remaining <= 0:
+                            self._transition(HALF_OPEN, f"Pausa de {self._cooldown:.0f}s cumplida, probando")
+                            continue
+                    elif self._probes < self.half_open_probes:
+                        self._probes += 1
+                        return True
+                    else:
+                        remaining = None
+                    waited_from = waited_from or time.monotonic()
+                    self._cond.wait(remaining)
+            finally:
+                if waited_from:
+                    self.paused_seconds += time.monotonic() - waited_from
+
+    def record(self, failure: bool, probe: bool = False) -> None:
+        """Informa el resultado de una llamada (failure=True para SystemException)"""
+        with self._cond:
+            if probe and self.state == HALF_OPEN:
+                self._probes -= 1
+                if failure:
+                    self._cooldown = min(self._cooldown * 2, self.max_open_seconds)
+                    self._transition(OPEN, "La llamada de prueba falló")
+                else:
+                    self._probe_successes += 1
+                    if self._probe_successes >= self.half_open_probes:
+                        self._transition(CLOSED, "Las llamadas de prueba respondieron")
+                    else:
+                        self._cond.notify_all()
+                return
+
+            self._outcomes.append(failure)
+            self._consecutive = self._consecutive + 1 if failure else 0
+            if self.state != CLOSED:
+                return
+            if self._consecutive >= self.consecutive_threshold:
+                self._transition(OPEN, f"{self._consecutive} fallos de sistema consecutivos")
+            elif len(self._outcomes) >= self.min_calls:
+                rate = sum(self._outcomes) / len(self._outcomes)
+                if rate >= self.failure_rate:
+                    self._transition(OPEN, f"Tasa de fallos de sistema {rate:.0%} en las últimas "
+                                           f"{len(self._outcomes)} llamadas")
+
+    def summary(self) -> Dict[str, Any]:
+        """Sección del reporte de ejecución"""
+        with self._cond:
+            return {
+                'state': self.state,
+                'times_opened': sum(1 for t in self.transitions if t['to'] == OPEN),
+                'paused_worker_seconds': round(self.paused_seconds, 3),
+                'transitions': list(self.transitions)
+            }
+
+
+_breaker: Optional[CircuitBreaker] = None
+_lock = threading.Lock()
+
+
+def get_breaker(config: Dict[str, Any]) -> Optional[CircuitBreaker]:
+    """Breaker único del proceso (los procesadores se crean por transacción); None si está desactivado"""
+    global _breaker
+    settings = {**DEFAULT_BREAKER_CONFIG, **config.get('circuit_breaker', {})}
+    if not settings.pop('enabled'):
+        return None
+    with _lock:
+        if _breaker is None:
+            _breaker = CircuitBreaker(**settings)
+        return _breaker
+
+
+def active_breaker() -> Optional[CircuitBreaker]:
+    return _breaker
+
+
+def reset() -> None:
+    """Descarta el breaker del proceso (pruebas, o un nuevo lote en el mismo proceso)"""
+    global _breaker
+    with _lock:
+        _breaker = None
@@ -0,0 +1,155 @@
+"""
+Contextos largos en modo map-reduce
+Un `context` que supera el umbral se divide en partes que un modelo rápido resume
+en paralelo; la llamada principal recibe los resúmenes en lugar del documento
+completo. Los resúmenes se guardan en disco por contenido y se reutilizan
+"""
+
+import hashlib
+import json
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Any, Callable, List, Optional, Tuple
+
+from .tokens import add_usage
+
+DEFAULT_CONDENSE_CONFIG = {
+    'enabled': False,
+    'threshold_chars': 12000,
+    'chunk_chars': 6000,
+    'model': 'gemini-2.5-flash',
+    'thinking_budget': 0,
+    'workers': 4,
+    'max_rounds': 3,
+    'cache_path': 'data/cache/context_summaries'
+}
+
+SUMMARY_PROMPT = """Resume el siguiente fragmento de un documento de contexto para un especialista en \
+automatizaciones de UiPath. Conserva sistemas, pantallas, campos, reglas de negocio, excepciones, \
+volúmenes y nombres propios; omite lo demás. Responde solo con el resumen.
+
+Fragmento {part} de {total}:
+{text}"""
+
+# Firma de la llamada al modelo: (prompt, modelo, thinking_budget) -> (texto, uso de tokens)
+SummarizeFn = Callable[[str, str, int], Tuple[str, Optional[Dict[str, int]]]]
+
+
+def _settings(config: Dict[str, Any]) -> Dict[str, Any]:
+    return {**DEFAULT_CONDENSE_CONFIG, **config.get('context_condensing', {})}
+
+
+def applies(transaction: Dict[str, Any], config: Dict[str, Any]) -> bool:
+    """True si el contexto de la transacción se va a resumir antes de la llamada principal"""
+    settings = _settings(config)
+    return bool(settings['enabled']) and len(transaction.get('context') or '') > settings['threshold_chars']
+
+
+def split_text(text: str, chunk_chars: int) -> List[str]:
+    """Partes de hasta chunk_chars, cortando por párrafos y líneas cuando se puede"""
+    chunks, current = [], ''
+    for line in text.splitlines(keepends=True):
+        while len(line) > chunk_chars:
+            if current:
+                chunks.append(current)
+                current = ''
+            chunks.append(line[:chunk_chars])
+            line = line[chunk_chars:]
+        if len(current) + len(line) > chunk_chars:
+            chunks.append(current)
+            current = ''
+        current += line
+    if current.strip():
+        chunks.append(current)
+    return [chunk for chunk in chunks if chunk.strip()]
+
+
+class ContextCondenser:
+    """Resume contextos largos con `summarize` (la llamada a Gemini del procesador)"""
+
+    def __init__(self, summarize: SummarizeFn, threshold_chars: int = 12000, chunk_chars: int = 6000,
+                 model: str = 'gemini-2.5-flash', thinking_budget: int = 0, workers: int = 4,
+                 max_rounds: int = 3, cache_path: Optional[str] = None):
+        self.summarize = summarize
+        self.threshold_chars = threshold_chars
+        self.chunk_chars = chunk_chars
+        self.model = model
+        self.thinking_budget = thinking_budget
+        self.workers = workers
+        self.max_rounds = max_rounds
+        self.cache_path = Path(cache_path) if cache_path else None
+        if self.cache_path:
+            self.cache_path.mkdir(parents=True, exist_ok=True)
+
+    def _key(self, prompt: str) -> str:
+        return hashlib.sha256(f"{self.model}\n{self.thinking_budget}\n{prompt}".encode('utf-8')).hexdigest()
+
+    def _cached(self, key: str) -> Optional[str]:
+        if not self.cache_path:
+            return None
+        try:
+            with open(self.cache_path / f"{key}.json", 'r', encoding='utf-8') as f:
+                return json.load(f)['summary']
+        except (FileNotFoundError, json.JSONDecodeError, KeyError):
+            return None
+
+    def _store(self, key: str, summary: str) -> None:
+        if not self.cache_path:
+            return
+        path = self.cache_path / f"{key}.json"
+        tmp_path = path.with_suffix(f'.{threading.get_ident()}.tmp')
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({'model': self.model, 'summary': summary, 'created_at': datetime.now().isoformat()},
+                      f, ensure_ascii=False)
+        tmp_path.replace(path)
+
+    def _summarize_chunk(self, prompt: str) -> Dict[str, Any]:
+        key = self._key(prompt)
+        summary = self._cached(key)
+        if summary is not None:
+            return {'summary': summary, 'cached': True, 'usage': None, 'seconds': 0.0}
+        started = time.perf_counter()
+        summary, usage = self.summarize(prompt, self.model, self.thinking_budget)
+        self._store(key, summary)
+        return {'summary': summary, 'cached': False, 'usage': usage, 'seconds': time.perf_counter() - started}
+
+    def condense(self, context: str) -> Tuple[str, Dict[str, Any]]:
+        """
+        Resume el contexto por partes (varias rondas si los resúmenes siguen siendo largos)
+
+        Returns:
+            Tupla con (contexto resumido, detalle: partes, llamadas, en caché, tokens y segundos)
+        """
+        detail = {'original_chars': len(context), 'rounds': 0, 'chunks': 0, 'calls': 0, 'cached_chunks': 0,
+                  'usage': None, 'seconds': 0.0}
+        text = context
+        while len(text) > self.threshold_chars and detail['rounds'] < self.max_rounds:
+            chunks = split_text(text, self.chunk_chars)
+            prompts = [SUMMARY_PROMPT.format(part=i, total=len(chunks), text=chunk)
+                       for i, chunk in enumerate(chunks, 1)]
+            with ThreadPoolExecutor(max_workers=max(1, min(self.workers, len(prompts))),
+                                    thread_name_prefix='condense') as executor:
+                summaries = list(executor.map(self._summarize_chunk, prompts))
+            detail['rounds'] += 1
+            detail['chunks'] += len(chunks)
+            for summary in summaries:
+                detail['cached_chunks'] += summary['cached']
+                detail['calls'] += not summary['cached']
+                detail['usage'] = add_usage(detail['usage'], summary['usage'])
+                detail['seconds'] += summary['seconds']
+            text = '\n\n'.join(f"[Parte {i}] {summary['summary'].strip()}"
+                               for i, summary in enumerate(summaries, 1))
+        detail['condensed_chars'] = len(text)
+        detail['seconds'] = round(detail['seconds'], 4)
+        return text, detail
+
+
+def from_config(config: Dict[str, Any], summarize: SummarizeFn) -> Optional[ContextCondenser]:
+    """Crea el resumidor según la sección 'context_condensing'; None si está desactivado"""
+    settings = _settings(config)
+    if not settings.pop('enabled'):
+        return None
+    return ContextCondenser(summarize, **settings)
@@ -0,0 +1,145 @@
+"""
+Modo daemon: procesa los archivos que llegan a una carpeta de entrada
+Un solo proceso de larga duración toma cada archivo con un rename atómico, lo
+procesa con el procesador de Gemini ya inicializado (cliente, conexiones, cachés
+y circuit breaker compartidos) y deja resultados y reporte por archivo
+"""
+
+import copy
+import os
+import threading
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Any, List, Optional
+
+from .utils import setup_logger, write_items_csv
+
+DEFAULT_WATCH_CONFIG = {
+    'directory': 'data/input/inbox',
+    'patterns': ['*.csv', '*.csv.gz', '*.jsonl', '*.jsonl.gz', '*.xlsx'],
+    'poll_seconds': 2,
+    'settle_seconds': 1,
+    'processing_dir': 'data/input/processing',
+    'done_dir': 'data/input/done',
+    'failed_dir': 'data/input/failed',
+    'output_dir': 'data/output/batches'
+}
+
+# Archivos que un productor todavía está escribiendo
+_PARTIAL_SUFFIXES = ('.tmp', '.part', '.partial', '.crdownload')
+
+
+class Shutdown:
+    """Pedido de apagado (SIGTERM/SIGINT): no se despacha nada nuevo y lo en vuelo termina"""
+
+    def __init__(self):
+        self._event = threading.Event()
+        # Elementos del lote en curso que no llegaron a despacharse
+        self.deferred: List[Dict[str, Any]] = []
+
+    @property
+    def requested(self) -> bool:
+        return self._event.is_set()
+
+    def request(self, *_) -> None:
+        """Se puede usar directamente como manejador de señales"""
+        self._event.set()
+
+    def wait(self, seconds: float) -> bool:
+        return self._event.wait(seconds)
+
+    def defer(self, items: List[Dict[str, Any]]) -> None:
+        self.deferred.extend(items)
+
+
+class Spool:
+    """Carpeta de entrada con toma atómica: entrada -> en proceso -> procesados (o fallidos)"""
+
+    def __init__(self, directory: str, patterns: List[str], settle_seconds: float, processing_dir: str,
+                 done_dir: str, failed_dir: str, output_dir: str, poll_seconds: float = 2):
+        self.directory = Path(directory)
+        self.patterns = patterns
+        self.settle_seconds = settle_seconds
+        self.processing_dir = Path(processing_dir)
+        self.done_dir = Path(done_dir)
+        self.failed_dir = Path(failed_dir)
+        self.output_dir = Path(output_dir)
+        self.poll_seconds = poll_seconds
+        self.logger = setup_logger('daemon')
+        for path in (self.directory, self.processing_dir, self.done_dir, self.failed_dir):
+            path.mkdir(parents=True, exist_ok=True)
+
+    def candidates(self) -> List[Path]:
+        """Archivos listos, del más antiguo al más nuevo"""
+        now = datetime.now().timestamp()
+        found = {path for pattern in self.patterns for path in self.directory.glob(pattern)}
+        ready = []
+        for path in found:
+            if path.name.startswith('.') or path.name.endswith(_PARTIAL_SUFFIXES):
+                continue
+            try:
+                modified = path.stat().st_mtime
+            except FileNotFoundError:
+                continue
+            # Un archivo modificado recién puede estar copiándose todavía
+            if now - modified >= self.settle_seconds:
+                ready.append((modified, path.name, path))
+        return [path for _, _, path in sorted(ready)]
+
+    def claim(self) -> Optional[Path]:
+        """
+        Toma el próximo archivo moviéndolo a la carpeta en proceso
+
+        El rename es atómico: si varios daemons comparten la carpeta, solo uno lo obtiene
+        """
+        for path in self.candidates():
+            claimed = self.processing_dir / f"{datetime.now():%Y%m%dT%H%M%S}-{os.getpid()}-{path.name}"
+            try:
+                os.rename(path, claimed)
+            except FileNotFoundError:
+                continue
+            self.logger.info("Archivo tomado: %s", path.name)
+            return claimed
+        return None
+
+    @staticmethod
+    def batch_name(claimed: Path) -> str:
+        name = claimed.name
+        for suffix in ('.gz', '.csv', '.jsonl', '.xlsx'):
+            name = name[:-len(suffix)] if name.endswith(suffix) else name
+        return name
+
+    def batch_config(self, config: Dict[str, Any], claimed: Path) -> Dict[str, Any]:
+        """Configuración del lote: entrada tomada y salidas en su propia carpeta"""
+        batch = copy.deepcopy(config)
+        output = self.output_dir / self.batch_name(claimed)
+        batch['paths'] = {**batch['paths'], 'input_data': str(claimed),
+                          'output_data': str(output / 'results.csv'), 'logs': f"{output}{os.sep}"}
+        return batch
+
+    def requeue(self, claimed: Path, items: List[Dict[str, Any]]) -> str:
+        """Devuelve a la entrada lo que no se despachó (se escribe aparte y se publica con rename)"""
+        # Sin el prefijo de la toma, para que los nombres no crezcan al volver a tomarse
+        original = self.batch_name(Path(claimed.name.split('-', 2)[-1]))
+        stem = original[:-len('.remaining')] if original.endswith('.remaining') else original
+        tmp_path = write_items_csv(str(self.processing_dir / f"{stem}.remaining.csv.part"), items)
+        # Un .remaining.csv anterior que nadie tomó todavía no se pisa
+        target, copy_number = self.directory / f"{stem}.remaining.csv", 1
+        while target.exists():
+            copy_number += 1
+            target = self.directory / f"{stem}-{copy_number}.remaining.csv"
+        os.replace(tmp_path, target)
+        return str(target)
+
+    def finish(self, claimed: Path, failed: bool = False) -> Path:
+        target = (self.failed_dir if failed else self.done_dir) / claimed.name
+        os.replace(claimed, target)
+        return target
+
+
+def spool_from_config(config: Dict[str, Any], directory: Optional[str] = None) -> Spool:
+    """Crea la carpeta de entrada según la sección 'watch' (`directory` la reemplaza)"""
+    settings = {**DEFAULT_WATCH_CONFIG, **config.get('watch', {})}
+    if directory:
+        settings['directory'] = directory
+    return Spool(**settings)
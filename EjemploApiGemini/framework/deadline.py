@@ -0,0 +1,146 @@
+"""
+Ejecuciones con hora límite (ventana de mantenimiento)
+Con el rendimiento observado se estima si un elemento alcanza a terminar antes
+del límite; los que no, no se despachan y quedan guardados para la próxima ventana
+"""
+
+import re
+import threading
+import time
+from datetime import datetime, timedelta
+from typing import Dict, Any, Callable, List, Optional
+
+from .utils import write_items_csv
+
+DEFAULT_DEADLINE_CONFIG = {
+    'safety_factor': 1.2,
+    'initial_estimate_seconds': 120,
+    'unprocessed_file': 'data/output/unprocessed.csv'
+}
+
+_DURATION = re.compile(r'(\d+(?:\.\d+)?)\s*([hms]?)')
+_UNITS = {'h': 3600, 'm': 60, 's': 1, '': 1}
+
+
+def parse_duration(text: str) -> float:
+    """Segundos de '3600', '90m', '2h' o '1h30m'"""
+    text = str(text).strip().lower()
+    parts = _DURATION.findall(text)
+    if not parts or _DURATION.sub('', text).strip():
+        raise ValueError(f"Duración inválida: {text!r} (ejemplos: 90m, 2h, 1h30m, 3600)")
+    return sum(float(value) * _UNITS[unit] for value, unit in parts)
+
+
+def parse_deadline(text: str, now: Optional[datetime] = None) -> datetime:
+    """Hora límite desde 'HH:MM' (hoy, o mañana si ya pasó) o una fecha ISO"""
+    now = now or datetime.now()
+    try:
+        clock = datetime.strptime(text.strip(), '%H:%M')
+    except ValueError:
+        try:
+            return datetime.fromisoformat(text.strip())
+        except ValueError:
+            raise ValueError(f"Hora límite inválida: {text!r} (ejemplos: 06:00, 2024-05-01T06:00)")
+    deadline = now.replace(hour=clock.hour, minute=clock.minute, second=0, microsecond=0)
+    return deadline if deadline > now else deadline + timedelta(days=1)
+
+
+class Deadline:
+    """
+    Decide qué elementos se despachan antes de la hora límite
+
+    La duración esperada de un elemento es su costo estimado (scheduler.estimate_cost)
+    por los segundos por unidad de costo observados hasta ahora, con un margen de
+    seguridad; sin observaciones todavía se usa initial_estimate_seconds
+    """
+
+    def __init__(self, deadline_at: datetime, safety_factor: float = 1.2,
+                 initial_estimate_seconds: float = 120, unprocessed_file: Optional[str] = None,
+                 clock: Callable[[], float] = time.monotonic):
+        self.deadline_at = deadline_at
+        self.safety_factor = safety_factor
+        self.initial_estimate_seconds = initial_estimate_seconds
+        self.unprocessed_file = unprocessed_file
+        self._clock = clock
+        # El límite se convierte a reloj monótono para no depender de ajustes de hora
+        self._end = clock() + (deadline_at - datetime.now()).total_seconds()
+        self.observed_seconds = 0.0
+        self.observed_cost = 0.0
+        self.stopped = False
+        self.skipped = 0
+        self.unprocessed: List[Dict[str, Any]] = []
+        self._lock = threading.Lock()
+
+    def remaining(self) -> float:
+        return self._end - self._clock()
+
+    @property
+    def expired(self) -> bool:
+        return self.remaining() <= 0
+
+    def record(self, cost: float, seconds: float) -> None:
+        """Incorpora la duración real de un elemento terminado"""
+        with self._lock:
+            self.observed_cost += max(cost, 1.0)
+            self.observed_seconds += seconds
+
+    def expected_seconds(self, cost: float) -> float:
+        with self._lock:
+            if not self.observed_cost:
+                return self.initial_estimate_seconds
+            per_unit = self.observed_seconds / self.observed_cost
+        return max(cost, 1.0) * per_unit * self.safety_factor
+
+    def allows(self, cost: float) -> bool:
+        """True si un elemento de ese costo despachado ahora termina antes del límite"""
+        return self.expected_seconds(cost) <= self.remaining()
+
+    def skip(self, item: Optional[Dict[str, Any]] = None, count: int = 1) -> None:
+        """Deja un elemento (o `count` pendientes en otra fuente) para la próxima ventana"""
+        with self._lock:
+            self.stopped = True
+            self.skipped += count
+            if item is not None:
+                self.unprocessed.append(item)
+
+    def write_unprocessed(self) -> Optional[str]:
+        """Guarda los elementos no despachados en el formato del CSV de entrada"""
+        if not self.unprocessed or not self.unprocessed_file:
+            return None
+        return write_items_csv(self.unprocessed_file, self.unprocessed)
+
+    def summary(self) -> Dict[str, Any]:
+        """Sección del reporte de ejecución"""
+        remaining = self.remaining()
+        with self._lock:
+            per_unit = self.observed_seconds / self.observed_cost if self.observed_cost else None
+        return {
+            'deadline': self.deadline_at.isoformat(timespec='seconds'),
+            'finished_before_deadline': remaining >= 0,
+            'remaining_seconds': round(max(remaining, 0), 1),
+            'overrun_seconds': round(max(-remaining, 0), 1),
+            'stopped_dispatch': self.stopped,
+            'unprocessed_items': self.skipped,
+            'unprocessed_file': self.unprocessed_file if self.unprocessed else None,
+            'seconds_per_cost_unit': round(per_unit, 6) if per_unit is not None else None
+        }
+
+
+_deadline: Optional[Deadline] = None
+
+
+def configure(config: Dict[str, Any], deadline_at: datetime) -> Deadline:
+    """Activa la hora límite de la ejecución con la sección 'deadline' de la configuración"""
+    global _deadline
+    settings = {**DEFAULT_DEADLINE_CONFIG, **config.get('deadline', {})}
+    _deadline = Deadline(deadline_at, **settings)
+    return _deadline
+
+
+def active_deadline() -> Optional[Deadline]:
+    return _deadline
+
+
+def reset() -> None:
+    global _deadline
+    _deadline = None
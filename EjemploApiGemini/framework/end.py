@@ -4,84 +4,253 @@ Módulo de finalización y limpieza del framework
 
 import csv
 import json
-import logging
+import os
 from datetime import datetime
 from pathlib import Path
-from typing import Dict, Any, List
+from typing import Dict, Any, Iterable, Optional
+from .blobs import active_store, get_store
+from .circuit_breaker import active_breaker
+from .deadline import active_deadline
+from .health import active_report
+from .models import Result
+from .reorder import INPUT, SEQUENCE_COLUMN, UNORDERED, ReorderBuffer, settings_from_config
+from .similarity import active_cache
+from .stats import RunStats
+from .tokens import active_budget
+from .structured import SECTION_COLUMNS, section_columns
 
 
-def save_results(results: List[Dict[str, Any]], config: Dict[str, Any]) -> None:
-    """Guarda los resultados exitosos en archivo CSV"""
-    if not results:
-        return
-    
-    output_path = config['paths']['output_data']
-    Path(output_path).parent.mkdir(parents=True, exist_ok=True)
-    
-    csv_data = []
-    for result in results:
-        if isinstance(result, dict) and 'generated_response' in result:
-            csv_data.append({
-                'id': result.get('transaction_id', ''),
-                'original_prompt': result.get('original_prompt', ''),
-                'generated_response': result.get('generated_response', ''),
-                'status': result.get('status', ''),
-                'model_used': result.get('metadata', {}).get('model_used', ''),
-                'response_length': result.get('metadata', {}).get('response_length', 0),
-                'processed_at': datetime.now().isoformat()
-            })
-    
-    if csv_data:
-        with open(output_path, 'w', newline='', encoding='utf-8') as f:
-            writer = csv.DictWriter(f, fieldnames=csv_data[0].keys())
+RESULT_COLUMNS = ['id', 'original_prompt', 'generated_response', 'status', 'model_used',
+                  'response_length', 'processed_at']
+# Con el almacén de blobs la respuesta se reemplaza por su hash
+BLOB_RESULT_COLUMNS = [column if column != 'generated_response' else 'response_hash' for column in RESULT_COLUMNS]
+
+
+def result_row(result: Any) -> Optional[Dict[str, Any]]:
+    """Fila del CSV de resultados para un Result o un dict con el formato anterior"""
+    if isinstance(result, Result):
+        return {
+            'id': result.transaction_id,
+            'original_prompt': result.original_prompt,
+            'generated_response': result.generated_response,
+            'status': result.status,
+            'model_used': result.model_used,
+            'response_length': result.response_length,
+            'processed_at': datetime.now().isoformat()
+        }
+    if isinstance(result, dict) and 'generated_response' in result:
+        return {
+            'id': result.get('transaction_id', ''),
+            'original_prompt': result.get('original_prompt', ''),
+            'generated_response': result.get('generated_response', ''),
+            'status': result.get('status', ''),
+            'model_used': result.get('metadata', {}).get('model_used', ''),
+            'response_length': result.get('metadata', {}).get('response_length', 0),
+            'processed_at': datetime.now().isoformat()
+        }
+    return None
+
+
+class ResultWriter:
+    """
+    Escribe los resultados en streaming a un CSV temporal y lo publica al cerrar
+
+    Cada fila alimenta también las estadísticas del reporte, así no hace falta
+    conservar la lista de resultados en memoria. Con merge=True las filas nuevas se
+    combinan con el archivo existente (las nuevas reemplazan a las de mismo id).
+    Las filas escritas con su secuencia de entrada salen en el orden del archivo de
+    entrada (sección 'output_order')
+    """
+
+    def __init__(self, config: Dict[str, Any], stats: Optional[RunStats] = None, merge: bool = False):
+        self.output_path = config['paths']['output_data']
+        self.stats = stats
+        self.merge = merge
+        # Con salida estructurada cada sección va en su propia columna
+        self.structured = bool(config.get('gemini', {}).get('structured_output', False))
+        self.blobs = get_store(config)
+        base_columns = BLOB_RESULT_COLUMNS if self.blobs else RESULT_COLUMNS
+        self.columns = base_columns + SECTION_COLUMNS if self.structured else base_columns
+        order = settings_from_config(config)
+        self.sequenced = order['mode'] == INPUT and order['overflow'] == UNORDERED
+        if self.sequenced:
+            self.columns = self.columns + [SEQUENCE_COLUMN]
+        self.rows = 0
+        self._ids = set()
+        Path(self.output_path).parent.mkdir(parents=True, exist_ok=True)
+        # Escritura atómica: varios runners de la cola SQLite pueden consolidar a la vez
+        self.tmp_path = f"{self.output_path}.{os.getpid()}.tmp"
+        self._file = open(self.tmp_path, 'w', newline='', encoding='utf-8')
+        self._writer = csv.DictWriter(self._file, fieldnames=self.columns)
+        self._writer.writeheader()
+        self._reorder = None
+        if order['mode'] == INPUT:
+            self._reorder = ReorderBuffer(self._writer.writerow, order['max_buffered_rows'], order['overflow'],
+                                          order['spill_dir'] or str(Path(self.output_path).parent))
+
+    def write(self, result: Any, sequence: Optional[int] = None) -> Optional[str]:
+        """
+        Args:
+            sequence: Posición del elemento en la entrada (desde 1); sin ella la fila se escribe ya
+
+        Returns:
+            Hash de la respuesta en el almacén de blobs (None sin almacén), para no guardarla dos veces
+        """
+        row = result_row(result)
+        if row is None:
+            return None
+        if self.structured:
+            row.update(section_columns(result.get('sections')))
+        if self.blobs:
+            row['response_hash'] = self.blobs.put(row.pop('generated_response'))
+        if self.sequenced:
+            row[SEQUENCE_COLUMN] = sequence
+        if self._reorder and sequence is not None:
+            self._reorder.add(sequence, row)
+        else:
+            self._writer.writerow(row)
+        self.rows += 1
+        if self.merge:
+            self._ids.add(str(row['id']))
+        if self.stats is not None:
+            self.stats.add_result(result)
+        return row.get('response_hash')
+
+    def skip(self, sequence: int) -> None:
+        """El elemento de esa posición terminó sin fila (fallido o rechazado)"""
+        if self._reorder:
+            self._reorder.skip(sequence)
+
+    def close(self) -> None:
+        """Publica el archivo si se escribió al menos una fila"""
+        if self._reorder:
+            self._reorder.close()
+            if self.stats is not None and self._reorder.released:
+                self.stats.output_order = self._reorder.summary()
+        self._file.close()
+        if not self.rows:
+            os.remove(self.tmp_path)
+        elif self.merge and os.path.exists(self.output_path):
+            self._merge_existing()
+        else:
+            os.replace(self.tmp_path, self.output_path)
+
+    def _merge_existing(self) -> None:
+        """Filas existentes (sin los ids reescritos) seguidas de las nuevas, en un solo paso"""
+        merged_path = f"{self.tmp_path}.merge"
+        with open(merged_path, 'w', newline='', encoding='utf-8') as out:
+            writer = csv.DictWriter(out, fieldnames=self.columns, extrasaction='ignore', restval='')
             writer.writeheader()
-            writer.writerows(csv_data)
+            with open(self.output_path, 'r', newline='', encoding='utf-8') as f:
+                writer.writerows(row for row in csv.DictReader(f) if row.get('id') not in self._ids)
+            with open(self.tmp_path, 'r', newline='', encoding='utf-8') as f:
+                writer.writerows(csv.DictReader(f))
+        os.replace(merged_path, self.output_path)
+        os.remove(self.tmp_path)
 
 
-def save_report(results: List[Dict[str, Any]], failed_items: List[Dict[str, Any]], 
-                start_time: datetime, config: Dict[str, Any]) -> None:
-    """Guarda el reporte final en archivo JSON"""
+def save_results(results: Iterable[Any], config: Dict[str, Any], stats: Optional[RunStats] = None) -> None:
+    """Guarda los resultados exitosos en archivo CSV"""
+    writer = ResultWriter(config, stats)
+    try:
+        for result in results:
+            writer.write(result)
+    finally:
+        writer.close()
+
+
+def model_breakdown(results: Iterable[Any]) -> Dict[str, Dict[str, Any]]:
+    """Latencia y escalamientos por modelo"""
+    return RunStats.from_results(results).breakdown('models')
+
+
+def generation_breakdown(results: Iterable[Any]) -> Dict[str, Dict[str, Dict[str, Any]]]:
+    """Latencia por thinking budget, por uso de Google Search y por plantilla"""
+    return RunStats.from_results(results).report()['generation']
+
+
+def save_report(stats: RunStats, start_time: datetime, config: Dict[str, Any]) -> Dict[str, Any]:
+    """Guarda el reporte final en archivo JSON a partir de las estadísticas agregadas"""
     end_time = datetime.now()
     duration = (end_time - start_time).total_seconds() if start_time else 0
-    total = len(results) + len(failed_items)
-    success_rate = (len(results) / total * 100) if total > 0 else 0
-    
+    total = stats.total
+    success_rate = (stats.successful / total * 100) if total > 0 else 0
+
     report = {
         'execution_summary': {
             'start_time': start_time.isoformat() if start_time else None,
             'end_time': end_time.isoformat(),
             'duration_seconds': duration,
             'total_items': total,
-            'successful_items': len(results),
-            'failed_items': len(failed_items),
-            'success_rate_percent': round(success_rate, 2)
-        }
+            'successful_items': stats.successful,
+            'failed_items': stats.failed,
+            'success_rate_percent': round(success_rate, 2),
+            'escalated_items': stats.escalated,
+            'retries': stats.retries,
+            'total_tokens': stats.tokens['total_tokens'],
+            'tokens_per_second': round(stats.tokens['total_tokens'] / duration, 2) if duration > 0 else 0
+        },
+        **stats.report()
     }
-    
+
+    breaker = active_breaker()
+    if breaker and breaker.transitions:
+        report['circuit_breaker'] = breaker.summary()
+
+    budget = active_budget()
+    if budget:
+        report['token_budget'] = budget.summary()
+
+    guard = active_deadline()
+    if guard:
+        report['deadline'] = guard.summary()
+
+    cache = active_cache()
+    if cache:
+        report['similarity_cache'] = cache.summary()
+
+    blob_store = active_store()
+    if blob_store:
+        report['blobs'] = blob_store.summary()
+
+    health_report = active_report()
+    if health_report:
+        report['health_check'] = health_report
+
     report_path = Path(config['paths']['logs']) / 'execution_report.json'
     report_path.parent.mkdir(parents=True, exist_ok=True)
-    
+
     with open(report_path, 'w', encoding='utf-8') as f:
         json.dump(report, f, indent=2, ensure_ascii=False)
+    return report
 
 
-def run(results: List[Dict[str, Any]] = None, failed_items: List[Dict[str, Any]] = None, 
-        start_time: datetime = None) -> None:
+def run(results: Iterable[Any] = None, failed_items: Iterable[Dict[str, Any]] = None,
+        start_time: datetime = None, stats: Optional[RunStats] = None,
+        config: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
     """
     Función principal de finalización
     
     Args:
-        results: Lista de resultados exitosos
-        failed_items: Lista de elementos fallidos
+        results: Resultados exitosos (lista o iterador); None si ya se escribieron con ResultWriter
+        failed_items: Elementos fallidos
         start_time: Tiempo de inicio del proceso
+        stats: Estadísticas acumuladas durante la ejecución
+        config: Configuración de la ejecución; por defecto se lee settings.json
+
+    Returns:
+        El reporte de ejecución guardado
     """
-    from .init import load_config
-    config = load_config()
+    if config is None:
+        from .init import load_config
+        config = load_config()
     
-    results = results or []
-    failed_items = failed_items or []
+    stats = stats or RunStats()
     
     if results:
-        save_results(results, config)
+        save_results(results, config, stats)
+    
+    for item in failed_items or []:
+        stats.add_failed_item(item)
     
-    save_report(results, failed_items, start_time, config)
+    return save_report(stats, start_time, config)
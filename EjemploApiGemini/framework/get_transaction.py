@@ -2,11 +2,11 @@
 Módulo para obtener y validar datos de transacciones
 """
 
-import logging
-from typing import Dict, Any, Optional
+from typing import Dict, Any
+from .models import Transaction
 
 
-def run(item: Dict[str, Any]) -> Dict[str, Any]:
+def run(item: Dict[str, Any]) -> Transaction:
     """
     Obtiene y valida los datos de una transacción
     
@@ -23,13 +23,7 @@ def run(item: Dict[str, Any]) -> Dict[str, Any]:
         if field not in item or not item[field]:
             raise ValueError(f"Campo requerido '{field}' está vacío o ausente")
     
-    return {
-        'id': item['id'],
-        'prompt': item['prompt'],
-        'context': item.get('context', ''),
-        'expected_output': item.get('expected_output', ''),
-        'status': 'pending'
-    }
+    return Transaction.from_item(item)
 
 
 def validate_prompt(prompt: str) -> bool:
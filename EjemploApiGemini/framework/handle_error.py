@@ -3,45 +3,151 @@ Módulo para manejo de errores y excepciones
 """
 
 import csv
-import logging
+import json
 import os
-from datetime import datetime
-from typing import Dict, Any
+import threading
+from typing import Dict, Any, Iterable, List, Optional, Set, Tuple
+from .models import FailedItem
 from .utils import classify_error
 
 
-def log_error(item: Dict[str, Any], error: Exception, config: Dict[str, Any]) -> None:
-    """Registra el error en los archivos correspondientes"""
-    failed_items_path = config['paths']['output_data'].replace('.csv', '_failed.csv')
+# Los workers registran sus fallos en paralelo: un solo escritor a la vez por proceso
+_append_lock = threading.Lock()
+
+
+def failed_items_path(config: Dict[str, Any]) -> str:
+    """Ruta del archivo de fallidos, junto al de resultados"""
+    return config['paths']['output_data'].replace('.csv', '_failed.csv')
+
+
+def _failed_entry(item: Dict[str, Any], error: Exception, error_type: Optional[str] = None) -> FailedItem:
+    """Construye la fila del archivo de fallidos para un elemento"""
+    return FailedItem(
+        id=item.get('id', 'unknown'),
+        prompt=item.get('prompt', ''),
+        context=item.get('context', ''),
+        expected_output=item.get('expected_output', ''),
+        error_type=error_type or classify_error(error),
+        error_message=str(error),
+        payload=json.dumps({key: item.get(key) for key in item.keys() if key not in FailedItem.FAILURE_FIELDS},
+                           ensure_ascii=False, default=str)
+    )
+
+
+def log_errors(entries: Iterable[Tuple[Dict[str, Any], Exception]], config: Dict[str, Any]) -> None:
+    """Registra varios elementos fallidos abriendo el archivo de errores una sola vez"""
+    _append_rows([_failed_entry(item, error) for item, error in entries], config)
+
+
+def log_failed_result(item: Dict[str, Any], error_type: str, message: str, config: Dict[str, Any]) -> None:
+    """Registra un elemento que el procesamiento devolvió como fallido (sin excepción)"""
+    _append_rows([_failed_entry(item, message, error_type)], config)
+
+
+def _append_rows(rows: List[FailedItem], config: Dict[str, Any]) -> None:
+    """Agrega filas al archivo de fallidos (escribe el encabezado si el archivo es nuevo)"""
+    if not rows:
+        return
+    path = failed_items_path(config)
     
-    failed_entry = {
-        'id': item.get('id', 'unknown'),
-        'prompt': item.get('prompt', ''),
-        'context': item.get('context', ''),
-        'expected_output': item.get('expected_output', ''),
-        'status': 'failed',
-        'error_type': classify_error(error),
-        'error_message': str(error),
-        'failed_at': datetime.now().isoformat()
-    }
+    with _append_lock:
+        _upgrade_header(path)
+        _write_rows(path, rows)
+
+
+def _upgrade_header(path: str) -> None:
+    """Reescribe con las columnas actuales un archivo de fallidos de una versión anterior"""
+    try:
+        with open(path, 'r', encoding='utf-8', newline='') as f:
+            header = next(csv.reader(f), None)
+            if header is None or tuple(header) == FailedItem.FIELDS:
+                return
+            rows = list(csv.DictReader(f, fieldnames=header))
+    except FileNotFoundError:
+        return
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, 'w', newline='', encoding='utf-8') as f:
+        writer = csv.DictWriter(f, fieldnames=FailedItem.FIELDS, extrasaction='ignore', restval='')
+        writer.writeheader()
+        writer.writerows(rows)
+    os.replace(tmp_path, path)
+
+
+def _write_rows(path: str, rows: List[FailedItem]) -> None:
+    with open(path, 'a', newline='', encoding='utf-8') as f:
+        writer = csv.writer(f)
+        # Archivo nuevo (o vacío): el encabezado va antes que cualquier fila
+        if f.tell() == 0:
+            writer.writerow(FailedItem.FIELDS)
+        writer.writerows([getattr(row, field) for field in FailedItem.FIELDS] for row in rows)
+
+
+def failure_key(item: Dict[str, Any], error: Exception) -> Tuple[str, str, str]:
+    """(id, prompt, mensaje de error) tal como quedan escritos en el archivo de fallidos"""
+    entry = _failed_entry(item, error)
+    return tuple('' if value is None else str(value) for value in (entry.id, entry.prompt, entry.error_message))
+
+
+def logged_failures(config: Dict[str, Any]) -> Set[Tuple[str, str, str]]:
+    """(id, prompt, mensaje de error) de las filas ya registradas en el archivo de fallidos"""
+    path = failed_items_path(config)
+    if not os.path.exists(path):
+        return set()
+    with _append_lock, open(path, 'r', encoding='utf-8', newline='') as f:
+        return {(row.get('id'), row.get('prompt'), row.get('error_message')) for row in csv.DictReader(f)}
+
+
+def compact_failed(config: Dict[str, Any]) -> Tuple[int, int]:
+    """
+    Compacta el archivo de fallidos: una fila por id (la más reciente) y sin los ids
+    que ya figuran en el archivo de resultados
+
+    Returns:
+        Tupla con (filas antes, filas después)
+    """
+    path = failed_items_path(config)
+    if not os.path.exists(path):
+        return 0, 0
+    
+    succeeded = set()
+    results_path = config['paths']['output_data']
+    if os.path.exists(results_path):
+        with open(results_path, 'r', encoding='utf-8', newline='') as f:
+            succeeded = {row.get('id') for row in csv.DictReader(f)}
     
-    # Escribir al archivo de errores
-    file_exists = os.path.exists(failed_items_path)
-    with open(failed_items_path, 'a', newline='', encoding='utf-8') as f:
-        writer = csv.DictWriter(f, fieldnames=failed_entry.keys())
-        if not file_exists:
-            writer.writeheader()
-        writer.writerow(failed_entry)
+    latest, before = {}, 0
+    with open(path, 'r', encoding='utf-8', newline='') as f:
+        for row in csv.DictReader(f):
+            before += 1
+            if row.get('id') not in succeeded:
+                # Reinsertar mueve el id al final: queda el orden del último fallo
+                latest.pop(row.get('id'), None)
+                latest[row.get('id')] = row
+    
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, 'w', newline='', encoding='utf-8') as f:
+        writer = csv.DictWriter(f, fieldnames=FailedItem.FIELDS, extrasaction='ignore', restval='')
+        writer.writeheader()
+        writer.writerows(latest.values())
+    os.replace(tmp_path, path)
+    return before, len(latest)
+
+
+def log_error(item: Dict[str, Any], error: Exception, config: Dict[str, Any]) -> None:
+    """Registra el error en los archivos correspondientes"""
+    log_errors([(item, error)], config)
 
 
-def run(item: Dict[str, Any], error: Exception) -> None:
+def run(item: Dict[str, Any], error: Exception, config: Optional[Dict[str, Any]] = None) -> None:
     """
     Función principal de manejo de errores
     
     Args:
         item: Elemento que falló
         error: Excepción ocurrida
+        config: Configuración de la ejecución; por defecto se lee settings.json
     """
-    from .init import load_config
-    config = load_config()
+    if config is None:
+        from .init import load_config
+        config = load_config()
     log_error(item, error, config)
@@ -0,0 +1,140 @@
+"""
+Verificación de salud de la API antes de una ejecución
+Prueba los modelos configurados en paralelo con un prompt mínimo y un timeout,
+midiendo conexión, tiempo hasta el primer chunk y errores; con eso se aborta la
+ejecución de entrada o se elige el modelo sano más rápido de la lista
+"""
+
+import time
+from concurrent.futures import ThreadPoolExecutor, wait
+from typing import Dict, Any, Callable, List, Optional
+
+from google import genai
+from google.genai import types
+
+from .utils import classify_error, setup_logger
+
+DEFAULT_HEALTH_CONFIG = {
+    'enabled': False,
+    'models': [],
+    'timeout_seconds': 15,
+    'prompt': 'Responde solo: OK',
+    'fail_fast': True,
+    'select_fastest': False
+}
+
+
+class HealthCheckError(RuntimeError):
+    """Ningún modelo respondió (o el configurado no está sano): no tiene sentido ejecutar"""
+
+
+def probe_model(client: Any, model: str, prompt: str,
+                clock: Callable[[], float] = time.perf_counter) -> Dict[str, Any]:
+    """
+    Prueba un modelo: consulta sus metadatos (conexión y credenciales) y luego
+    genera en streaming hasta el primer chunk
+
+    Returns:
+        Dict con model, healthy, connect_seconds, first_chunk_seconds, error_type y error
+    """
+    probe = {'model': model, 'healthy': False, 'connect_seconds': None, 'first_chunk_seconds': None,
+             'error_type': None, 'error': None}
+    stream = None
+    try:
+        started = clock()
+        client.models.get(model=model)
+        probe['connect_seconds'] = round(clock() - started, 4)
+
+        started = clock()
+        stream = client.models.generate_content_stream(
+            model=model, contents=prompt, config=types.GenerateContentConfig(max_output_tokens=16))
+        # Con el primer chunk basta: el resto de la respuesta no dice nada de la salud
+        next(iter(stream), None)
+        probe['first_chunk_seconds'] = round(clock() - started, 4)
+        probe['healthy'] = True
+    except Exception as e:
+        probe['error_type'] = classify_error(e)
+        probe['error'] = str(e)
+    finally:
+        # Sin cerrarlo, el stream mantiene abierta la respuesta HTTP hasta el recolector de basura
+        close = getattr(stream, 'close', None)
+        if close:
+            close()
+    return probe
+
+
+def probe_models(client: Any, models: List[str], prompt: str, timeout: float) -> List[Dict[str, Any]]:
+    """Prueba todos los modelos a la vez; los que no terminan en `timeout` quedan como no sanos"""
+    executor = ThreadPoolExecutor(max_workers=len(models), thread_name_prefix='health')
+    futures = {model: executor.submit(probe_model, client, model, prompt) for model in models}
+    wait(futures.values(), timeout=timeout)
+    # No se espera a las pruebas colgadas: el timeout del cliente HTTP las termina
+    executor.shutdown(wait=False)
+    return [future.result() if future.done() else
+            {'model': model, 'healthy': False, 'connect_seconds': None, 'first_chunk_seconds': None,
+             'error_type': 'SystemException', 'error': f"Sin respuesta en {timeout}s"}
+            for model, future in futures.items()]
+
+
+def fastest(probes: List[Dict[str, Any]]) -> Optional[str]:
+    """Modelo sano con menor tiempo hasta el primer chunk"""
+    healthy = [probe for probe in probes if probe['healthy']]
+    return min(healthy, key=lambda probe: probe['first_chunk_seconds'])['model'] if healthy else None
+
+
+_report: Optional[Dict[str, Any]] = None
+
+
+def check(config: Dict[str, Any], credentials: Dict[str, str],
+          client: Any = None) -> Optional[Dict[str, Any]]:
+    """
+    Ejecuta la verificación según la sección 'health_check'
+
+    Con select_fastest, gemini.model pasa a ser el modelo sano más rápido de la lista.
+    Con fail_fast lanza HealthCheckError si no queda un modelo utilizable
+
+    Returns:
+        Resumen de las pruebas (también va al reporte de ejecución); None si está desactivada
+    """
+    global _report
+    settings = {**DEFAULT_HEALTH_CONFIG, **config.get('health_check', {})}
+    if not settings['enabled']:
+        return None
+    logger = setup_logger('health')
+    configured = config['gemini']['model']
+    # Sin select_fastest solo importa el modelo configurado, pero se prueba siempre
+    candidates = settings['models'] if settings['select_fastest'] else [configured] + settings['models']
+    models = list(dict.fromkeys(candidates or [configured]))
+    timeout = settings['timeout_seconds']
+    client = client or genai.Client(api_key=credentials['gemini_api_key'],
+                                    http_options=types.HttpOptions(timeout=int(timeout * 1000)))
+
+    probes = probe_models(client, models, settings['prompt'], timeout)
+    for probe in probes:
+        logger.info("Salud de %s: %s", probe['model'], 'ok' if probe['healthy'] else probe['error'],
+                    extra={key: value for key, value in probe.items() if key != 'model'})
+
+    selected = fastest(probes) if settings['select_fastest'] else configured
+    usable = any(probe['healthy'] and probe['model'] == selected for probe in probes)
+    _report = {'models': probes, 'selected_model': selected if usable else None}
+    if not usable:
+        errors = '; '.join(f"{probe['model']}: {probe['error']}" for probe in probes if not probe['healthy'])
+        message = f"Verificación de salud fallida ({errors})"
+        if settings['fail_fast']:
+            raise HealthCheckError(message)
+        logger.warning(message)
+        return _report
+
+    if selected != configured:
+        logger.info("Modelo %s elegido por la verificación de salud (antes %s)", selected, configured)
+        config['gemini']['model'] = selected
+    return _report
+
+
+def active_report() -> Optional[Dict[str, Any]]:
+    return _report
+
+
+def reset() -> None:
+    global _report
+    _report = None
@@ -3,12 +3,16 @@ Módulo de inicialización del framework
 Carga configuraciones, credenciales y prepara logging
 """
 
+import atexit
 import json
 import logging
+import logging.handlers
 import os
-import sys
+import queue
 from pathlib import Path
-from typing import Dict, Any, List
+from typing import Dict, Any, List, Optional
+
+from . import utils
 
 # Cargar variables de entorno desde .env si existe
 try:
@@ -69,49 +73,183 @@ def load_credentials() -> Dict[str, str]:
     return credentials
 
 
+def check_api_health(config: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    """
+    Verifica la salud de la API antes de despachar (sección 'health_check')
+
+    Returns:
+        Resumen de las pruebas por modelo; None si está desactivada o se reproducen cassettes
+
+    Raises:
+        HealthCheckError: Si no hay un modelo utilizable y fail_fast está activo
+    """
+    from . import cassettes, health
+
+    health.reset()
+    if not config.get('health_check', {}).get('enabled'):
+        return None
+    if config.get('cassettes', {}).get('mode') == cassettes.REPLAY:
+        return None
+    return health.check(config, load_credentials())
+
+
+DEFAULT_LOGGING_CONFIG = {
+    'level': 'INFO',
+    'format': '%(asctime)s - %(name)s - %(levelname)s - %(message)s',
+    'file': 'data/output/automation.log',
+    'json': True,
+    'max_bytes': 10 * 1024 * 1024,
+    'backup_count': 5,
+    'console_level': None,
+    'quiet': False,
+    'summary_interval_seconds': 10
+}
+
+_listener: Optional[logging.handlers.QueueListener] = None
+
+
 def setup_logging(config: Dict[str, Any]) -> logging.Logger:
-    """Configura el sistema de logging"""
-    log_config = config['logging']
+    """
+    Configura el sistema de logging asíncrono
+
+    Los hilos de trabajo solo encolan el registro (QueueHandler); un QueueListener
+    en segundo plano formatea y escribe en el archivo rotativo (JSON Lines por defecto)
+    y, opcionalmente, en consola
+    """
+    global _listener
+    log_config = {**DEFAULT_LOGGING_CONFIG, **config.get('logging', {})}
     logger = logging.getLogger('gemini_automation')
     
-    if not logger.handlers:
-        # Handler para archivo
-        file_handler = logging.FileHandler(log_config['file'], encoding='utf-8')
-        file_handler.setFormatter(logging.Formatter(log_config['format']))
-        logger.addHandler(file_handler)
+    if _listener is None:
+        Path(log_config['file']).parent.mkdir(parents=True, exist_ok=True)
+        formatter = utils.JsonFormatter() if log_config['json'] else logging.Formatter(log_config['format'])
+
+        # Rotación por tamaño en lugar de un automation.log que crece sin límite
+        file_handler = logging.handlers.RotatingFileHandler(
+            log_config['file'], maxBytes=log_config['max_bytes'],
+            backupCount=log_config['backup_count'], encoding='utf-8')
+        file_handler.setFormatter(formatter)
+        handlers = [file_handler]
+
+        if log_config['console_level']:
+            console_handler = logging.StreamHandler()
+            console_handler.setLevel(getattr(logging, log_config['console_level']))
+            console_handler.setFormatter(logging.Formatter(log_config['format']))
+            handlers.append(console_handler)
+
+        log_queue = queue.SimpleQueue()
+        _listener = logging.handlers.QueueListener(log_queue, *handlers, respect_handler_level=True)
+        _listener.start()
+        atexit.register(shutdown_logging)
+
+        for handler in list(logger.handlers):
+            logger.removeHandler(handler)
+        logger.addHandler(utils.DeferredQueueHandler(log_queue))
         logger.setLevel(getattr(logging, log_config['level']))
+        logger.propagate = False
     
     return logger
 
 
-def load_queue(input_path: str) -> List[Dict[str, Any]]:
+def shutdown_logging() -> None:
+    """Detiene el QueueListener vaciando los registros pendientes"""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        for handler in _listener.handlers:
+            handler.close()
+        _listener = None
+
+
+def load_queue(input_path: str, config: Dict[str, Any] = None) -> List[Dict[str, Any]]:
     """
     Carga los elementos de la cola de procesamiento
     
     Args:
-        input_path: Ruta al archivo de entrada
+        input_path: Ruta al archivo de entrada (.csv, .jsonl, .csv.gz, .jsonl.gz o .xlsx)
+        config: Configuración del framework; si se indica, las filas inválidas se
+            envían al archivo de fallidos antes de gastar tiempo de API
         
     Returns:
-        Lista de elementos a procesar
+        Lista de elementos válidos a procesar
     """
-    import csv
+    from . import readers
     
     if not os.path.exists(input_path):
+        if not input_path.lower().endswith('.csv'):
+            raise FileNotFoundError(f"No existe el archivo de entrada: {input_path}")
         # Crear archivo de ejemplo si no existe
         create_sample_input(input_path)
     
-    queue = []
-    with open(input_path, 'r', encoding='utf-8') as f:
-        reader = csv.DictReader(f)
-        for row in reader:
+    rows = readers.read_rows(input_path)
+    if config is None:
+        return list(rows)
+
+    queue, rejected = [], []
+    for row, error in readers.validate_rows(rows, readers.compile_schema(config)):
+        if error:
+            rejected.append((row, ValueError(error)))
+        else:
             queue.append(row)
+
+    if rejected:
+        from .handle_error import failure_key, logged_failures, log_errors
+        # Cada runner de la cola SQLite (y cada reinicio) vuelve a cargar el archivo:
+        # las filas ya registradas con el mismo error no se repiten
+        logged = logged_failures(config)
+        rejected = [(row, error) for row, error in rejected if failure_key(row, error) not in logged]
+    if rejected:
+        log_errors(rejected, config)
+        logging.getLogger('gemini_automation').warning(
+            "%d filas inválidas enviadas a fallidos durante la carga de %s", len(rejected), input_path)
     
     return queue
 
 
+def load_failed_queue(config: Dict[str, Any], only: Optional[List[str]] = None) -> List[Dict[str, Any]]:
+    """
+    Construye la cola desde el archivo de fallidos para reintentarlos
+
+    Args:
+        config: Configuración del framework
+        only: Tipos de error a reintentar (por ejemplo ['SystemException']); None = todos
+
+    Returns:
+        Un elemento por id (el fallo más reciente), solo las filas que pasan la validación
+    """
+    from . import readers
+    from .handle_error import failed_items_path
+    
+    path = failed_items_path(config)
+    if not os.path.exists(path):
+        return []
+    
+    latest = {}
+    for row in readers.read_csv(path):
+        if only and row.get('error_type') not in only:
+            continue
+        latest.pop(row.get('id'), None)
+        latest[row.get('id')] = _original_row(row)
+    
+    # Las filas que no pasan la validación ya están en fallidos: no se vuelven a registrar
+    checks = readers.compile_schema(config)
+    return [row for row, error in readers.validate_rows(latest.values(), checks) if not error]
+
+
+def _original_row(row: Dict[str, Any]) -> Dict[str, Any]:
+    """Fila de fallidos con las columnas de la entrada original (payload) restauradas"""
+    payload = row.pop('payload', None)
+    try:
+        original = json.loads(payload) if payload else {}
+    except json.JSONDecodeError:
+        original = {}
+    # Los datos del último fallo (error_type, error_message...) siguen disponibles
+    return {**row, **{key: value for key, value in original.items() if value is not None}}
+
+
 def create_sample_input(input_path: str) -> None:
     """
-    Crea un archivo de entrada de ejemplo
+    Crea un archivo de entrada CSV de ejemplo
     
     Args:
         input_path: Ruta donde crear el archivo
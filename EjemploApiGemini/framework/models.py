@@ -0,0 +1,181 @@
+"""
+Registros compactos que fluyen por las fases del framework
+Transaction, Result y FailedItem usan __slots__ (sin __dict__ por instancia) y
+ofrecen acceso tipo diccionario para el código y las pruebas existentes
+"""
+
+from datetime import datetime
+from types import MappingProxyType
+from typing import Dict, Any, List, Mapping, Optional, Tuple
+
+
+class Record:
+    """Base con acceso compatible con dict sobre los atributos del registro"""
+
+    __slots__ = ()
+    # Claves visibles como dict; las subclases las definen (pueden incluir propiedades)
+    FIELDS: Tuple[str, ...] = ()
+
+    def __getitem__(self, key: str) -> Any:
+        if key not in self.FIELDS:
+            raise KeyError(key)
+        return getattr(self, key)
+
+    def __setitem__(self, key: str, value: Any) -> None:
+        if key not in self.FIELDS:
+            raise KeyError(key)
+        setattr(self, key, value)
+
+    def __contains__(self, key: object) -> bool:
+        return key in self.FIELDS
+
+    def get(self, key: str, default: Any = None) -> Any:
+        # Los atributos opcionales en None se comportan como claves ausentes
+        if key not in self.FIELDS:
+            return default
+        value = getattr(self, key)
+        return default if value is None else value
+
+    def keys(self) -> Tuple[str, ...]:
+        return self.FIELDS
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Representación como dict (para JSON, CSV y la cola SQLite)"""
+        values = {key: getattr(self, key) for key in self.FIELDS}
+        return {key: dict(value) if isinstance(value, MappingProxyType) else value for key, value in values.items()}
+
+    def __eq__(self, other: object) -> bool:
+        if isinstance(other, Record):
+            return type(self) is type(other) and self.to_dict() == other.to_dict()
+        if isinstance(other, dict):
+            return self.to_dict() == other
+        return NotImplemented
+
+    # Registros mutables que se comparan por valor: no se pueden usar como clave ni en sets
+    __hash__ = None
+
+    def __repr__(self) -> str:
+        fields = ', '.join(f"{key}={getattr(self, key)!r}" for key in self.__slots__)
+        return f"{type(self).__name__}({fields})"
+
+
+class Transaction(Record):
+    """Transacción validada lista para procesar"""
+
+    __slots__ = ('id', 'prompt', 'context', 'expected_output', 'status',
+                 'model', 'template', 'thinking_budget', 'google_search', 'priority')
+    FIELDS = __slots__
+
+    def __init__(self, id: str, prompt: str, context: str = '', expected_output: str = '',
+                 status: str = 'pending', model: Optional[str] = None, template: Optional[str] = None,
+                 thinking_budget: Any = None, google_search: Any = None, priority: Any = None):
+        self.id = id
+        self.prompt = prompt
+        self.context = context
+        self.expected_output = expected_output
+        self.status = status
+        self.model = model
+        self.template = template
+        self.thinking_budget = thinking_budget
+        self.google_search = google_search
+        self.priority = priority
+
+    @classmethod
+    def from_item(cls, item: Dict[str, Any]) -> 'Transaction':
+        """Crea la transacción desde una fila de la cola; las columnas vacías quedan en None"""
+        def optional(field):
+            value = item.get(field)
+            return None if value in (None, '') else value
+
+        return cls(item['id'], item['prompt'], item.get('context') or '', item.get('expected_output') or '',
+                   model=optional('model'), template=optional('template'),
+                   thinking_budget=optional('thinking_budget'), google_search=optional('google_search'),
+                   priority=optional('priority'))
+
+
+class Result(Record):
+    """Resultado exitoso de una transacción; la metadata se guarda plana en slots"""
+
+    __slots__ = ('transaction_id', 'original_prompt', 'generated_response', 'status',
+                 'model_used', 'model_attempts', 'latency_seconds', 'template',
+                 'thinking_budget', 'google_search', 'has_context', 'has_expected_output', 'sections', 'usage',
+                 'cache_hit', 'context_summary', 'search_dropped')
+    FIELDS = ('transaction_id', 'original_prompt', 'generated_response', 'status', 'metadata', 'sections')
+    METADATA_FIELDS = ('model_used', 'template', 'thinking_budget', 'google_search', 'model_attempts',
+                       'escalated', 'latency_seconds', 'response_length', 'has_context', 'has_expected_output',
+                       'usage', 'cache_hit', 'context_summary', 'search_dropped')
+
+    def __init__(self, transaction_id: str, original_prompt: str, generated_response: str,
+                 status: str = 'completed', model_used: str = '',
+                 model_attempts: Optional[List[Dict[str, Any]]] = None, latency_seconds: float = 0.0,
+                 template: Optional[str] = None, thinking_budget: Any = None, google_search: Any = None,
+                 has_context: bool = False, has_expected_output: bool = False,
+                 sections: Optional[Dict[str, Any]] = None, usage: Optional[Dict[str, int]] = None,
+                 cache_hit: Optional[Dict[str, Any]] = None, context_summary: Optional[Dict[str, Any]] = None,
+                 search_dropped: bool = False):
+        self.transaction_id = transaction_id
+        self.original_prompt = original_prompt
+        self.generated_response = generated_response
+        self.status = status
+        self.model_used = model_used
+        self.model_attempts = model_attempts or []
+        self.latency_seconds = latency_seconds
+        self.template = template
+        self.thinking_budget = thinking_budget
+        self.google_search = google_search
+        self.has_context = has_context
+        self.has_expected_output = has_expected_output
+        # Secciones tipadas de la salida estructurada (None en modo texto libre)
+        self.sections = sections
+        # Tokens de todos los intentos (usage_metadata); None si la API no los informó
+        self.usage = usage
+        # Origen de la respuesta reutilizada por la caché de similitud (None si se generó)
+        self.cache_hit = cache_hit
+        # Llamadas de resumen del contexto largo (partes, en caché, tokens); None si no hubo
+        self.context_summary = context_summary
+        # Google Search pedido pero no usado porque es incompatible con la salida estructurada
+        self.search_dropped = search_dropped
+
+    @property
+    def response_length(self) -> int:
+        return len(self.generated_response)
+
+    @property
+    def escalated(self) -> bool:
+        return len(self.model_attempts) > 1
+
+    @property
+    def metadata(self) -> Mapping[str, Any]:
+        """
+        Vista de solo lectura de la metadata (compatibilidad con el formato anterior);
+        se modifica a través de los atributos, p. ej. `result.cache_hit = ...`
+        """
+        return MappingProxyType({key: getattr(self, key) for key in self.METADATA_FIELDS})
+
+
+class FailedItem(Record):
+    """
+    Elemento fallido tal como se escribe en results_failed.csv
+
+    `payload` guarda la fila de entrada completa en JSON (priority, model, template...)
+    para que --retry-failed la planifique y enrute igual que la original
+    """
+
+    __slots__ = ('id', 'prompt', 'context', 'expected_output', 'status',
+                 'error_type', 'error_message', 'failed_at', 'payload')
+    FIELDS = __slots__
+    # Columnas propias del registro de fallo, que no forman parte de la fila de entrada
+    FAILURE_FIELDS = ('status', 'error_type', 'error_message', 'failed_at', 'payload', 'retry_count')
+
+    def __init__(self, id: str, prompt: str = '', context: str = '', expected_output: str = '',
+                 status: str = 'failed', error_type: str = '', error_message: str = '',
+                 failed_at: Optional[str] = None, payload: str = ''):
+        self.id = id
+        self.prompt = prompt
+        self.context = context
+        self.expected_output = expected_output
+        self.status = status
+        self.error_type = error_type
+        self.error_message = error_message
+        self.failed_at = failed_at or datetime.now().isoformat()
+        self.payload = payload
@@ -3,12 +3,47 @@ Módulo principal de procesamiento de transacciones
 Contiene la lógica de negocio para generar prompts con Gemini
 """
 
-from typing import Dict, Any, Tuple
+import hashlib
+import json
+import threading
+import time
+from typing import Dict, Any, List, Optional, Tuple
 from google import genai
 from google.genai import types
+from . import cassettes, circuit_breaker, condense, similarity, structured, tokens
+from .tracing import span
+from .models import Result
+from .routing import ModelRouter, fit_thinking_budget
 from .utils import classify_error, setup_logger
 
 
+def build_prompt(transaction: Dict[str, Any]) -> str:
+    """Prompt completo que se envía a Gemini (también lo usa la verificación previa de tokens)"""
+    base_prompt = transaction['prompt']
+    context = transaction.get('context', '')
+    expected_output = transaction.get('expected_output', '')
+    
+    # Construir prompt estructurado
+    full_prompt = f"""
+        Como especialista en automatizaciones de UiPath, por favor ayuda con lo siguiente:
+        
+        Solicitud: {base_prompt}
+        
+        Contexto: {context if context else 'No se proporcionó contexto específico'}
+        
+        Resultado esperado: {expected_output if expected_output else 'Respuesta detallada y estructurada'}
+        
+        Por favor proporciona:
+        1. Un análisis detallado del proceso
+        2. Un diagrama de flujo en texto
+        3. Los pasos específicos de automatización
+        4. Consideraciones técnicas importantes
+        5. Posibles excepciones y su manejo
+        """
+    
+    return full_prompt.strip()
+
+
 class GeminiProcessor:
     """Clase para procesar prompts con Gemini API"""
     
@@ -16,10 +51,31 @@ class GeminiProcessor:
         self.logger = setup_logger('process')
         self.config = config
         self.credentials = credentials
+        self.router = ModelRouter(config)
+        self.cassettes = cassettes.from_config(config)
+        self.breaker = circuit_breaker.get_breaker(config)
+        self.structured = bool(config.get('gemini', {}).get('structured_output', False))
+        self.budget = tokens.get_budget(config)
+        self.similar = similarity.get_cache(config)
+        # Contextos largos: resumen por partes con un modelo rápido antes de la llamada principal
+        self.condenser = condense.from_config(config, self._summarize)
+        # Uso de tokens de la última llamada, por hilo (los resúmenes corren en paralelo)
+        self._local = threading.local()
         self.client = self._initialize_client()
+
+    @property
+    def last_usage(self) -> Optional[Dict[str, int]]:
+        """Uso de tokens de la última llamada de este hilo (usage_metadata del streaming)"""
+        return getattr(self._local, 'usage', None)
+
+    @last_usage.setter
+    def last_usage(self, usage: Optional[Dict[str, int]]) -> None:
+        self._local.usage = usage
     
     def _initialize_client(self):
-        """Inicializa el cliente de Gemini"""
+        """Inicializa el cliente de Gemini (no hace falta al reproducir cassettes)"""
+        if self.cassettes and self.cassettes.replaying:
+            return None
         return genai.Client(api_key=self.credentials['gemini_api_key'])
     
     def process_transaction(self, transaction: Dict[str, Any]) -> Tuple[str, str]:
@@ -34,23 +90,46 @@ class GeminiProcessor:
             Status puede ser: 'Success', 'BusinessException', 'SystemException'
         """
         try:
-            self.logger.info(f"Iniciando procesamiento de transacción {transaction['id']}")
+            self.logger.info("Iniciando procesamiento de transacción %s", transaction['id'])
             
             # Preparar contenido para Gemini
-            prompt_text = self._prepare_prompt(transaction)
+            with span('prepare_prompt'):
+                prompt_text = self._prepare_prompt(transaction)
+            
+            # Un pedido casi idéntico a uno ya respondido (con el mismo contexto) reutiliza esa respuesta
+            scope = self._similarity_scope(transaction) if self.similar else None
+            if self.similar:
+                with span('similarity_lookup'):
+                    hit = self.similar.lookup(transaction['prompt'], scope)
+                if hit:
+                    self.logger.info("Transacción %s respondida desde la caché de similitud (%s, %.2f)",
+                                     transaction['id'], hit['source']['transaction_id'], hit['similarity'])
+                    return 'Success', self._cached_result(hit, transaction)
+            
+            # Un contexto demasiado largo llega resumido a la llamada principal
+            model_prompt, condensed = prompt_text, None
+            if self.condenser and condense.applies(transaction, self.config):
+                with span('condense_context'):
+                    context, condensed = self.condenser.condense(transaction['context'])
+                model_prompt = self._prepare_prompt({**transaction, 'context': context})
             
-            # Generar respuesta con Gemini
-            response = self._generate_with_gemini(prompt_text)
+            # Generar respuesta con Gemini (modelo elegido por el router, con cascada opcional)
+            response, attempts = self._generate_routed(model_prompt, transaction)
             
             # Procesar respuesta
-            result = self._process_response(response, transaction)
+            with span('process_response'):
+                result = self._process_response(response, transaction, attempts)
+                result.context_summary = condensed
+            if self.similar:
+                self.similar.add(transaction['prompt'], scope, response,
+                                 {'transaction_id': transaction['id'], 'model': result.model_used})
             
-            self.logger.info(f"Transacción {transaction['id']} procesada exitosamente")
+            self.logger.info("Transacción %s procesada exitosamente", transaction['id'])
             return 'Success', result
             
         except Exception as e:
             error_type = classify_error(e)
-            self.logger.error(f"Error en transacción {transaction['id']}: {e}")
+            self.logger.error("Error en transacción %s: %s", transaction['id'], e)
             return error_type, str(e)
     
     def _prepare_prompt(self, transaction: Dict[str, Any]) -> str:
@@ -63,36 +142,103 @@ class GeminiProcessor:
         Returns:
             Prompt formateado
         """
-        base_prompt = transaction['prompt']
-        context = transaction.get('context', '')
-        expected_output = transaction.get('expected_output', '')
-        
-        # Construir prompt estructurado
-        full_prompt = f"""
-        Como especialista en automatizaciones de UiPath, por favor ayuda con lo siguiente:
-        
-        Solicitud: {base_prompt}
-        
-        Contexto: {context if context else 'No se proporcionó contexto específico'}
-        
-        Resultado esperado: {expected_output if expected_output else 'Respuesta detallada y estructurada'}
-        
-        Por favor proporciona:
-        1. Un análisis detallado del proceso
-        2. Un diagrama de flujo en texto
-        3. Los pasos específicos de automatización
-        4. Consideraciones técnicas importantes
-        5. Posibles excepciones y su manejo
-        """
-        
-        return full_prompt.strip()
+        return build_prompt(transaction)
     
-    def _generate_with_gemini(self, prompt_text: str) -> str:
+    def _summarize(self, prompt_text: str, model: str, thinking_budget: int) -> Tuple[str, Optional[Dict[str, int]]]:
+        """Llamada de resumen del modo map-reduce: texto libre, sin búsqueda, con su uso de tokens"""
+        self.last_usage = None
+        # Mismo ajuste que la llamada principal: un modelo pro no admite 0
+        options = {'thinking_budget': fit_thinking_budget(model, thinking_budget),
+                   'google_search': False, 'structured': False}
+        response = self._call_model(prompt_text, model, options)
+        return response, self.last_usage
+
+    def _similarity_scope(self, transaction: Dict[str, Any]) -> str:
+        """
+        Todo lo que, además del pedido, determina la respuesta: solo se reutiliza dentro del mismo scope.
+        Contexto y resultado esperado entran exactos; un contexto largo compartido no debe
+        volver parecidos dos pedidos distintos
+        """
+        options = self.router.generation_options(transaction)
+        payload = json.dumps([self.router.chain(transaction), options['thinking_budget'],
+                              bool(options['google_search']), self.structured,
+                              self.config['gemini']['system_instruction'],
+                              transaction.get('context', ''), transaction.get('expected_output', '')],
+                             ensure_ascii=False)
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()[:16]
+
+    def _cached_result(self, hit: Dict[str, Any], transaction: Dict[str, Any]) -> Result:
+        """Resultado con la respuesta reutilizada, marcado con su origen para auditoría"""
+        result = self._process_response(hit['response'], transaction, [
+            {'model': hit['source']['model'], 'latency_seconds': 0.0, 'accepted': True, 'cache_hit': True}])
+        result.cache_hit = {**hit['source'], 'similarity': hit['similarity']}
+        return result
+
+    def _generate_routed(self, prompt_text: str, transaction: Dict[str, Any]) -> Tuple[str, List[Dict[str, Any]]]:
+        """
+        Genera la respuesta recorriendo la cadena de modelos del router
+
+        Un modelo que no es el último de la cascada solo se acepta si su respuesta
+        pasa la validación; si falla o lanza un error se escala al siguiente.
+
+        Returns:
+            Tupla con (respuesta, intentos realizados con modelo y latencia)
+        """
+        chain = self.router.chain(transaction)
+        options = self.router.generation_options(transaction)
+        if options['search_dropped']:
+            self.logger.warning("Google Search no se usa en la transacción %s: es incompatible con "
+                                "structured_output", transaction['id'])
+        attempts = []
+        for position, model in enumerate(chain):
+            is_last = position == len(chain) - 1
+            started = time.perf_counter()
+            self.last_usage = None
+            try:
+                # Al escalar, el budget se ajusta al rango del modelo siguiente
+                model_options = {**options, 'thinking_budget': fit_thinking_budget(model, options['thinking_budget'])}
+                with span('generate', model=model, attempt=position + 1):
+                    response = self._call_model(prompt_text, model, model_options)
+            except Exception:
+                attempts.append({'model': model, 'latency_seconds': time.perf_counter() - started,
+                                 'accepted': False, 'usage': self.last_usage})
+                if is_last:
+                    raise
+                self.logger.warning("Modelo %s falló para la transacción %s, escalando",
+                                    model, transaction['id'])
+                continue
+
+            accepted = is_last or self.router.validate(response)
+            attempts.append({'model': model, 'latency_seconds': time.perf_counter() - started,
+                             'accepted': accepted, 'usage': self.last_usage})
+            if accepted:
+                return response, attempts
+            self.logger.info("Respuesta de %s no pasó la validación para la transacción %s, escalando",
+                             model, transaction['id'])
+
+    def _call_model(self, prompt_text: str, model: str, options: Dict[str, Any]) -> str:
+        """Llamada a Gemini a través del circuit breaker: espera mientras está abierto"""
+        if not self.breaker:
+            return self._generate_with_gemini(prompt_text, model, options)
+        with span('circuit_breaker_wait'):
+            probe = self.breaker.acquire()
+        try:
+            response = self._generate_with_gemini(prompt_text, model, options)
+        except Exception as e:
+            self.breaker.record(classify_error(e) == 'SystemException', probe)
+            raise
+        self.breaker.record(False, probe)
+        return response
+
+    def _generate_with_gemini(self, prompt_text: str, model: Optional[str] = None,
+                              options: Optional[Dict[str, Any]] = None) -> str:
         """
         Genera respuesta usando Gemini API
         
         Args:
             prompt_text: Texto del prompt
+            model: Modelo a usar; por defecto gemini.model
+            options: thinking_budget y google_search de la transacción
             
         Returns:
             Respuesta generada por Gemini
@@ -109,62 +255,152 @@ class GeminiProcessor:
                 ),
             ]
             
+            options = options or {}
+            structured_output = options.get('structured', self.structured)
+            # Google Search es opt-in: solo se adjunta cuando la transacción lo pide (y nunca
+            # con salida estructurada, que Gemini rechaza junto con herramientas)
+            search = options.get('google_search', gemini_config.get('google_search', False))
             tools = [
                 types.Tool(googleSearch=types.GoogleSearch()),
-            ]
+            ] if search and not structured_output else None
             
             generate_content_config = types.GenerateContentConfig(
                 thinking_config=types.ThinkingConfig(
-                    thinking_budget=gemini_config['thinking_budget'],
+                    thinking_budget=options.get('thinking_budget', gemini_config['thinking_budget']),
                 ),
                 tools=tools,
                 system_instruction=[
                     types.Part.from_text(text=gemini_config['system_instruction']),
                 ],
             )
+            # Salida estructurada: JSON con las secciones, validado mientras llega
+            validator = None
+            if structured_output:
+                generate_content_config.response_mime_type = 'application/json'
+                generate_content_config.response_schema = structured.response_schema()
+                validator = structured.StreamingJsonValidator()
             
-            # Generar contenido
+            # Generar contenido (o reproducirlo / grabarlo si hay cassettes activos)
+            model = model or gemini_config['model']
+            key = cassettes.cassette_key(model, prompt_text, {
+                'thinking_budget': generate_content_config.thinking_config.thinking_budget,
+                'google_search': bool(tools), 'structured': structured_output},
+                gemini_config['system_instruction']) if self.cassettes else None
+            if key and self.cassettes.replaying:
+                stream = self.cassettes.replay(key)
+            else:
+                stream = self.client.models.generate_content_stream(
+                    model=model,
+                    contents=contents,
+                    config=generate_content_config,
+                )
+                if key:
+                    stream = self.cassettes.record(key, model, stream)
+
             response_parts = []
-            for chunk in self.client.models.generate_content_stream(
-                model=gemini_config['model'],
-                contents=contents,
-                config=generate_content_config,
-            ):
-                if chunk.text:
-                    response_parts.append(chunk.text)
+            usage = None
+            with span('stream') as stream_span:
+                started = time.perf_counter()
+                for chunk in stream:
+                    if 'first_chunk_seconds' not in stream_span:
+                        stream_span['first_chunk_seconds'] = round(time.perf_counter() - started, 4)
+                    # El conteo es acumulado: el último chunk que lo trae tiene el total
+                    if getattr(chunk, 'usage_metadata', None) is not None:
+                        usage = chunk.usage_metadata
+                    if chunk.text:
+                        response_parts.append(chunk.text)
+                        if validator:
+                            validator.feed(chunk.text)
+                stream_span['chunks'] = len(response_parts)
+                self.last_usage = tokens.usage_to_dict(usage)
+                if self.last_usage:
+                    stream_span['total_tokens'] = self.last_usage['total_tokens']
+                    if self.budget:
+                        self.budget.add(self.last_usage['total_tokens'])
             
+            if validator:
+                validator.result()
             return ''.join(response_parts)
             
         except Exception as e:
-            self.logger.error(f"Error en la generación con Gemini: {e}")
+            self.logger.error("Error en la generación con Gemini: %s", e)
             raise
     
-    def _process_response(self, response: str, transaction: Dict[str, Any]) -> Dict[str, Any]:
+    def _process_response(self, response: str, transaction: Dict[str, Any],
+                          attempts: Optional[List[Dict[str, Any]]] = None) -> Result:
         """
         Procesa la respuesta de Gemini y estructura el resultado
         
         Args:
             response: Respuesta de Gemini
             transaction: Transacción original
+            attempts: Intentos por modelo devueltos por _generate_routed
             
         Returns:
             Resultado estructurado
         """
-        return {
-            'transaction_id': transaction['id'],
-            'original_prompt': transaction['prompt'],
-            'generated_response': response,
-            'status': 'completed',
-            'metadata': {
-                'model_used': self.config['gemini']['model'],
-                'response_length': len(response),
-                'has_context': bool(transaction.get('context')),
-                'has_expected_output': bool(transaction.get('expected_output'))
-            }
-        }
+        attempts = attempts or [{'model': self.config['gemini']['model'], 'latency_seconds': 0.0,
+                                 'accepted': True}]
+        options = self.router.generation_options(transaction)
+        # La respuesta ya fue validada en el streaming; aquí solo se conservan las secciones tipadas
+        sections = structured.validate_sections(json.loads(response)) if self.structured else None
+        usage = None
+        for attempt in attempts:
+            usage = tokens.add_usage(usage, attempt.get('usage'))
+        return Result(
+            transaction_id=transaction['id'],
+            original_prompt=transaction['prompt'],
+            generated_response=response,
+            model_used=attempts[-1]['model'],
+            model_attempts=attempts,
+            latency_seconds=sum(attempt['latency_seconds'] for attempt in attempts),
+            template=options['template'],
+            thinking_budget=options['thinking_budget'],
+            google_search=options['google_search'],
+            search_dropped=options['search_dropped'],
+            has_context=bool(transaction.get('context')),
+            has_expected_output=bool(transaction.get('expected_output')),
+            sections=sections,
+            usage=usage
+        )
     
 
 
+def create_preflight(config: Dict[str, Any]) -> Optional[tokens.PromptPreflight]:
+    """Verificación previa del tamaño de los prompts para el despacho; None si no aplica"""
+    replaying = config.get('cassettes', {}).get('mode') == cassettes.REPLAY
+    if replaying or not config.get('tokens', {}).get('max_prompt_tokens'):
+        return None
+    from .init import load_credentials
+    client = genai.Client(api_key=load_credentials()['gemini_api_key'])
+    return tokens.preflight_from_config(config, client, ModelRouter(config).route)
+
+
+_warm: Optional[GeminiProcessor] = None
+
+
+def warm_up(config: Dict[str, Any]) -> GeminiProcessor:
+    """
+    Procesador persistente para el modo daemon: cliente, pool de conexiones y cachés
+    se reutilizan entre transacciones y lotes. Llamarlo al iniciar cada lote renueva
+    el presupuesto de tokens
+    """
+    global _warm
+    if _warm is None:
+        from .init import load_credentials
+        replaying = config.get('cassettes', {}).get('mode') == cassettes.REPLAY
+        _warm = GeminiProcessor(config, {} if replaying else load_credentials())
+    else:
+        _warm.budget = tokens.get_budget(config)
+    return _warm
+
+
+def cool_down() -> None:
+    """Descarta el procesador persistente"""
+    global _warm
+    _warm = None
+
+
 def run(transaction: Dict[str, Any], config: Dict[str, Any]) -> Tuple[str, str]:
     """
     Función principal de procesamiento
@@ -176,10 +412,15 @@ def run(transaction: Dict[str, Any], config: Dict[str, Any]) -> Tuple[str, str]:
     Returns:
         Tupla con (status, resultado)
     """
-    # Obtener credenciales
+    if _warm is not None:
+        return _warm.process_transaction(transaction)
+    
+    # Obtener credenciales (el replay de cassettes no usa la API)
     from .init import load_credentials
-    credentials = load_credentials()
+    replaying = config.get('cassettes', {}).get('mode') == cassettes.REPLAY
+    credentials = {} if replaying else load_credentials()
     
     # Crear procesador y ejecutar
-    processor = GeminiProcessor(config, credentials)
+    with span('init_processor'):
+        processor = GeminiProcessor(config, credentials)
     return processor.process_transaction(transaction)
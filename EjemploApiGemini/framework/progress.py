@@ -0,0 +1,216 @@
+"""
+Reporte de progreso en vivo con tasa, latencia y ETA medidos
+En una terminal (TTY) se redibuja en la misma línea con un límite de refrescos por
+segundo; fuera de una terminal (CI, logs) emite una línea compacta cada pocos segundos
+"""
+
+import sys
+import threading
+import time
+from collections import deque
+from typing import Dict, Any, Optional, TextIO
+
+DEFAULT_PROGRESS_CONFIG = {
+    'max_refresh_per_second': 4,
+    'line_interval_seconds': 5,
+    'rate_window_seconds': 60,
+    'ewma_alpha': 0.2
+}
+
+
+def format_duration(seconds: Optional[float]) -> str:
+    """Formatea segundos como 1h02m, 3m05s o 12s"""
+    if seconds is None:
+        return '--'
+    seconds = int(seconds)
+    hours, remainder = divmod(seconds, 3600)
+    minutes, secs = divmod(remainder, 60)
+    if hours:
+        return f"{hours}h{minutes:02d}m"
+    if minutes:
+        return f"{minutes}m{secs:02d}s"
+    return f"{secs}s"
+
+
+class ProgressReporter:
+    """Contadores de progreso seguros entre hilos y su presentación limitada en frecuencia"""
+
+    def __init__(self, total: Optional[int] = None, estimated: bool = False, workers: int = 1,
+                 config: Optional[Dict[str, Any]] = None, verbose: bool = False, line_mode: Optional[bool] = None,
+                 stream: Optional[TextIO] = None):
+        """
+        Args:
+            total: Total de elementos (None si se desconoce)
+            estimated: True si el total es una estimación (colas en streaming o compartidas)
+            workers: Workers concurrentes, para estimar la ETA antes de medir la tasa
+            config: Sección 'progress' de la configuración
+            verbose: Imprime también una línea por elemento
+            line_mode: Fuerza líneas compactas (True) o redibujo en sitio (False); por defecto según TTY
+            stream: Destino de la salida (por defecto stdout)
+        """
+        settings = {**DEFAULT_PROGRESS_CONFIG, **(config or {})}
+        self.stream = stream or sys.stdout
+        self.total = total
+        self.estimated = estimated
+        self.workers = max(1, workers)
+        self.verbose = verbose
+        is_tty = getattr(self.stream, 'isatty', lambda: False)()
+        self.line_mode = (not is_tty) if line_mode is None else line_mode
+        self.min_interval = (settings['line_interval_seconds'] if self.line_mode
+                             else 1.0 / settings['max_refresh_per_second'])
+        self.rate_window = settings['rate_window_seconds']
+        self.alpha = settings['ewma_alpha']
+
+        self.successful = 0
+        self.failed = 0
+        self.in_flight = 0
+        self.ewma_latency: Optional[float] = None
+        self.started_at = time.monotonic()
+        self._completions = deque()
+        self._last_render = 0.0
+        self._last_width = 0
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._ticker: Optional[threading.Thread] = None
+
+    # --- Eventos -------------------------------------------------------------
+
+    def start(self) -> 'ProgressReporter':
+        """Inicia un hilo que refresca la vista aunque no terminen elementos (ítems largos)"""
+        self._ticker = threading.Thread(target=self._tick, name='progress', daemon=True)
+        self._ticker.start()
+        return self
+
+    def item_started(self) -> None:
+        with self._lock:
+            self.in_flight += 1
+
+    def item_finished(self, status: str, latency: float) -> None:
+        """Registra un elemento terminado con su latencia en segundos"""
+        now = time.monotonic()
+        with self._lock:
+            self.in_flight = max(0, self.in_flight - 1)
+            if status == 'Success':
+                self.successful += 1
+            else:
+                self.failed += 1
+            self.ewma_latency = latency if self.ewma_latency is None else \
+                self.alpha * latency + (1 - self.alpha) * self.ewma_latency
+            self._completions.append(now)
+        self.refresh()
+
+    def item_rejected(self) -> None:
+        """Elemento rechazado antes de despacharse: cuenta como fallido sin afectar latencia ni tasa"""
+        with self._lock:
+            self.failed += 1
+        self.refresh()
+
+    def set_total(self, total: Optional[int], estimated: bool = False) -> None:
+        """Actualiza el total (por ejemplo, al re-estimar una cola en streaming)"""
+        with self._lock:
+            self.total = total
+            self.estimated = estimated
+
+    def message(self, text: str) -> None:
+        """Línea por elemento; solo se imprime en modo verbose sin romper la línea de progreso"""
+        if not self.verbose:
+            return
+        with self._lock:
+            if not self.line_mode and self._last_width:
+                self.stream.write('\r' + ' ' * self._last_width + '\r')
+                self._last_width = 0
+            self.stream.write(text + '\n')
+            self.stream.flush()
+
+    # --- Métricas ------------------------------------------------------------
+
+    @property
+    def completed(self) -> int:
+        return self.successful + self.failed
+
+    def rate_per_minute(self, now: Optional[float] = None) -> float:
+        """Elementos por minuto en la ventana móvil"""
+        now = now or time.monotonic()
+        with self._lock:
+            while self._completions and now - self._completions[0] > self.rate_window:
+                self._completions.popleft()
+            count = len(self._completions)
+        window = min(self.rate_window, now - self.started_at)
+        return count / window * 60 if window > 0 and count else 0.0
+
+    def eta_seconds(self, now: Optional[float] = None) -> Optional[float]:
+        """Tiempo restante estimado; usa la tasa medida o, al inicio, la latencia EWMA por worker"""
+        if self.total is None:
+            return None
+        remaining = max(0, self.total - self.completed)
+        if remaining == 0:
+            return 0.0
+        rate = self.rate_per_minute(now)
+        if rate > 0:
+            return remaining / rate * 60
+        if self.ewma_latency is not None:
+            return remaining * self.ewma_latency / self.workers
+        return None
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Métricas actuales como dict"""
+        now = time.monotonic()
+        return {
+            'completed': self.completed,
+            'successful': self.successful,
+            'failed': self.failed,
+            'in_flight': self.in_flight,
+            'total': self.total,
+            'total_estimated': self.estimated,
+            'items_per_minute': round(self.rate_per_minute(now), 2),
+            'ewma_latency_seconds': round(self.ewma_latency, 3) if self.ewma_latency is not None else None,
+            'eta_seconds': self.eta_seconds(now),
+            'elapsed_seconds': round(now - self.started_at, 3)
+        }
+
+    # --- Presentación ---------------------------------------------------------
+
+    def render(self) -> str:
+        """Línea de progreso compacta"""
+        stats = self.snapshot()
+        if self.total:
+            prefix = '~' if self.estimated else ''
+            percent = min(100.0, self.completed / self.total * 100)
+            head = f"{self.completed}/{prefix}{self.total} ({percent:.1f}%)"
+        else:
+            head = f"{self.completed}"
+        latency = f"{stats['ewma_latency_seconds']:.1f}s" if stats['ewma_latency_seconds'] is not None else '--'
+        return (f"⏳ {head} · ✅ {stats['successful']} ❌ {stats['failed']} · 🔄 {stats['in_flight']} en curso · "
+                f"{stats['items_per_minute']:.1f}/min · lat. {latency} · ETA {format_duration(stats['eta_seconds'])}")
+
+    def refresh(self, force: bool = False) -> None:
+        """Redibuja si pasó el intervalo mínimo desde el último refresco"""
+        now = time.monotonic()
+        if not force and now - self._last_render < self.min_interval:
+            return
+        self._last_render = now
+        line = self.render()
+        with self._lock:
+            if self.line_mode:
+                self.stream.write(line + '\n')
+            else:
+                padding = ' ' * max(0, self._last_width - len(line))
+                self.stream.write('\r' + line + padding)
+                self._last_width = len(line)
+            self.stream.flush()
+
+    def _tick(self) -> None:
+        while not self._stop.wait(self.min_interval):
+            self.refresh()
+
+    def close(self) -> None:
+        """Detiene el refresco y deja la línea final"""
+        self._stop.set()
+        if self._ticker is not None:
+            self._ticker.join(timeout=1)
+        self.refresh(force=True)
+        if not self.line_mode:
+            with self._lock:
+                self.stream.write('\n')
+                self.stream.flush()
+                self._last_width = 0
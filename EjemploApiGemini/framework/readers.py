@@ -0,0 +1,152 @@
+"""
+Lectores de la cola de transacciones y validación masiva de filas
+Soporta CSV, JSONL (ambos también comprimidos con gzip) y Excel .xlsx en modo
+solo lectura; nuevos formatos se agregan con register_reader
+"""
+
+import csv
+import gzip
+import json
+from pathlib import Path
+from typing import Dict, Any, Callable, Iterable, Iterator, List, Optional, Tuple
+
+Row = Dict[str, Any]
+Check = Callable[[Row], Optional[str]]
+
+DEFAULT_INGESTION_CONFIG = {
+    'required_fields': ['id', 'prompt'],
+    'min_prompt_chars': 10,
+    'max_prompt_chars': None,
+    'unique_ids': True
+}
+
+
+def _open_text(path: str):
+    """Abre un archivo de texto, descomprimiendo gzip si la extensión termina en .gz"""
+    if str(path).lower().endswith('.gz'):
+        return gzip.open(path, 'rt', encoding='utf-8', newline='')
+    return open(path, 'r', encoding='utf-8', newline='')
+
+
+def read_csv(path: str) -> Iterator[Row]:
+    """Lee filas de un CSV (o .csv.gz) con encabezado"""
+    with _open_text(path) as f:
+        yield from csv.DictReader(f)
+
+
+def read_jsonl(path: str) -> Iterator[Row]:
+    """Lee un objeto JSON por línea de un .jsonl (o .jsonl.gz); las líneas vacías se ignoran"""
+    with _open_text(path) as f:
+        for line_number, line in enumerate(f, 1):
+            if not line.strip():
+                continue
+            try:
+                row = json.loads(line)
+            except json.JSONDecodeError as e:
+                row = {'_parse_error': f"Línea {line_number}: JSON inválido ({e.msg})"}
+            yield row if isinstance(row, dict) else {'_parse_error': f"Línea {line_number}: no es un objeto"}
+
+
+def read_xlsx(path: str) -> Iterator[Row]:
+    """Lee la primera hoja de un .xlsx en modo solo lectura (la primera fila es el encabezado)"""
+    try:
+        from openpyxl import load_workbook
+    except ImportError:
+        raise ImportError("Leer archivos .xlsx requiere openpyxl: pip install openpyxl")
+
+    workbook = load_workbook(path, read_only=True, data_only=True)
+    try:
+        rows = workbook.worksheets[0].iter_rows(values_only=True)
+        header = next(rows, None)
+        if not header:
+            return
+        columns = [str(name).strip() if name is not None else '' for name in header]
+        for values in rows:
+            if values is None or all(value is None for value in values):
+                continue
+            # Se normaliza a texto para que las filas sean equivalentes a las del CSV
+            yield {column: '' if value is None else str(value)
+                   for column, value in zip(columns, values) if column}
+    finally:
+        workbook.close()
+
+
+_READERS: Dict[str, Callable[[str], Iterator[Row]]] = {
+    '.csv': read_csv,
+    '.csv.gz': read_csv,
+    '.jsonl': read_jsonl,
+    '.jsonl.gz': read_jsonl,
+    '.xlsx': read_xlsx
+}
+
+
+def register_reader(suffix: str, reader: Callable[[str], Iterator[Row]]) -> None:
+    """Registra un lector para una extensión (por ejemplo '.parquet')"""
+    _READERS[suffix.lower()] = reader
+
+
+def get_reader(path: str) -> Callable[[str], Iterator[Row]]:
+    """Devuelve el lector correspondiente a la extensión del archivo"""
+    name = Path(path).name.lower()
+    # La extensión más larga primero: '.csv.gz' antes que '.gz'
+    for suffix in sorted(_READERS, key=len, reverse=True):
+        if name.endswith(suffix):
+            return _READERS[suffix]
+    raise ValueError(f"Formato de entrada no soportado: {path}")
+
+
+def read_rows(path: str) -> Iterator[Row]:
+    """Itera las filas de un archivo de entrada usando el lector de su extensión"""
+    return get_reader(path)(path)
+
+
+def compile_schema(config: Optional[Dict[str, Any]] = None) -> List[Check]:
+    """
+    Compila la sección 'ingestion' de la configuración en una lista de validaciones
+
+    Las validaciones se construyen una sola vez y se aplican a cada fila; cada una
+    devuelve el mensaje de error o None si la fila es válida
+    """
+    settings = {**DEFAULT_INGESTION_CONFIG, **(config or {}).get('ingestion', {})}
+    checks: List[Check] = [lambda row: row.get('_parse_error')]
+
+    for field in settings['required_fields']:
+        checks.append(lambda row, field=field: None if row.get(field) else
+                      f"Campo requerido '{field}' está vacío o ausente")
+
+    min_chars, max_chars = settings['min_prompt_chars'], settings['max_prompt_chars']
+    if min_chars:
+        checks.append(lambda row: None if len((row.get('prompt') or '').strip()) >= min_chars else
+                      f"El prompt debe tener al menos {min_chars} caracteres")
+    if max_chars:
+        checks.append(lambda row: None if len(row.get('prompt') or '') <= max_chars else
+                      f"El prompt supera el máximo de {max_chars} caracteres")
+
+    if settings['unique_ids']:
+        seen = set()
+
+        def unique_id(row: Row) -> Optional[str]:
+            item_id = row.get('id')
+            if item_id in seen:
+                return f"Id duplicado '{item_id}'"
+            seen.add(item_id)
+            return None
+        checks.append(unique_id)
+
+    return checks
+
+
+def validate_rows(rows: Iterable[Row], checks: List[Check]) -> Iterator[Tuple[Row, Optional[str]]]:
+    """
+    Pasada de validación en streaming
+
+    Returns:
+        Iterador de (fila, error); error es None para filas válidas
+    """
+    for row in rows:
+        error = None
+        for check in checks:
+            error = check(row)
+            if error:
+                break
+        yield row, error
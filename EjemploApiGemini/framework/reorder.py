@@ -0,0 +1,168 @@
+"""
+Reensamblado de resultados en el orden de entrada
+Los workers (y el planificador, que despacha del más largo al más corto) terminan
+los elementos en cualquier orden; el buffer libera cada fila en cuanto todas las
+anteriores del archivo de entrada están escritas o resueltas sin fila (fallidas,
+rechazadas). Con más filas retenidas que el límite, se vuelcan a disco en tramos
+ordenados o se pasa a escribir en orden de llegada con una columna de secuencia
+"""
+
+import heapq
+import json
+import tempfile
+from typing import Dict, Any, Callable, Iterator, List, Optional, Tuple
+
+DEFAULT_OUTPUT_ORDER_CONFIG = {
+    'mode': 'input',
+    'max_buffered_rows': 10000,
+    'overflow': 'spill',
+    'spill_dir': None
+}
+
+INPUT = 'input'
+COMPLETION = 'completion'
+SPILL = 'spill'
+UNORDERED = 'unordered'
+
+# Columna con la posición de la fila en la entrada (solo con overflow 'unordered')
+SEQUENCE_COLUMN = 'sequence'
+
+
+class _SpillRun:
+    """Tramo de filas ordenadas por secuencia en un archivo temporal (se borra al cerrarlo)"""
+
+    def __init__(self, rows: List[Tuple[int, Dict[str, Any]]], directory: Optional[str]):
+        self._file = tempfile.TemporaryFile('w+', encoding='utf-8', dir=directory, suffix='.reorder')
+        for sequence, row in rows:
+            self._file.write(json.dumps([sequence, row], ensure_ascii=False) + '\n')
+        self._file.seek(0)
+
+    def __iter__(self) -> Iterator[Tuple[int, Dict[str, Any]]]:
+        for line in self._file:
+            sequence, row = json.loads(line)
+            yield sequence, row
+
+    def close(self) -> None:
+        self._file.close()
+
+
+class ReorderBuffer:
+    """
+    Libera las filas a `emit` en orden de secuencia (1, 2, 3...) a medida que el
+    prefijo se completa. En memoria quedan como mucho `max_rows` filas más una por
+    tramo volcado a disco
+    """
+
+    def __init__(self, emit: Callable[[Dict[str, Any]], None], max_rows: int = 10000,
+                 overflow: str = SPILL, spill_dir: Optional[str] = None):
+        if overflow not in (SPILL, UNORDERED):
+            raise ValueError(f"overflow inválido: {overflow} (spill o unordered)")
+        self.emit = emit
+        self.max_rows = max(1, max_rows)
+        self.overflow = overflow
+        self.spill_dir = spill_dir
+        self.next_sequence = 1
+        self.ordered = True
+        self._rows: Dict[int, Dict[str, Any]] = {}
+        # Secuencias resueltas sin fila todavía por delante del prefijo
+        self._gaps = set()
+        self._runs: List[Iterator[Tuple[int, Dict[str, Any]]]] = []
+        self._spills: List[_SpillRun] = []
+        # Primera fila pendiente de cada tramo: (secuencia, tramo) con la fila en _heads
+        self._heap: List[Tuple[int, int]] = []
+        self._heads: Dict[int, Dict[str, Any]] = {}
+        self.peak_buffered = 0
+        self.spilled_rows = 0
+        self.released = 0
+
+    @property
+    def buffered(self) -> int:
+        return len(self._rows) + len(self._heads)
+
+    def add(self, sequence: int, row: Dict[str, Any]) -> None:
+        if not self.ordered:
+            self._release(row)
+            return
+        self._rows[sequence] = row
+        self._drain()
+        self.peak_buffered = max(self.peak_buffered, len(self._rows))
+        if len(self._rows) > self.max_rows:
+            self._overflow()
+
+    def skip(self, sequence: int) -> None:
+        """La secuencia se resolvió sin fila (fallida o rechazada): no frena al resto"""
+        if not self.ordered or sequence < self.next_sequence:
+            return
+        self._gaps.add(sequence)
+        self._drain()
+
+    def _release(self, row: Dict[str, Any]) -> None:
+        self.emit(row)
+        self.released += 1
+
+    def _next_spilled(self, sequence: int) -> Optional[Dict[str, Any]]:
+        if not self._heap or self._heap[0][0] != sequence:
+            return None
+        _, index = heapq.heappop(self._heap)
+        row = self._heads.pop(index)
+        self._advance(index)
+        return row
+
+    def _advance(self, index: int) -> None:
+        entry = next(self._runs[index], None)
+        if entry is not None:
+            self._heads[index] = entry[1]
+            heapq.heappush(self._heap, (entry[0], index))
+
+    def _drain(self) -> None:
+        while True:
+            sequence = self.next_sequence
+            if sequence in self._gaps:
+                self._gaps.remove(sequence)
+            else:
+                row = self._rows.pop(sequence, None)
+                if row is None:
+                    row = self._next_spilled(sequence)
+                if row is None:
+                    return
+                self._release(row)
+            self.next_sequence += 1
+
+    def _overflow(self) -> None:
+        if self.overflow == UNORDERED:
+            # Lo retenido sale ya (en orden) y lo que sigue, según termina
+            self.ordered = False
+            for _, row in sorted(self._rows.items()):
+                self._release(row)
+            self._rows.clear()
+            self._gaps.clear()
+            return
+        spill = _SpillRun(sorted(self._rows.items()), self.spill_dir)
+        self.spilled_rows += len(self._rows)
+        self._rows.clear()
+        self._spills.append(spill)
+        self._runs.append(iter(spill))
+        self._advance(len(self._runs) - 1)
+
+    def close(self) -> None:
+        """Libera lo que quedó (elementos nunca despachados dejan huecos) en orden de secuencia"""
+        heads = [(sequence, self._heads[index]) for sequence, index in self._heap]
+        pending = heapq.merge(sorted(self._rows.items()), sorted(heads, key=lambda entry: entry[0]),
+                              *self._runs, key=lambda entry: entry[0])
+        for _, row in pending:
+            self._release(row)
+        self._rows.clear()
+        self._heads.clear()
+        self._heap.clear()
+        for spill in self._spills:
+            spill.close()
+
+    def summary(self) -> Dict[str, Any]:
+        """Sección del reporte de ejecución"""
+        return {'mode': INPUT, 'overflow': self.overflow, 'max_buffered_rows': self.max_rows,
+                'peak_buffered_rows': self.peak_buffered, 'spilled_rows': self.spilled_rows,
+                'spill_runs': len(self._spills), 'switched_to_unordered': not self.ordered}
+
+
+def settings_from_config(config: Dict[str, Any]) -> Dict[str, Any]:
+    return {**DEFAULT_OUTPUT_ORDER_CONFIG, **config.get('output_order', {})}
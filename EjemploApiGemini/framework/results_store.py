@@ -0,0 +1,270 @@
+"""
+Almacén de resultados en SQLite, acumulado entre ejecuciones
+Guarda exitosos y fallidos de cada ejecución con índices por transacción,
+ejecución, estado, modelo y fecha, para consultar el historial sin recorrer CSV
+"""
+
+import csv
+import json
+import os
+import sqlite3
+import threading
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Any, Iterator, List, Optional
+
+from .blobs import BlobStore, get_store, reader_from_config
+from .end import RESULT_COLUMNS, result_row
+
+COMPLETED = 'completed'
+FAILED = 'failed'
+
+DEFAULT_RESULTS_STORE_CONFIG = {
+    'enabled': False,
+    'path': 'data/output/results.db',
+    'batch_size': 500
+}
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS results (
+    row_id INTEGER PRIMARY KEY,
+    run_id TEXT NOT NULL,
+    transaction_id TEXT NOT NULL,
+    status TEXT NOT NULL,
+    error_type TEXT,
+    error_message TEXT,
+    original_prompt TEXT,
+    generated_response TEXT,
+    response_hash TEXT,
+    model_used TEXT,
+    response_length INTEGER,
+    total_tokens INTEGER,
+    metadata TEXT,
+    processed_at TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_results_transaction ON results (transaction_id, processed_at);
+CREATE INDEX IF NOT EXISTS idx_results_run ON results (run_id);
+CREATE INDEX IF NOT EXISTS idx_results_status ON results (status);
+CREATE INDEX IF NOT EXISTS idx_results_model ON results (model_used);
+CREATE INDEX IF NOT EXISTS idx_results_processed_at ON results (processed_at);
+CREATE TABLE IF NOT EXISTS runs (
+    run_id TEXT PRIMARY KEY,
+    started_at TEXT NOT NULL,
+    finished_at TEXT,
+    report TEXT
+);
+"""
+
+_INSERT = (
+    "INSERT INTO results (run_id, transaction_id, status, error_type, error_message, original_prompt, "
+    "generated_response, response_hash, model_used, response_length, total_tokens, metadata, processed_at) "
+    "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)"
+)
+
+
+def new_run_id() -> str:
+    """Identificador de ejecución ordenable por fecha"""
+    return f"{datetime.now():%Y%m%dT%H%M%S}-{os.getpid()}"
+
+
+class ResultsStore:
+    """
+    Resultados de todas las ejecuciones en un archivo SQLite (modo WAL)
+
+    Las filas se acumulan en memoria y se insertan de a `batch_size` en una sola
+    transacción; varios runners pueden escribir el mismo archivo a la vez
+    """
+
+    def __init__(self, db_path: str, batch_size: int = 500, run_id: Optional[str] = None,
+                 blobs: Optional[BlobStore] = None, reader: Optional[BlobStore] = None):
+        self.db_path = db_path
+        self.batch_size = batch_size
+        self.run_id = run_id
+        # Con almacén de blobs se guarda solo el hash de la respuesta
+        self.blobs = blobs
+        # Para leer alcanza con el almacén configurado, aunque la escritura de blobs esté apagada
+        self.reader = reader or blobs
+        self._pending: List[tuple] = []
+        self._lock = threading.Lock()
+        Path(db_path).parent.mkdir(parents=True, exist_ok=True)
+        conn = self._connect()
+        try:
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.executescript(_SCHEMA)
+            columns = {row['name'] for row in conn.execute("PRAGMA table_info(results)")}
+            if 'response_hash' not in columns:
+                conn.execute("ALTER TABLE results ADD COLUMN response_hash TEXT")
+        finally:
+            conn.close()
+
+    def _connect(self) -> sqlite3.Connection:
+        """Abre una conexión en modo autocommit (las transacciones son explícitas)"""
+        conn = sqlite3.connect(self.db_path, timeout=30, isolation_level=None)
+        conn.row_factory = sqlite3.Row
+        return conn
+
+    # --- Escritura -------------------------------------------------------------
+
+    def start_run(self, run_id: Optional[str] = None) -> str:
+        """Registra una ejecución nueva; las filas siguientes quedan asociadas a ella"""
+        self.run_id = run_id or new_run_id()
+        conn = self._connect()
+        try:
+            conn.execute("INSERT OR IGNORE INTO runs (run_id, started_at) VALUES (?, ?)",
+                         (self.run_id, datetime.now().isoformat()))
+        finally:
+            conn.close()
+        return self.run_id
+
+    def add_result(self, result: Any, response_hash: Optional[str] = None) -> None:
+        """
+        Agrega un resultado exitoso (Result o dict con el formato anterior)
+
+        Args:
+            response_hash: Hash de la respuesta si ResultWriter ya la guardó en el almacén de blobs
+        """
+        row = result_row(result)
+        if row is None:
+            return
+        metadata = dict(result.get('metadata') or {})
+        usage = metadata.get('usage') or {}
+        response = row['generated_response']
+        if self.blobs:
+            response, response_hash = None, response_hash or self.blobs.put(response)
+        self._add((self.run_id, str(row['id']), COMPLETED, None, None, row['original_prompt'],
+                   response, response_hash, row['model_used'], row['response_length'],
+                   usage.get('total_tokens'), json.dumps(metadata, ensure_ascii=False, default=str),
+                   row['processed_at']))
+
+    def add_failure(self, item: Dict[str, Any], error_type: str, message: str) -> None:
+        """Agrega un elemento fallido con su clasificación y mensaje"""
+        self._add((self.run_id, str(item.get('id', 'unknown')), FAILED, error_type, str(message),
+                   item.get('prompt', ''), None, None, None, None, None, None, datetime.now().isoformat()))
+
+    def _add(self, row: tuple) -> None:
+        with self._lock:
+            self._pending.append(row)
+            if len(self._pending) < self.batch_size:
+                return
+            batch, self._pending = self._pending, []
+        self._insert(batch)
+
+    def _insert(self, batch: List[tuple]) -> None:
+        conn = self._connect()
+        try:
+            conn.execute('BEGIN IMMEDIATE')
+            conn.executemany(_INSERT, batch)
+            conn.execute('COMMIT')
+        except Exception:
+            conn.execute('ROLLBACK')
+            raise
+        finally:
+            conn.close()
+
+    def flush(self) -> None:
+        with self._lock:
+            batch, self._pending = self._pending, []
+        if batch:
+            self._insert(batch)
+
+    def finish_run(self, report: Optional[Dict[str, Any]] = None) -> None:
+        """Escribe lo pendiente y guarda el reporte de la ejecución"""
+        self.flush()
+        conn = self._connect()
+        try:
+            conn.execute("UPDATE runs SET finished_at = ?, report = ? WHERE run_id = ?",
+                         (datetime.now().isoformat(),
+                          json.dumps(report, ensure_ascii=False) if report is not None else None,
+                          self.run_id))
+        finally:
+            conn.close()
+
+    # --- Consulta --------------------------------------------------------------
+
+    def response(self, row: Dict[str, Any]) -> str:
+        """Respuesta completa de una fila (del almacén de blobs si solo tiene el hash)"""
+        if row.get('generated_response') is None and row.get('response_hash'):
+            if self.reader is None:
+                from .init import load_config
+                self.reader = reader_from_config(load_config())
+            return self.reader.get(row['response_hash'])
+        return row.get('generated_response') or ''
+
+    def lookup(self, transaction_id: str) -> List[Dict[str, Any]]:
+        """Historial de una transacción, del más reciente al más antiguo"""
+        return list(self.query(transaction_id=transaction_id, newest_first=True))
+
+    def query(self, transaction_id: Optional[str] = None, run_id: Optional[str] = None,
+              status: Optional[str] = None, model: Optional[str] = None, since: Optional[str] = None,
+              until: Optional[str] = None, newest_first: bool = False) -> Iterator[Dict[str, Any]]:
+        """Filas que cumplen los filtros (fechas ISO, `until` exclusivo), en streaming"""
+        filters = [('transaction_id = ?', transaction_id), ('run_id = ?', run_id), ('status = ?', status),
+                   ('model_used = ?', model), ('processed_at >= ?', since), ('processed_at < ?', until)]
+        clauses = [(sql, value) for sql, value in filters if value is not None]
+        where = f"WHERE {' AND '.join(sql for sql, _ in clauses)}" if clauses else ''
+        order = 'DESC' if newest_first else 'ASC'
+        conn = self._connect()
+        try:
+            for row in conn.execute(f"SELECT * FROM results {where} ORDER BY processed_at {order}, row_id {order}",
+                                    [str(value) for _, value in clauses]):
+                yield dict(row)
+        finally:
+            conn.close()
+
+    def latest_run_id(self) -> Optional[str]:
+        conn = self._connect()
+        try:
+            row = conn.execute("SELECT run_id FROM runs ORDER BY started_at DESC, run_id DESC LIMIT 1").fetchone()
+            return row['run_id'] if row else None
+        finally:
+            conn.close()
+
+    def runs(self) -> List[Dict[str, Any]]:
+        """Ejecuciones registradas con sus totales, de la más reciente a la más antigua"""
+        conn = self._connect()
+        try:
+            return [dict(row) for row in conn.execute(
+                "SELECT runs.run_id, started_at, finished_at, "
+                "COALESCE(SUM(status = ?), 0) AS completed, COALESCE(SUM(status = ?), 0) AS failed "
+                "FROM runs LEFT JOIN results ON results.run_id = runs.run_id "
+                "GROUP BY runs.run_id ORDER BY started_at DESC", (COMPLETED, FAILED))]
+        finally:
+            conn.close()
+
+    def run_report(self, run_id: str) -> Optional[Dict[str, Any]]:
+        """Reporte de ejecución guardado por finish_run"""
+        conn = self._connect()
+        try:
+            row = conn.execute("SELECT report FROM runs WHERE run_id = ?", (run_id,)).fetchone()
+            return json.loads(row['report']) if row and row['report'] else None
+        finally:
+            conn.close()
+
+    def export_csv(self, path: str, **filters: Any) -> int:
+        """Exporta las filas filtradas con las columnas de results.csv (más las de error) y respuestas completas"""
+        columns = RESULT_COLUMNS + ['response_hash', 'run_id', 'error_type', 'error_message', 'total_tokens']
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        count = 0
+        with open(path, 'w', newline='', encoding='utf-8') as f:
+            writer = csv.DictWriter(f, fieldnames=columns, extrasaction='ignore')
+            writer.writeheader()
+            for row in self.query(**filters):
+                writer.writerow(export_row(row, self.response(row)))
+                count += 1
+        return count
+
+
+def export_row(row: Dict[str, Any], response: Optional[str] = None) -> Dict[str, Any]:
+    """Fila del almacén con los nombres de columna de results.csv (`response` si viene de un blob)"""
+    return {**row, 'id': row['transaction_id'],
+            'generated_response': response if response is not None else row['generated_response'] or '',
+            'model_used': row['model_used'] or '', 'response_length': row['response_length'] or 0}
+
+
+def from_config(config: Dict[str, Any]) -> Optional[ResultsStore]:
+    """Crea el almacén según la sección 'results_store'; None si está desactivado"""
+    settings = {**DEFAULT_RESULTS_STORE_CONFIG, **config.get('results_store', {})}
+    if not settings['enabled']:
+        return None
+    return ResultsStore(settings['path'], settings['batch_size'], blobs=get_store(config),
+                        reader=reader_from_config(config))
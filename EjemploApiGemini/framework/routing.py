@@ -0,0 +1,210 @@
+"""
+Enrutamiento de modelos para GeminiProcessor
+Elige el modelo de cada transacción (columna 'model', reglas de settings.json o
+un clasificador heurístico) y arma la cascada rápido → grande cuando está activa.
+También resuelve las opciones de generación por transacción (thinking budget y
+Google Search) a partir de plantillas, reglas y columnas del CSV
+"""
+
+from typing import Dict, Any, List, Optional
+
+DEFAULT_ROUTING_CONFIG = {
+    'enabled': False,
+    'rules': [],
+    'classifier': {
+        'max_simple_chars': 400,
+        'complex_keywords': [
+            'arquitectura', 'integración', 'orquestador', 'excepciones',
+            'sap', 'erp', 'api', 'base de datos', 'migración'
+        ]
+    },
+    'cascade': {
+        'enabled': False,
+        'models': [],
+        'min_response_chars': 400,
+        'required_keywords': []
+    }
+}
+
+DEFAULT_GENERATION_CONFIG = {
+    'default_template': 'default',
+    'templates': {},
+    'rules': []
+}
+
+_TRUE_VALUES = {'1', 'true', 'si', 'sí', 'yes', 'y', 'x'}
+
+# Rangos de thinking_budget por familia de modelo (-1 = dinámico, válido en todos);
+# Pro no permite desactivar el razonamiento y Flash-Lite tiene un mínimo mayor
+THINKING_LIMITS = {
+    'gemini-2.5-pro': {'min': 128, 'max': 32768, 'can_disable': False},
+    'gemini-2.5-flash-lite': {'min': 512, 'max': 24576, 'can_disable': True},
+    'gemini-2.5-flash': {'min': 0, 'max': 24576, 'can_disable': True}
+}
+
+
+def _merged(config: Dict[str, Any]) -> Dict[str, Any]:
+    """Mezcla la sección 'routing' con los valores por defecto (un nivel de profundidad)"""
+    routing = config.get('routing', {})
+    merged = {**DEFAULT_ROUTING_CONFIG, **routing}
+    for section in ('classifier', 'cascade'):
+        merged[section] = {**DEFAULT_ROUTING_CONFIG[section], **routing.get(section, {})}
+    return merged
+
+
+def classify_complexity(transaction: Dict[str, Any], classifier: Dict[str, Any]) -> str:
+    """
+    Clasificador heurístico liviano: 'simple' o 'complex'
+
+    Un prompt es simple si es corto y no menciona ninguna palabra clave de complejidad
+    """
+    text = f"{transaction.get('prompt', '')} {transaction.get('context', '')}"
+    lowered = text.lower()
+    if len(text) > classifier['max_simple_chars']:
+        return 'complex'
+    if any(keyword in lowered for keyword in classifier['complex_keywords']):
+        return 'complex'
+    return 'simple'
+
+
+def _rule_matches(rule: Dict[str, Any], transaction: Dict[str, Any], complexity: str) -> bool:
+    """Evalúa las condiciones de una regla; las condiciones ausentes no restringen"""
+    prompt_chars = len(transaction.get('prompt') or '') + len(transaction.get('context') or '')
+    if 'max_prompt_chars' in rule and prompt_chars > rule['max_prompt_chars']:
+        return False
+    if 'min_prompt_chars' in rule and prompt_chars < rule['min_prompt_chars']:
+        return False
+    if 'complexity' in rule and rule['complexity'] != complexity:
+        return False
+    if 'keywords' in rule:
+        text = f"{transaction.get('prompt', '')} {transaction.get('context', '')}".lower()
+        if not any(keyword.lower() in text for keyword in rule['keywords']):
+            return False
+    return True
+
+
+def fit_thinking_budget(model: str, budget: Any) -> Any:
+    """
+    Ajusta el thinking_budget al rango que acepta el modelo (un 0 en Pro pasa al mínimo)
+
+    Los modelos sin límites conocidos reciben el valor tal cual
+    """
+    if budget is None or budget == -1:
+        return budget
+    family = max((name for name in THINKING_LIMITS if model.startswith(name)), key=len, default=None)
+    if family is None:
+        return budget
+    limits = THINKING_LIMITS[family]
+    if budget == 0 and limits['can_disable']:
+        return 0
+    return min(max(budget, limits['min']), limits['max'])
+
+
+def parse_bool(value: Any) -> bool:
+    """Interpreta valores booleanos de columnas CSV (true/1/sí/x)"""
+    if isinstance(value, bool):
+        return value
+    return str(value).strip().lower() in _TRUE_VALUES
+
+
+def _is_blank(value: Any) -> bool:
+    return value is None or str(value).strip() == ''
+
+
+class ModelRouter:
+    """Selecciona el modelo (o la cadena de modelos en cascada) de cada transacción"""
+
+    def __init__(self, config: Dict[str, Any]):
+        self.default_model = config['gemini']['model']
+        self.settings = _merged(config)
+        gemini_config = config['gemini']
+        self.generation = {**DEFAULT_GENERATION_CONFIG, **config.get('generation', {})}
+        # Gemini rechaza el modo JSON junto con herramientas: la salida estructurada gana
+        self.structured = bool(gemini_config.get('structured_output', False))
+        # Sin plantillas configuradas se usan los valores globales de la sección 'gemini'
+        self.base_options = {
+            'thinking_budget': gemini_config.get('thinking_budget', -1),
+            'google_search': gemini_config.get('google_search', False)
+        }
+
+    @property
+    def cascade_enabled(self) -> bool:
+        return bool(self.settings['cascade']['enabled'] and self.settings['cascade']['models'])
+
+    def route(self, transaction: Dict[str, Any]) -> str:
+        """
+        Elige el modelo principal de una transacción
+
+        Prioridad: columna 'model' de la fila > primera regla que coincide > gemini.model
+        """
+        row_model = (transaction.get('model') or '').strip()
+        if row_model:
+            return row_model
+        if not self.settings['enabled']:
+            return self.default_model
+
+        complexity = classify_complexity(transaction, self.settings['classifier'])
+        for rule in self.settings['rules']:
+            if _rule_matches(rule, transaction, complexity):
+                return rule['model']
+        return self.default_model
+
+    def chain(self, transaction: Dict[str, Any]) -> List[str]:
+        """
+        Modelos a intentar en orden
+
+        Con la cascada activa, si el modelo elegido forma parte de ella se continúa
+        con los modelos más grandes que le siguen; una fila con 'model' explícito no escala
+        """
+        model = self.route(transaction)
+        cascade_models = self.settings['cascade']['models']
+        if not self.cascade_enabled or (transaction.get('model') or '').strip():
+            return [model]
+        if model in cascade_models:
+            return cascade_models[cascade_models.index(model):]
+        return [model]
+
+    def validate(self, response: Optional[str]) -> bool:
+        """Valida la respuesta de un modelo rápido antes de aceptarla en la cascada"""
+        cascade = self.settings['cascade']
+        text = (response or '').strip()
+        if len(text) < cascade['min_response_chars']:
+            return False
+        lowered = text.lower()
+        return all(keyword.lower() in lowered for keyword in cascade['required_keywords'])
+
+    def generation_options(self, transaction: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Resuelve thinking_budget y google_search para una transacción
+
+        Cada paso sobrescribe al anterior: valores de 'gemini', plantilla (columna
+        'template' o default_template), reglas de 'generation.rules' que coinciden y,
+        por último, las columnas 'thinking_budget' / 'google_search' de la fila. El
+        thinking_budget se ajusta al rango del modelo elegido (fit_thinking_budget). Con
+        salida estructurada no se adjunta Google Search y queda search_dropped=True
+
+        Returns:
+            Dict con template, thinking_budget, google_search y search_dropped
+        """
+        template = (transaction.get('template') or '').strip() or self.generation['default_template']
+        options = dict(self.base_options)
+        options.update({key: value for key, value in self.generation['templates'].get(template, {}).items()
+                        if key in options})
+
+        complexity = classify_complexity(transaction, self.settings['classifier'])
+        for rule in self.generation['rules']:
+            if _rule_matches(rule.get('when', {}), transaction, complexity):
+                options.update({key: value for key, value in rule.items() if key in options})
+
+        if not _is_blank(transaction.get('thinking_budget')):
+            options['thinking_budget'] = int(transaction['thinking_budget'])
+        if not _is_blank(transaction.get('google_search')):
+            options['google_search'] = parse_bool(transaction['google_search'])
+
+        budget = options['thinking_budget']
+        options['thinking_budget'] = fit_thinking_budget(self.route(transaction), budget)
+        options['search_dropped'] = bool(self.structured and options['google_search'])
+        if options['search_dropped']:
+            options['google_search'] = False
+        options['template'] = template
+        return options
@@ -0,0 +1,181 @@
+"""
+Planificador de la cola de transacciones
+Ordena los elementos por prioridad y costo estimado (el más largo primero dentro
+de cada banda) y los despacha a los workers para minimizar el tiempo total
+"""
+
+import csv
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Any, Callable, Iterable, List, Tuple
+
+# Bandas de prioridad al estilo Orchestrator; los valores numéricos también se aceptan
+PRIORITY_LEVELS = {'high': 0, 'alta': 0, 'normal': 1, 'media': 1, 'low': 2, 'baja': 2}
+DEFAULT_PRIORITY = PRIORITY_LEVELS['normal']
+
+_END = object()
+
+DEFAULT_SCHEDULER_CONFIG = {
+    'base_cost': 1000,
+    'prompt_weight': 1.0,
+    'context_weight': 0.5,
+    'output_weights': {
+        'diagrama': 1.5,
+        'código': 1.4,
+        'workflow': 1.3,
+        'flujo': 1.3,
+        'detallad': 1.2
+    },
+    'calibration_file': None
+}
+
+
+def _scheduler_config(config: Dict[str, Any]) -> Dict[str, Any]:
+    """Mezcla la sección 'scheduler' de la configuración con los valores por defecto"""
+    return {**DEFAULT_SCHEDULER_CONFIG, **config.get('scheduler', {})}
+
+
+def parse_priority(value: Any) -> int:
+    """
+    Convierte la columna opcional 'priority' en una banda numérica
+
+    Acepta High/Normal/Low (o Alta/Media/Baja) y enteros; menor valor = se despacha antes
+    """
+    if value is None or str(value).strip() == '':
+        return DEFAULT_PRIORITY
+    text = str(value).strip().lower()
+    if text in PRIORITY_LEVELS:
+        return PRIORITY_LEVELS[text]
+    try:
+        return int(text)
+    except ValueError:
+        return DEFAULT_PRIORITY
+
+
+def estimate_cost(item: Dict[str, Any], config: Dict[str, Any]) -> float:
+    """
+    Estima el costo relativo de un elemento a partir de la longitud del prompt,
+    del contexto y del tipo de salida esperada
+
+    Args:
+        item: Elemento de la cola
+        config: Configuración del framework
+
+    Returns:
+        Costo estimado en unidades relativas (comparables entre elementos)
+    """
+    settings = _scheduler_config(config)
+    prompt = item.get('prompt') or ''
+    context = item.get('context') or ''
+    expected_output = (item.get('expected_output') or '').lower()
+
+    multiplier = 1.0
+    for keyword, weight in settings['output_weights'].items():
+        if keyword in expected_output:
+            multiplier = max(multiplier, weight)
+
+    input_cost = len(prompt) * settings['prompt_weight'] + len(context) * settings['context_weight']
+    return (settings['base_cost'] + input_cost) * multiplier
+
+
+def rank(item: Dict[str, Any], config: Dict[str, Any]) -> Tuple[int, float]:
+    """Devuelve (banda de prioridad, costo estimado) de un elemento"""
+    return parse_priority(item.get('priority')), estimate_cost(item, config)
+
+
+def schedule(queue: Iterable[Dict[str, Any]], config: Dict[str, Any]) -> List[Tuple[Dict[str, Any], float]]:
+    """
+    Ordena la cola por banda de prioridad y, dentro de cada banda, del más costoso
+    al más barato (Longest Processing Time first)
+
+    Returns:
+        Lista de tuplas (elemento, costo estimado) en orden de despacho
+    """
+    ranked = []
+    for item in queue:
+        priority, cost = rank(item, config)
+        ranked.append((priority, -cost, item))
+    # sort es estable: los empates conservan el orden del archivo
+    ranked.sort(key=lambda entry: (entry[0], entry[1]))
+    return [(item, -neg_cost) for _, neg_cost, item in ranked]
+
+
+def dispatch(items: Iterable[Any], handler: Callable[[Any], Any],
+             on_done: Callable[[Any, Any], None], workers: int = 1) -> None:
+    """
+    Despacha los elementos en el orden recibido a un pool de workers
+
+    Como mucho hay `workers` elementos en vuelo, así el orden de despacho del
+    planificador se respeta y las fuentes perezosas (cola SQLite) se consumen bajo demanda.
+    `on_done` se invoca siempre en el hilo que llama a dispatch.
+
+    Args:
+        items: Elementos en orden de despacho
+        handler: Función ejecutada por los workers para cada elemento
+        on_done: Callback (elemento, resultado de handler)
+        workers: Número de workers concurrentes
+    """
+    if workers <= 1:
+        for item in items:
+            on_done(item, handler(item))
+        return
+
+    iterator = iter(items)
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        in_flight = {}
+        while True:
+            # Se espera un worker libre antes de pedir el siguiente elemento a la fuente
+            if len(in_flight) >= workers:
+                done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+                for future in done:
+                    on_done(in_flight.pop(future), future.result())
+            item = next(iterator, _END)
+            if item is _END:
+                break
+            in_flight[pool.submit(handler, item)] = item
+
+        for future in list(in_flight):
+            on_done(in_flight.pop(future), future.result())
+
+
+class CalibrationLog:
+    """Registra costo estimado vs. duración real para calibrar el estimador"""
+
+    FIELDS = ['id', 'priority', 'prompt_chars', 'context_chars', 'estimated_cost',
+              'actual_seconds', 'status', 'recorded_at']
+
+    def __init__(self, config: Dict[str, Any], logger=None):
+        self.logger = logger
+        self.path = _scheduler_config(config)['calibration_file']
+        self._lock = threading.Lock()
+        if self.path:
+            Path(self.path).parent.mkdir(parents=True, exist_ok=True)
+
+    def record(self, item: Dict[str, Any], estimated_cost: float, actual_seconds: float, status: str) -> None:
+        """Registra una medición en el log y, si está configurado, en el CSV de calibración"""
+        if self.logger:
+            self.logger.info("Calibración %s: costo estimado %.0f, duración real %.2fs (%s)",
+                             item.get('id', 'unknown'), estimated_cost, actual_seconds, status)
+        if not self.path:
+            return
+
+        row = {
+            'id': item.get('id', 'unknown'),
+            'priority': parse_priority(item.get('priority')),
+            'prompt_chars': len(item.get('prompt') or ''),
+            'context_chars': len(item.get('context') or ''),
+            'estimated_cost': round(estimated_cost, 1),
+            'actual_seconds': round(actual_seconds, 3),
+            'status': status,
+            'recorded_at': datetime.now().isoformat()
+        }
+        with self._lock:
+            file_exists = os.path.exists(self.path)
+            with open(self.path, 'a', newline='', encoding='utf-8') as f:
+                writer = csv.DictWriter(f, fieldnames=self.FIELDS)
+                if not file_exists:
+                    writer.writeheader()
+                writer.writerow(row)
@@ -0,0 +1,216 @@
+"""
+Caché de respuestas para prompts casi duplicados (paráfrasis)
+Cada pedido (campo `prompt`) se reduce a su conjunto de palabras relevantes; MinHash con
+bandas LSH encuentra candidatos en tiempo casi constante y la similitud de Jaccard
+exacta decide si la respuesta guardada se reutiliza
+"""
+
+import hashlib
+import json
+import random
+import re
+import threading
+import time
+import unicodedata
+from collections import OrderedDict
+from pathlib import Path
+from typing import Dict, Any, FrozenSet, List, Optional, Set, Tuple
+
+from .utils import setup_logger
+
+DEFAULT_SIMILARITY_CONFIG = {
+    'enabled': False,
+    'threshold': 0.8,
+    'num_perm': 64,
+    'bands': 16,
+    'max_entries': 10000,
+    'path': 'data/cache/similar_prompts.jsonl'
+}
+
+# Palabras que no distinguen un pedido de otro
+STOPWORDS = frozenset("""
+    a al algo como con de del el en es esta este la las lo los mas me mi o para pero por que se si sin
+    su sus un una uno unos unas y ya the of and to in for on with
+""".split())
+
+_WORD = re.compile(r'\w+')
+_PRIME = (1 << 61) - 1
+
+
+def _hash(word: str) -> int:
+    return int.from_bytes(hashlib.blake2b(word.encode('utf-8'), digest_size=8).digest(), 'little')
+
+
+def shingles(text: str) -> FrozenSet[int]:
+    """Palabras relevantes del texto (sin mayúsculas, tildes ni palabras vacías) como hashes"""
+    normalized = ''.join(char for char in unicodedata.normalize('NFKD', text.lower())
+                         if not unicodedata.combining(char))
+    return frozenset(_hash(word) for word in _WORD.findall(normalized)
+                     if (len(word) > 1 or word.isdigit()) and word not in STOPWORDS)
+
+
+def jaccard(a: FrozenSet[int], b: FrozenSet[int]) -> float:
+    return len(a & b) / len(a | b) if a or b else 0.0
+
+
+class SimilarityCache:
+    """
+    Respuestas indexadas por MinHash/LSH, acotadas a max_entries (LRU)
+
+    `scope` separa lo que no debe mezclarse (modelos, opciones de generación,
+    instrucción de sistema, contexto). Las entradas se agregan a un JSONL para
+    sobrevivir entre ejecuciones
+    """
+
+    def __init__(self, threshold: float = 0.8, num_perm: int = 64, bands: int = 16,
+                 max_entries: int = 10000, path: Optional[str] = None):
+        if num_perm % bands:
+            raise ValueError("num_perm debe ser múltiplo de bands")
+        self.threshold = threshold
+        self.bands = bands
+        self.rows = num_perm // bands
+        self.max_entries = max_entries
+        self.path = Path(path) if path else None
+        # Permutaciones fijas: las firmas deben coincidir entre ejecuciones
+        generator = random.Random(42)
+        self._perms = [(generator.randrange(1, _PRIME), generator.randrange(0, _PRIME)) for _ in range(num_perm)]
+        self._entries: 'OrderedDict[int, Dict[str, Any]]' = OrderedDict()
+        self._buckets: Dict[Tuple[str, int, Tuple[int, ...]], Set[int]] = {}
+        self._next_id = 0
+        self._lock = threading.Lock()
+        self.lookups = 0
+        self.hits = 0
+        self.lookup_seconds = 0.0
+        self.logger = setup_logger('similarity')
+        if self.path and self.path.exists():
+            self._load()
+
+    def features(self, text: str) -> FrozenSet[int]:
+        return shingles(text)
+
+    def _bands(self, features: FrozenSet[int]) -> List[Tuple[int, ...]]:
+        signature = [min((a * x + b) % _PRIME for x in features) for a, b in self._perms]
+        return [tuple(signature[band * self.rows:(band + 1) * self.rows]) for band in range(self.bands)]
+
+    def lookup(self, text: str, scope: str) -> Optional[Dict[str, Any]]:
+        """
+        Respuesta guardada más parecida al texto dentro del scope
+
+        Returns:
+            Dict con response, source (transaction_id y model de origen) y similarity;
+            None si ninguna supera el umbral
+        """
+        started = time.perf_counter()
+        features = self.features(text)
+        best, best_similarity = None, 0.0
+        if features:
+            bands = self._bands(features)
+            with self._lock:
+                candidates = set()
+                for band, values in enumerate(bands):
+                    candidates |= self._buckets.get((scope, band, values), set())
+                for entry_id in candidates:
+                    similarity = jaccard(features, self._entries[entry_id]['features'])
+                    if similarity > best_similarity:
+                        best, best_similarity = entry_id, similarity
+                hit = best is not None and best_similarity >= self.threshold
+                if hit:
+                    self._entries.move_to_end(best)
+                    entry = self._entries[best]
+        else:
+            hit = False
+        with self._lock:
+            self.lookups += 1
+            self.hits += hit
+            self.lookup_seconds += time.perf_counter() - started
+        if not hit:
+            return None
+        return {'response': entry['response'], 'source': dict(entry['source']),
+                'similarity': round(best_similarity, 4)}
+
+    def add(self, text: str, scope: str, response: str, source: Dict[str, Any]) -> None:
+        """Indexa una respuesta nueva (y la agrega al archivo si hay `path`)"""
+        features = self.features(text)
+        if not features:
+            return
+        with self._lock:
+            self._index(scope, features, response, source)
+            if self.path:
+                self.path.parent.mkdir(parents=True, exist_ok=True)
+                with open(self.path, 'a', encoding='utf-8') as f:
+                    f.write(json.dumps({'scope': scope, 'features': sorted(features), 'response': response,
+                                        'source': source}, ensure_ascii=False) + '\n')
+
+    def _index(self, scope: str, features: FrozenSet[int], response: str, source: Dict[str, Any]) -> None:
+        entry_id = self._next_id
+        self._next_id += 1
+        keys = [(scope, band, values) for band, values in enumerate(self._bands(features))]
+        self._entries[entry_id] = {'scope': scope, 'features': features, 'response': response, 'source': source,
+                                   'keys': keys}
+        for key in keys:
+            self._buckets.setdefault(key, set()).add(entry_id)
+        while len(self._entries) > self.max_entries:
+            evicted_id, evicted = self._entries.popitem(last=False)
+            for key in evicted['keys']:
+                bucket = self._buckets[key]
+                bucket.discard(evicted_id)
+                if not bucket:
+                    del self._buckets[key]
+
+    def _load(self) -> None:
+        """Reconstruye el índice; si el archivo creció de más se reescribe con lo vigente"""
+        lines = 0
+        with open(self.path, 'r', encoding='utf-8') as f:
+            for line in f:
+                lines += 1
+                try:
+                    entry = json.loads(line)
+                except json.JSONDecodeError:
+                    continue
+                self._index(entry['scope'], frozenset(entry['features']), entry['response'], entry['source'])
+        if lines > 2 * self.max_entries:
+            tmp_path = self.path.with_suffix('.tmp')
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                for entry in self._entries.values():
+                    f.write(json.dumps({'scope': entry['scope'], 'features': sorted(entry['features']),
+                                        'response': entry['response'], 'source': entry['source']},
+                                       ensure_ascii=False) + '\n')
+            tmp_path.replace(self.path)
+        self.logger.info("Caché de similitud cargada: %d entradas", len(self._entries))
+
+    def summary(self) -> Dict[str, Any]:
+        """Sección del reporte de ejecución"""
+        return {
+            'entries': len(self._entries),
+            'lookups': self.lookups,
+            'hits': self.hits,
+            'hit_rate': round(self.hits / self.lookups, 4) if self.lookups else 0.0,
+            'avg_lookup_ms': round(self.lookup_seconds / self.lookups * 1000, 3) if self.lookups else 0.0,
+            'threshold': self.threshold
+        }
+
+
+_cache: Optional[SimilarityCache] = None
+_cache_lock = threading.Lock()
+
+
+def get_cache(config: Dict[str, Any]) -> Optional[SimilarityCache]:
+    """Caché única del proceso (compartida por los workers); None si está desactivada"""
+    global _cache
+    settings = {**DEFAULT_SIMILARITY_CONFIG, **config.get('similarity_cache', {})}
+    if not settings.pop('enabled'):
+        return None
+    with _cache_lock:
+        if _cache is None:
+            _cache = SimilarityCache(**settings)
+        return _cache
+
+
+def active_cache() -> Optional[SimilarityCache]:
+    return _cache
+
+
+def reset() -> None:
+    global _cache
+    with _cache_lock:
+        _cache = None
@@ -0,0 +1,264 @@
+"""
+Agregadores en streaming para el reporte de ejecución
+Cada resultado se incorpora en O(1) y la memoria no crece con el número de
+transacciones, así el reporte es exacto en conteos y aproximado (error relativo
+acotado) en cuantiles aunque no se conserven los resultados
+"""
+
+import heapq
+import math
+from collections import Counter
+from typing import Dict, Any, Iterable, List, Optional
+
+from .tokens import USAGE_KEYS
+
+QUANTILES = (0.5, 0.9, 0.95, 0.99)
+
+
+class QuantileSketch:
+    """
+    Sketch de cuantiles con buckets logarítmicos (estilo DDSketch)
+
+    Cada valor cae en el bucket ceil(log_gamma(v)); el cuantil devuelto tiene un error
+    relativo de como máximo `relative_accuracy`. El número de buckets depende del rango
+    de valores, no de cuántos se agregan, y se limita con `max_buckets`
+    """
+
+    __slots__ = ('gamma', 'log_gamma', 'max_buckets', 'buckets', 'zeros',
+                 'count', 'total', 'min', 'max', '_keys', '_floor')
+
+    def __init__(self, relative_accuracy: float = 0.01, max_buckets: int = 2048):
+        self.gamma = (1 + relative_accuracy) / (1 - relative_accuracy)
+        self.log_gamma = math.log(self.gamma)
+        self.max_buckets = max_buckets
+        self.buckets: Dict[int, int] = {}
+        # Heap con las claves de los buckets y el bucket que absorbe la cola inferior al colapsar
+        self._keys: List[int] = []
+        self._floor: Optional[int] = None
+        self.zeros = 0
+        self.count = 0
+        self.total = 0.0
+        self.min = math.inf
+        self.max = -math.inf
+
+    def add(self, value: float) -> None:
+        value = float(value)
+        self.count += 1
+        self.total += value
+        self.min = min(self.min, value)
+        self.max = max(self.max, value)
+        if value <= 1e-9:
+            self.zeros += 1
+            return
+        key = math.ceil(math.log(value) / self.log_gamma)
+        if self._floor is not None and key < self._floor:
+            key = self._floor
+        if key in self.buckets:
+            self.buckets[key] += 1
+            return
+        self.buckets[key] = 1
+        heapq.heappush(self._keys, key)
+        if len(self.buckets) > self.max_buckets:
+            self._collapse()
+
+    def _collapse(self) -> None:
+        """Une los dos buckets más bajos; solo pierde precisión en la cola inferior"""
+        lowest = heapq.heappop(self._keys)
+        self._floor = self._keys[0]
+        self.buckets[self._floor] += self.buckets.pop(lowest)
+
+    def quantile(self, q: float) -> Optional[float]:
+        if not self.count:
+            return None
+        rank = q * (self.count - 1)
+        seen = self.zeros
+        if rank < seen:
+            return 0.0
+        for key in sorted(self.buckets):
+            seen += self.buckets[key]
+            if seen > rank:
+                # Punto medio del bucket, acotado por los extremos observados
+                estimate = 2 * self.gamma ** key / (self.gamma + 1)
+                return min(max(estimate, self.min), self.max)
+        return self.max
+
+    def to_dict(self, digits: int = 3) -> Dict[str, Any]:
+        if not self.count:
+            return {'count': 0}
+        summary = {
+            'count': self.count,
+            'min': round(self.min, digits),
+            'max': round(self.max, digits),
+            'mean': round(self.total / self.count, digits),
+            'total': round(self.total, digits)
+        }
+        for q in QUANTILES:
+            summary[f"p{int(q * 100)}"] = round(self.quantile(q), digits)
+        return summary
+
+
+class GroupStats:
+    """Llamadas, aceptaciones, latencia y tokens de un grupo (modelo, plantilla, thinking budget...)"""
+
+    __slots__ = ('calls', 'accepted', 'rejected', 'latency', 'tokens')
+
+    def __init__(self):
+        self.calls = self.accepted = self.rejected = self.tokens = 0
+        self.latency = QuantileSketch()
+
+    def add(self, latency: float, accepted: bool, tokens: int = 0) -> None:
+        self.calls += 1
+        self.tokens += tokens
+        if accepted:
+            self.accepted += 1
+        else:
+            self.rejected += 1
+        self.latency.add(latency)
+
+    def to_dict(self) -> Dict[str, Any]:
+        latency = self.latency.to_dict()
+        return {
+            'calls': self.calls,
+            'accepted': self.accepted,
+            'rejected': self.rejected,
+            'total_latency_seconds': latency.get('total', 0.0),
+            'avg_latency_seconds': latency.get('mean', 0.0),
+            'max_latency_seconds': latency.get('max', 0.0),
+            'p50_latency_seconds': latency.get('p50'),
+            'p95_latency_seconds': latency.get('p95'),
+            'total_tokens': self.tokens
+        }
+
+
+class RunStats:
+    """Estadísticas de la ejecución, actualizadas por transacción"""
+
+    def __init__(self):
+        self.successful = 0
+        self.failed = 0
+        self.escalated = 0
+        self.retries = 0
+        self.errors = Counter()
+        self.latency = QuantileSketch()
+        self.response_length = QuantileSketch()
+        # Tokens acumulados por tipo, por transacción y segundos de generación con conteo
+        self.tokens = dict.fromkeys(USAGE_KEYS, 0)
+        self.tokens_per_item = QuantileSketch()
+        self.token_seconds = 0.0
+        # Resúmenes map-reduce de contextos largos (llamadas extra al modelo rápido)
+        self.condensed = {'items': 0, 'calls': 0, 'cached_chunks': 0, 'total_tokens': 0, 'seconds': 0.0}
+        self.condense_calls_per_item = QuantileSketch()
+        # Buffer de reordenamiento de la salida (lo completa ResultWriter al cerrar)
+        self.output_order: Optional[Dict[str, Any]] = None
+        self.groups: Dict[str, Dict[str, GroupStats]] = {
+            'models': {}, 'by_template': {}, 'by_thinking_budget': {}, 'by_google_search': {}
+        }
+
+    def _group(self, dimension: str, name: str) -> GroupStats:
+        groups = self.groups[dimension]
+        if name not in groups:
+            groups[name] = GroupStats()
+        return groups[name]
+
+    def add_result(self, result: Any) -> None:
+        """Incorpora un resultado exitoso (Result o dict con 'metadata')"""
+        metadata = result.get('metadata', {}) or {}
+        self.successful += 1
+        self.response_length.add(len(result.get('generated_response', '') or ''))
+        attempts = metadata.get('model_attempts', []) or []
+        if len(attempts) > 1:
+            self.escalated += 1
+        latency = metadata.get('latency_seconds') or sum(attempt.get('latency_seconds', 0.0) for attempt in attempts)
+        self.latency.add(latency)
+        usage = metadata.get('usage')
+        if usage:
+            for key in USAGE_KEYS:
+                self.tokens[key] += usage.get(key, 0)
+            self.tokens_per_item.add(usage.get('total_tokens', 0))
+            self.token_seconds += latency
+
+        condensed = metadata.get('context_summary')
+        if condensed:
+            self.add_condensed(condensed)
+
+        template = metadata.get('template') or 'default'
+        budget = str(metadata.get('thinking_budget'))
+        search = 'with_search' if metadata.get('google_search') else 'without_search'
+        for attempt in attempts:
+            # Las respuestas de la caché de similitud no son llamadas al modelo
+            if attempt.get('cache_hit'):
+                continue
+            latency, accepted = attempt.get('latency_seconds', 0.0), bool(attempt.get('accepted'))
+            tokens = (attempt.get('usage') or {}).get('total_tokens', 0)
+            self._group('models', attempt.get('model', 'unknown')).add(latency, accepted, tokens)
+            self._group('by_template', template).add(latency, accepted)
+            self._group('by_thinking_budget', budget).add(latency, accepted)
+            self._group('by_google_search', search).add(latency, accepted)
+
+    def add_condensed(self, detail: Dict[str, Any]) -> None:
+        """Cuenta las llamadas de resumen de una transacción; sus tokens suman al total de la ejecución"""
+        usage = detail.get('usage') or {}
+        for key in USAGE_KEYS:
+            self.tokens[key] += usage.get(key, 0)
+        self.condensed['items'] += 1
+        self.condensed['calls'] += detail.get('calls', 0)
+        self.condensed['cached_chunks'] += detail.get('cached_chunks', 0)
+        self.condensed['total_tokens'] += usage.get('total_tokens', 0)
+        self.condensed['seconds'] += detail.get('seconds', 0.0)
+        self.condense_calls_per_item.add(detail.get('calls', 0))
+
+    def add_failure(self, error_type: Optional[str] = None) -> None:
+        """Cuenta un elemento fallido por tipo de error (classify_error)"""
+        self.failed += 1
+        self.errors[error_type or 'Unknown'] += 1
+
+    def add_failed_item(self, item: Dict[str, Any]) -> None:
+        """Cuenta un elemento fallido tal como llega de la cola o de results_failed.csv"""
+        self.add_failure(item.get('error_type'))
+
+    def add_retry(self, count: int = 1) -> None:
+        self.retries += count
+
+    @classmethod
+    def from_results(cls, results: Iterable[Any] = (), failed_items: Iterable[Dict[str, Any]] = ()) -> 'RunStats':
+        """Construye las estadísticas desde listas ya existentes"""
+        stats = cls()
+        for result in results:
+            if hasattr(result, 'get'):
+                stats.add_result(result)
+        for item in failed_items:
+            stats.add_failed_item(item)
+        return stats
+
+    @property
+    def total(self) -> int:
+        return self.successful + self.failed
+
+    def breakdown(self, dimension: str) -> Dict[str, Dict[str, Any]]:
+        return {name: group.to_dict() for name, group in self.groups[dimension].items()}
+
+    def token_report(self) -> Dict[str, Any]:
+        """Totales por tipo y velocidad de generación (tokens de salida y thinking por segundo)"""
+        generated = self.tokens['output_tokens'] + self.tokens['thoughts_tokens']
+        return {
+            **self.tokens,
+            'per_item': self.tokens_per_item.to_dict(digits=0),
+            'output_tokens_per_second': round(generated / self.token_seconds, 2) if self.token_seconds else 0
+        }
+
+    def report(self) -> Dict[str, Any]:
+        """Secciones del reporte (además de execution_summary)"""
+        report = {
+            'latency_seconds': self.latency.to_dict(),
+            'response_length': self.response_length.to_dict(digits=1),
+            'tokens': self.token_report(),
+            'context_condensing': {**self.condensed, 'seconds': round(self.condensed['seconds'], 4),
+                                   'calls_per_item': self.condense_calls_per_item.to_dict(digits=0)},
+            'errors': dict(self.errors),
+            'models': self.breakdown('models'),
+            'generation': {dimension: self.breakdown(dimension)
+                           for dimension in ('by_thinking_budget', 'by_google_search', 'by_template')}
+        }
+        if self.output_order:
+            report['output_order'] = self.output_order
+        return report
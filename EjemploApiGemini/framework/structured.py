@@ -0,0 +1,114 @@
+"""
+Salida estructurada: la respuesta de Gemini como JSON con las cinco secciones
+que pide el prompt (análisis, diagrama de flujo, pasos, consideraciones y excepciones)
+El JSON se valida mientras llega el streaming y se guarda en secciones tipadas,
+sin tener que extraerlas después con expresiones regulares
+"""
+
+import json
+from typing import Dict, Any, List
+
+from google.genai import types
+
+# Sección -> tipo JSON ('string' o lista de strings)
+SECTIONS = {
+    'analysis': 'string',
+    'flow_diagram': 'string',
+    'steps': 'array',
+    'considerations': 'array',
+    'exceptions': 'array'
+}
+
+SECTION_COLUMNS = list(SECTIONS)
+
+
+class StructuredOutputError(ValueError):
+    """La respuesta no es un JSON válido con las secciones esperadas"""
+
+
+def response_schema() -> types.Schema:
+    """Esquema para GenerateContentConfig.response_schema"""
+    properties = {
+        name: types.Schema(type=types.Type.STRING) if kind == 'string' else
+        types.Schema(type=types.Type.ARRAY, items=types.Schema(type=types.Type.STRING))
+        for name, kind in SECTIONS.items()
+    }
+    return types.Schema(type=types.Type.OBJECT, properties=properties,
+                        required=list(SECTIONS), property_ordering=list(SECTIONS))
+
+
+class StreamingJsonValidator:
+    """
+    Valida la estructura del JSON a medida que llegan los chunks
+
+    Sigue strings, escapes y anidamiento, así una respuesta que no empieza con '{',
+    cierra un corchete que no corresponde o sigue después del objeto raíz se
+    rechaza en el chunk en que ocurre, sin esperar el final del streaming
+    """
+
+    __slots__ = ('_parts', '_stack', '_in_string', '_escaped', '_started', '_closed')
+
+    def __init__(self):
+        self._parts: List[str] = []
+        self._stack: List[str] = []
+        self._in_string = self._escaped = self._started = self._closed = False
+
+    def feed(self, text: str) -> None:
+        self._parts.append(text)
+        for char in text:
+            if self._in_string:
+                if self._escaped:
+                    self._escaped = False
+                elif char == '\\':
+                    self._escaped = True
+                elif char == '"':
+                    self._in_string = False
+                continue
+            if char.isspace():
+                continue
+            if self._closed:
+                raise StructuredOutputError("Contenido después del objeto JSON raíz")
+            if not self._started:
+                if char != '{':
+                    raise StructuredOutputError(f"La respuesta no empieza con un objeto JSON: {char!r}")
+                self._started = True
+            if char == '"':
+                self._in_string = True
+            elif char in '{[':
+                self._stack.append('}' if char == '{' else ']')
+            elif char in '}]':
+                if not self._stack or self._stack.pop() != char:
+                    raise StructuredOutputError(f"Cierre {char!r} no corresponde")
+                if not self._stack:
+                    self._closed = True
+
+    def result(self) -> Dict[str, Any]:
+        """Parsea el JSON completo y valida secciones y tipos"""
+        if not self._closed:
+            raise StructuredOutputError("El JSON de la respuesta quedó incompleto")
+        try:
+            data = json.loads(''.join(self._parts))
+        except json.JSONDecodeError as e:
+            raise StructuredOutputError(f"JSON inválido: {e.msg}")
+        return validate_sections(data)
+
+
+def validate_sections(data: Any) -> Dict[str, Any]:
+    """Comprueba que estén todas las secciones con su tipo"""
+    if not isinstance(data, dict):
+        raise StructuredOutputError("La respuesta no es un objeto JSON")
+    sections = {}
+    for name, kind in SECTIONS.items():
+        value = data.get(name)
+        if kind == 'string' and not isinstance(value, str):
+            raise StructuredOutputError(f"La sección '{name}' debe ser texto")
+        if kind == 'array' and not (isinstance(value, list) and all(isinstance(v, str) for v in value)):
+            raise StructuredOutputError(f"La sección '{name}' debe ser una lista de textos")
+        sections[name] = value
+    return sections
+
+
+def section_columns(sections: Dict[str, Any]) -> Dict[str, str]:
+    """Secciones como columnas de texto para CSV/Excel (las listas, una línea por elemento)"""
+    return {name: '\n'.join(value) if isinstance(value, list) else (value or '')
+            for name, value in ((name, (sections or {}).get(name)) for name in SECTION_COLUMNS)}
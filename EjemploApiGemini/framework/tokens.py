@@ -0,0 +1,163 @@
+"""
+Consumo de tokens: uso por transacción, presupuesto de la ejecución y
+verificación previa (count_tokens) del tamaño de los prompts
+"""
+
+import threading
+from typing import Dict, Any, Callable, Optional
+
+from .utils import setup_logger
+
+DEFAULT_TOKENS_CONFIG = {
+    'budget': None,
+    'max_prompt_tokens': None
+}
+
+# Campo de usage_metadata del SDK -> clave en la metadata del resultado
+USAGE_FIELDS = {
+    'prompt_token_count': 'prompt_tokens',
+    'cached_content_token_count': 'cached_tokens',
+    'thoughts_token_count': 'thoughts_tokens',
+    'candidates_token_count': 'output_tokens',
+    'total_token_count': 'total_tokens'
+}
+USAGE_KEYS = tuple(USAGE_FIELDS.values())
+
+
+class PromptTooLargeError(ValueError):
+    """El prompt supera max_prompt_tokens (error de negocio: reintentar no sirve)"""
+
+
+def _settings(config: Dict[str, Any]) -> Dict[str, Any]:
+    return {**DEFAULT_TOKENS_CONFIG, **config.get('tokens', {})}
+
+
+def usage_to_dict(usage: Any) -> Optional[Dict[str, int]]:
+    """Convierte usage_metadata (objeto del SDK o dict ya convertido) en conteos planos"""
+    if usage is None:
+        return None
+    if isinstance(usage, dict):
+        return {key: int(usage.get(key) or 0) for key in USAGE_KEYS}
+    return {key: int(getattr(usage, field, None) or 0) for field, key in USAGE_FIELDS.items()}
+
+
+def add_usage(total: Optional[Dict[str, int]], usage: Optional[Dict[str, int]]) -> Optional[Dict[str, int]]:
+    """Suma dos conteos (por ejemplo, los intentos de una cascada); None si ninguno tiene datos"""
+    if not usage:
+        return total
+    if not total:
+        return dict(usage)
+    return {key: total.get(key, 0) + usage.get(key, 0) for key in USAGE_KEYS}
+
+
+class TokenBudget:
+    """Tokens consumidos por el proceso contra un límite; al agotarse se deja de despachar"""
+
+    def __init__(self, limit: int):
+        self.limit = int(limit)
+        self.used = 0
+        self.skipped = 0
+        self._lock = threading.Lock()
+
+    def add(self, tokens: int) -> None:
+        with self._lock:
+            self.used += tokens
+
+    @property
+    def exhausted(self) -> bool:
+        return self.used >= self.limit
+
+    def skip(self, count: int = 1) -> None:
+        """Cuenta elementos que no se despacharon por falta de presupuesto"""
+        with self._lock:
+            self.skipped += count
+
+    def summary(self) -> Dict[str, Any]:
+        return {'limit': self.limit, 'used': self.used, 'exhausted': self.exhausted,
+                'skipped_items': self.skipped}
+
+
+_budget: Optional[TokenBudget] = None
+_lock = threading.Lock()
+
+
+def get_budget(config: Dict[str, Any]) -> Optional[TokenBudget]:
+    """Presupuesto único del proceso (compartido por los workers); None si no hay límite"""
+    global _budget
+    limit = _settings(config)['budget']
+    if not limit:
+        return None
+    with _lock:
+        if _budget is None:
+            _budget = TokenBudget(limit)
+        return _budget
+
+
+def active_budget() -> Optional[TokenBudget]:
+    return _budget
+
+
+def reset() -> None:
+    """Descarta el presupuesto del proceso (pruebas, o un nuevo lote en el mismo proceso)"""
+    global _budget
+    with _lock:
+        _budget = None
+
+
+class PromptPreflight:
+    """
+    Rechaza prompts que superan max_prompt_tokens antes de despacharlos
+
+    Corre en el hilo de despacho, así un prompt inválido no ocupa un worker.
+    Un token nunca abarca menos de un byte (ni con emoji o CJK, que el tokenizador
+    parte en bytes), de modo que solo los prompts con más bytes UTF-8 que el límite
+    se cuentan con la API; el resto pasa sin llamada. Se cuenta como la llamada real:
+    con el modelo enrutado y la system instruction
+    """
+
+    def __init__(self, client: Any, model: str, max_prompt_tokens: int, system_instruction: str = '',
+                 route: Optional[Callable[[Dict[str, Any]], str]] = None):
+        self.client = client
+        self.model = model
+        self.max_prompt_tokens = int(max_prompt_tokens)
+        self.system_instruction = system_instruction or ''
+        self.route = route
+        self.counted = 0
+        self.logger = setup_logger('tokens')
+
+    def count(self, prompt_text: str, model: Optional[str] = None) -> int:
+        self.counted += 1
+        # count_tokens de la Gemini API no acepta system_instruction: va como contenido previo
+        contents = [self.system_instruction, prompt_text] if self.system_instruction else prompt_text
+        return self.client.models.count_tokens(model=model or self.model, contents=contents).total_tokens
+
+    def check(self, prompt_text: str, transaction: Optional[Dict[str, Any]] = None) -> None:
+        """Lanza PromptTooLargeError si el prompt no entra en el límite"""
+        size = len(prompt_text.encode('utf-8')) + len(self.system_instruction.encode('utf-8'))
+        if size <= self.max_prompt_tokens:
+            return
+        model = self.route(transaction) if self.route and transaction is not None else self.model
+        try:
+            tokens = self.count(prompt_text, model)
+        except Exception as e:
+            # Sin conteo se despacha igual: la verificación previa no debe frenar la ejecución
+            self.logger.warning("No se pudo contar tokens del prompt: %s", e)
+            return
+        if tokens > self.max_prompt_tokens:
+            raise PromptTooLargeError(
+                f"El prompt tiene {tokens} tokens con {model} (máximo {self.max_prompt_tokens})")
+
+
+def preflight_from_config(config: Dict[str, Any], client: Any,
+                          route: Optional[Callable[[Dict[str, Any]], str]] = None) -> Optional[PromptPreflight]:
+    """
+    Crea la verificación previa si hay max_prompt_tokens y un cliente (no en replay)
+
+    Args:
+        route: Modelo de cada transacción (ModelRouter.route); por defecto gemini.model
+    """
+    limit = _settings(config)['max_prompt_tokens']
+    if not limit or client is None:
+        return None
+    return PromptPreflight(client, config['gemini']['model'], limit,
+                           config['gemini'].get('system_instruction', ''), route)
@@ -0,0 +1,204 @@
+"""
+Perfilado de la ejecución: volcado cProfile/pstats y spans por transacción
+Los spans se muestrean por transacción y se exportan en formato Chrome trace event
+(se abren en Perfetto o chrome://tracing). Desactivado, cada span cuesta una
+consulta a una variable thread-local
+"""
+
+import cProfile
+import json
+import os
+import pstats
+import random
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Dict, Any, Iterator, List, Optional
+
+DEFAULT_PROFILING_CONFIG = {
+    'sample_rate': 0.1,
+    'max_events': 200000,
+    'trace_file': 'data/output/trace.json',
+    'pstats_file': 'data/output/profile.pstats'
+}
+
+
+class Tracer:
+    """Acumula spans de las transacciones muestreadas"""
+
+    def __init__(self, sample_rate: float = 0.0, max_events: int = 200000):
+        self.sample_rate = sample_rate
+        self.max_events = max_events
+        self.events: List[Dict[str, Any]] = []
+        self.dropped = 0
+        self.origin = time.perf_counter()
+        self._local = threading.local()
+        self._lock = threading.Lock()
+
+    @property
+    def enabled(self) -> bool:
+        return self.sample_rate > 0
+
+    def _now_us(self, moment: Optional[float] = None) -> float:
+        return ((moment if moment is not None else time.perf_counter()) - self.origin) * 1e6
+
+    def _emit(self, event: Dict[str, Any]) -> None:
+        event.setdefault('pid', os.getpid())
+        event.setdefault('tid', threading.get_ident())
+        with self._lock:
+            if len(self.events) < self.max_events:
+                self.events.append(event)
+            else:
+                self.dropped += 1
+
+    @property
+    def active(self) -> bool:
+        """True si la transacción en curso en este hilo fue muestreada"""
+        return getattr(self._local, 'active', False)
+
+    @contextmanager
+    def transaction(self, transaction_id: Any, queued_at: Optional[float] = None) -> Iterator[None]:
+        """Span raíz de una transacción; decide si se muestrea"""
+        if not self.enabled or random.random() >= self.sample_rate:
+            yield
+            return
+        self._local.active = True
+        if queued_at is not None:
+            self.add_span('queue_wait', queued_at, time.perf_counter(), id=transaction_id)
+        try:
+            with self.span('transaction', id=transaction_id):
+                yield
+        finally:
+            self._local.active = False
+
+    @contextmanager
+    def span(self, name: str, **args: Any) -> Iterator[Dict[str, Any]]:
+        """Span de una etapa; los argumentos agregados al dict devuelto se exportan"""
+        if not self.active:
+            yield args
+            return
+        started = time.perf_counter()
+        try:
+            yield args
+        finally:
+            self.add_span(name, started, time.perf_counter(), **args)
+
+    def add_span(self, name: str, started: float, finished: float, **args: Any) -> None:
+        """Registra un span con tiempos perf_counter ya medidos"""
+        self._emit({'name': name, 'ph': 'X', 'ts': round(self._now_us(started), 1),
+                    'dur': round((finished - started) * 1e6, 1), 'args': args})
+
+    def instant(self, name: str, **args: Any) -> None:
+        """Evento puntual (por ejemplo, un reintento); se registra aunque no haya span activo"""
+        if self.enabled:
+            self._emit({'name': name, 'ph': 'i', 's': 't', 'ts': round(self._now_us(), 1), 'args': args})
+
+    def write(self, path: str) -> None:
+        """Exporta en formato Chrome trace event (JSON object format)"""
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        with self._lock:
+            events = list(self.events)
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump({'traceEvents': events, 'displayTimeUnit': 'ms',
+                       'otherData': {'sample_rate': self.sample_rate, 'dropped_events': self.dropped}},
+                      f, ensure_ascii=False)
+
+
+class Profiler:
+    """
+    cProfile por hilo: el hilo principal se perfila completo y cada worker se perfila
+    mientras ejecuta un elemento; al final se combinan en un único volcado pstats
+    """
+
+    def __init__(self):
+        self._profiles: List[cProfile.Profile] = []
+        self._local = threading.local()
+        self._lock = threading.Lock()
+
+    def _profile(self) -> cProfile.Profile:
+        profile = getattr(self._local, 'profile', None)
+        if profile is None:
+            profile = self._local.profile = cProfile.Profile()
+            with self._lock:
+                self._profiles.append(profile)
+        return profile
+
+    def start(self) -> None:
+        """Perfila el hilo actual hasta stop()"""
+        self._local.running = True
+        self._profile().enable()
+
+    def stop(self) -> None:
+        self._profile().disable()
+        self._local.running = False
+
+    @contextmanager
+    def worker(self) -> Iterator[None]:
+        """Perfila el bloque en un hilo worker (no anida si el hilo ya está perfilado)"""
+        if getattr(self._local, 'running', False):
+            yield
+            return
+        self.start()
+        try:
+            yield
+        finally:
+            self.stop()
+
+    def dump(self, path: str) -> Optional[pstats.Stats]:
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        with self._lock:
+            profiles = list(self._profiles)
+        stats = None
+        for profile in profiles:
+            try:
+                if stats is None:
+                    stats = pstats.Stats(profile)
+                else:
+                    stats.add(profile)
+            except TypeError:
+                # Perfil sin datos (hilo que no llegó a ejecutar nada)
+                continue
+        if stats is not None:
+            stats.dump_stats(path)
+        return stats
+
+
+_tracer = Tracer()
+_profiler: Optional[Profiler] = None
+
+
+def get_tracer() -> Tracer:
+    return _tracer
+
+
+def get_profiler() -> Optional[Profiler]:
+    return _profiler
+
+
+def configure(config: Dict[str, Any]) -> Tracer:
+    """Activa spans muestreados y cProfile según la sección 'profiling'"""
+    global _tracer, _profiler
+    settings = {**DEFAULT_PROFILING_CONFIG, **config.get('profiling', {})}
+    _tracer = Tracer(settings['sample_rate'], settings['max_events'])
+    _profiler = Profiler()
+    return _tracer
+
+
+def span(name: str, **args: Any):
+    """Atajo al span del tracer global"""
+    return _tracer.span(name, **args)
+
+
+def finish(config: Dict[str, Any]) -> Dict[str, str]:
+    """Escribe el trace y el volcado pstats; devuelve las rutas generadas"""
+    global _tracer, _profiler
+    settings = {**DEFAULT_PROFILING_CONFIG, **config.get('profiling', {})}
+    paths = {}
+    if _profiler is not None and _profiler.dump(settings['pstats_file']) is not None:
+        paths['pstats'] = settings['pstats_file']
+    if _tracer.enabled:
+        _tracer.write(settings['trace_file'])
+        paths['trace'] = settings['trace_file']
+    _tracer, _profiler = Tracer(), None
+    return paths
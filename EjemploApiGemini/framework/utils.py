@@ -2,7 +2,14 @@
 Utilidades compartidas del framework
 """
 
+import csv
+import json
 import logging
+import logging.handlers
+import os
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Any, List
 
 
 def classify_error(error: Exception) -> str:
@@ -17,28 +24,84 @@ def classify_error(error: Exception) -> str:
     """
     system_errors = [
         'ConnectionError', 'TimeoutError', 'APIError', 
-        'AuthenticationError', 'RateLimitError', 'NetworkError'
+        'AuthenticationError', 'RateLimitError', 'NetworkError',
+        'ServerError'
     ]
     
     error_type = type(error).__name__
     return 'SystemException' if any(sys_error in error_type for sys_error in system_errors) else 'BusinessException'
 
 
+# Atributos estándar de LogRecord; el resto se considera contexto estructurado (extra=...)
+_RECORD_ATTRIBUTES = set(vars(logging.LogRecord('', 0, '', 0, '', (), None))) | {'message', 'asctime'}
+
+
+class JsonFormatter(logging.Formatter):
+    """Formatea cada registro como una línea JSON (JSON Lines)"""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            'ts': datetime.fromtimestamp(record.created).isoformat(timespec='milliseconds'),
+            'level': record.levelname,
+            'logger': record.name,
+            'thread': record.threadName,
+            'message': record.getMessage()
+        }
+        for key, value in record.__dict__.items():
+            if key not in _RECORD_ATTRIBUTES and not key.startswith('_'):
+                entry[key] = value
+        if record.exc_text:
+            entry['exception'] = record.exc_text
+        elif record.exc_info:
+            entry['exception'] = self.formatException(record.exc_info)
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+
+class DeferredQueueHandler(logging.handlers.QueueHandler):
+    """
+    QueueHandler que no formatea en el hilo que registra
+
+    El mensaje se formatea con % recién en el hilo del QueueListener; solo la
+    traza de una excepción se convierte a texto aquí, para no retener el traceback
+    """
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        if record.exc_info and not record.exc_text:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+        record.exc_info = None
+        return record
+
+
 def setup_logger(name: str, level: str = 'INFO') -> logging.Logger:
     """
-    Configura y retorna un logger simple
+    Retorna un logger hijo de 'gemini_automation'
+
+    Los mensajes se propagan al pipeline asíncrono configurado por init.setup_logging;
+    si no se configuró (por ejemplo en pruebas) se comporta como un logger estándar
     
     Args:
         name: Nombre del logger
-        level: Nivel de logging
+        level: Nivel mínimo si el logger raíz de la automatización no tiene nivel
         
     Returns:
         Logger configurado
     """
-    logger = logging.getLogger(name)
-    if not logger.handlers:
-        handler = logging.StreamHandler()
-        handler.setFormatter(logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s'))
-        logger.addHandler(handler)
-        logger.setLevel(getattr(logging, level))
+    logger = logging.getLogger(f'gemini_automation.{name}')
+    parent = logging.getLogger('gemini_automation')
+    if parent.level == logging.NOTSET:
+        parent.setLevel(getattr(logging, level))
     return logger
+
+
+def write_items_csv(path: str, items: List[Dict[str, Any]]) -> str:
+    """Escribe elementos de la cola en el formato del CSV de entrada (reemplazo atómico)"""
+    columns = list(dict.fromkeys(key for item in items for key in item.keys()))
+    target = Path(path)
+    target.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = f"{target}.{os.getpid()}.tmp"
+    with open(tmp_path, 'w', newline='', encoding='utf-8') as f:
+        writer = csv.DictWriter(f, fieldnames=columns, restval='')
+        writer.writeheader()
+        writer.writerows({key: item.get(key) for key in columns} for item in items)
+    os.replace(tmp_path, target)
+    return str(target)
@@ -0,0 +1,329 @@
+"""
+Cola de trabajo persistente en SQLite con arrendamiento (leasing) de elementos
+Equivalente local a una cola de Orchestrator: varios procesos main.py en el
+mismo host pueden consumirla en paralelo sin procesar dos veces un elemento
+"""
+
+import json
+import os
+import socket
+import sqlite3
+import threading
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Any, Callable, Iterable, Iterator, List, Optional, Tuple
+
+# Estados de los elementos (nomenclatura de Orchestrator)
+NEW = 'New'
+IN_PROGRESS = 'InProgress'
+SUCCESSFUL = 'Successful'
+FAILED = 'Failed'
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS queue_items (
+    item_id TEXT PRIMARY KEY,
+    payload TEXT NOT NULL,
+    status TEXT NOT NULL DEFAULT 'New',
+    retry_count INTEGER NOT NULL DEFAULT 0,
+    priority INTEGER NOT NULL DEFAULT 1,
+    estimated_cost REAL NOT NULL DEFAULT 0,
+    runner_id TEXT,
+    lease_expires_at REAL,
+    last_error TEXT,
+    error_type TEXT,
+    result TEXT,
+    created_at TEXT NOT NULL,
+    updated_at TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_queue_items_status ON queue_items (status, lease_expires_at);
+CREATE INDEX IF NOT EXISTS idx_queue_items_dispatch ON queue_items (status, priority, estimated_cost DESC);
+"""
+
+
+def default_runner_id() -> str:
+    """Identificador único del proceso actual dentro del host"""
+    return f"{socket.gethostname()}-{os.getpid()}"
+
+
+class WorkQueue:
+    """Cola de trabajo durable respaldada por un archivo SQLite"""
+
+    def __init__(self, db_path: str, lease_timeout: float = 900, max_retries: int = 3):
+        self.db_path = db_path
+        self.lease_timeout = lease_timeout
+        self.max_retries = max_retries
+        Path(db_path).parent.mkdir(parents=True, exist_ok=True)
+        conn = self._connect()
+        try:
+            conn.execute('PRAGMA journal_mode=WAL')
+            self._migrate(conn)
+            conn.executescript(_SCHEMA)
+        finally:
+            conn.close()
+
+    @staticmethod
+    def _migrate(conn: sqlite3.Connection) -> None:
+        """Agrega las columnas nuevas a colas creadas por versiones anteriores"""
+        columns = {row['name'] for row in conn.execute("PRAGMA table_info(queue_items)")}
+        if columns and 'priority' not in columns:
+            conn.execute("ALTER TABLE queue_items ADD COLUMN priority INTEGER NOT NULL DEFAULT 1")
+            conn.execute("ALTER TABLE queue_items ADD COLUMN estimated_cost REAL NOT NULL DEFAULT 0")
+        if columns and 'error_type' not in columns:
+            conn.execute("ALTER TABLE queue_items ADD COLUMN error_type TEXT")
+
+    def _connect(self) -> sqlite3.Connection:
+        """Abre una conexión en modo autocommit (las transacciones son explícitas)"""
+        conn = sqlite3.connect(self.db_path, timeout=30, isolation_level=None)
+        conn.row_factory = sqlite3.Row
+        return conn
+
+    def import_items(self, items: Iterable[Dict[str, Any]],
+                     rank: Optional[Callable[[Dict[str, Any]], Tuple[int, float]]] = None) -> int:
+        """
+        Importa elementos a la cola ignorando los ids que ya existen
+
+        Args:
+            items: Filas de la cola (por ejemplo, las de prompts.csv)
+            rank: Función que devuelve (prioridad, costo estimado) para ordenar el despacho
+
+        Returns:
+            Número de elementos nuevos insertados
+        """
+        now = datetime.now().isoformat()
+        rows = [(str(item['id']), json.dumps(item, ensure_ascii=False),
+                 *(rank(item) if rank else (1, 0)), now, now)
+                for item in items if item.get('id')]
+        conn = self._connect()
+        try:
+            conn.execute('BEGIN IMMEDIATE')
+            before = conn.total_changes
+            conn.executemany(
+                "INSERT OR IGNORE INTO queue_items "
+                "(item_id, payload, priority, estimated_cost, created_at, updated_at) "
+                "VALUES (?, ?, ?, ?, ?, ?)", rows)
+            inserted = conn.total_changes - before
+            conn.execute('COMMIT')
+            return inserted
+        except Exception:
+            conn.execute('ROLLBACK')
+            raise
+        finally:
+            conn.close()
+
+    def _requeue_expired(self, conn: sqlite3.Connection, now: float) -> None:
+        """Devuelve a la cola los elementos cuyo arrendamiento venció (runner caído)"""
+        stamp = datetime.now().isoformat()
+        conn.execute(
+            "UPDATE queue_items SET status = CASE WHEN retry_count + 1 > ? THEN ? ELSE ? END, "
+            "retry_count = retry_count + 1, runner_id = NULL, lease_expires_at = NULL, "
+            "last_error = 'Arrendamiento vencido', error_type = 'LeaseExpired', updated_at = ? "
+            "WHERE status = ? AND lease_expires_at < ?",
+            (self.max_retries, FAILED, NEW, stamp, IN_PROGRESS, now))
+
+    def lease(self, runner_id: str, lease_timeout: Optional[float] = None) -> Optional[Dict[str, Any]]:
+        """
+        Arrienda el siguiente elemento disponible de forma atómica
+
+        Args:
+            runner_id: Identificador del runner que toma el elemento
+            lease_timeout: Segundos antes de que el elemento vuelva a la cola
+
+        Returns:
+            El elemento arrendado o None si la cola está vacía
+        """
+        now = time.time()
+        timeout = lease_timeout or self.lease_timeout
+        conn = self._connect()
+        try:
+            # BEGIN IMMEDIATE toma el lock de escritura: solo un runner selecciona a la vez
+            conn.execute('BEGIN IMMEDIATE')
+            self._requeue_expired(conn, now)
+            # Banda de prioridad primero y, dentro de ella, el elemento más costoso
+            row = conn.execute(
+                "SELECT item_id, payload FROM queue_items WHERE status = ? "
+                "ORDER BY priority, estimated_cost DESC, rowid LIMIT 1", (NEW,)).fetchone()
+            if row is None:
+                conn.execute('COMMIT')
+                return None
+            conn.execute(
+                "UPDATE queue_items SET status = ?, runner_id = ?, lease_expires_at = ?, updated_at = ? "
+                "WHERE item_id = ?",
+                (IN_PROGRESS, runner_id, now + timeout, datetime.now().isoformat(), row['item_id']))
+            conn.execute('COMMIT')
+            return json.loads(row['payload'])
+        except Exception:
+            conn.execute('ROLLBACK')
+            raise
+        finally:
+            conn.close()
+
+    def extend_lease(self, item_id: str, runner_id: str, lease_timeout: Optional[float] = None) -> bool:
+        """Renueva el arrendamiento de un elemento en curso; False si ya no pertenece al runner"""
+        expires = time.time() + (lease_timeout or self.lease_timeout)
+        return self._update_owned(
+            item_id, runner_id, "lease_expires_at = ?", (expires,))
+
+    def ack(self, item_id: str, runner_id: str, result: Any = None) -> bool:
+        """
+        Marca un elemento como procesado exitosamente
+
+        Returns:
+            False si el arrendamiento ya no pertenece al runner (otro lo retomó)
+        """
+        if hasattr(result, 'to_dict'):
+            result = result.to_dict()
+        payload = json.dumps(result, ensure_ascii=False) if result is not None else None
+        return self._update_owned(
+            item_id, runner_id,
+            "status = ?, result = ?, runner_id = NULL, lease_expires_at = NULL",
+            (SUCCESSFUL, payload))
+
+    def nack(self, item_id: str, runner_id: str, error: str = '', retry: bool = True,
+             error_type: str = '') -> bool:
+        """
+        Libera un elemento fallido: vuelve a la cola si quedan reintentos, si no pasa a Failed
+
+        Args:
+            item_id: Id del elemento
+            runner_id: Runner que lo tenía arrendado
+            error: Mensaje de error a registrar
+            retry: False para errores de negocio, que no se reintentan
+            error_type: Clasificación del error (classify_error)
+        """
+        status_expr = "CASE WHEN ? AND retry_count + 1 <= ? THEN ? ELSE ? END"
+        return self._update_owned(
+            item_id, runner_id,
+            f"status = {status_expr}, retry_count = retry_count + 1, last_error = ?, error_type = ?, "
+            "runner_id = NULL, lease_expires_at = NULL",
+            (int(retry), self.max_retries, NEW, FAILED, error, error_type or None))
+
+    def release(self, item_id: str, runner_id: str) -> bool:
+        """Devuelve un elemento arrendado a la cola sin contar un reintento (no se llegó a procesar)"""
+        return self._update_owned(item_id, runner_id,
+                                  "status = ?, runner_id = NULL, lease_expires_at = NULL", (NEW,))
+
+    def _update_owned(self, item_id: str, runner_id: str, assignments: str, params: tuple) -> bool:
+        """Actualiza un elemento solo si sigue arrendado por el runner indicado"""
+        conn = self._connect()
+        try:
+            cursor = conn.execute(
+                f"UPDATE queue_items SET {assignments}, updated_at = ? "
+                "WHERE item_id = ? AND runner_id = ? AND status = ?",
+                params + (datetime.now().isoformat(), str(item_id), runner_id, IN_PROGRESS))
+            return cursor.rowcount == 1
+        finally:
+            conn.close()
+
+    def status(self, item_id: str) -> Optional[str]:
+        """Estado actual de un elemento (None si no está en la cola)"""
+        conn = self._connect()
+        try:
+            row = conn.execute("SELECT status FROM queue_items WHERE item_id = ?", (str(item_id),)).fetchone()
+            return row['status'] if row else None
+        finally:
+            conn.close()
+
+    def counts(self) -> Dict[str, int]:
+        """Número de elementos por estado"""
+        conn = self._connect()
+        try:
+            counts = {NEW: 0, IN_PROGRESS: 0, SUCCESSFUL: 0, FAILED: 0}
+            for row in conn.execute("SELECT status, COUNT(*) AS n FROM queue_items GROUP BY status"):
+                counts[row['status']] = row['n']
+            return counts
+        finally:
+            conn.close()
+
+    def is_drained(self) -> bool:
+        """True cuando no quedan elementos nuevos ni en curso"""
+        counts = self.counts()
+        return counts[NEW] == 0 and counts[IN_PROGRESS] == 0
+
+    def retries(self) -> int:
+        """Reintentos realizados: los fallos previos de cada elemento sin contar el fallo final"""
+        conn = self._connect()
+        try:
+            return conn.execute(
+                "SELECT COALESCE(SUM(MAX(retry_count - (status = ?), 0)), 0) FROM queue_items",
+                (FAILED,)).fetchone()[0]
+        finally:
+            conn.close()
+
+    def results(self) -> Iterator[Dict[str, Any]]:
+        """Itera los resultados guardados de los elementos exitosos, en orden de importación"""
+        conn = self._connect()
+        try:
+            for row in conn.execute(
+                    "SELECT result FROM queue_items WHERE status = ? AND result IS NOT NULL "
+                    "ORDER BY rowid", (SUCCESSFUL,)):
+                yield json.loads(row['result'])
+        finally:
+            conn.close()
+
+    def failed_items(self) -> List[Dict[str, Any]]:
+        """Elementos en estado Failed con su último error"""
+        conn = self._connect()
+        try:
+            rows = conn.execute(
+                "SELECT payload, retry_count, last_error, error_type FROM queue_items WHERE status = ? "
+                "ORDER BY rowid", (FAILED,)).fetchall()
+        finally:
+            conn.close()
+        return [dict(json.loads(row['payload']), retry_count=row['retry_count'],
+                     error_message=row['last_error'], error_type=row['error_type'] or '') for row in rows]
+
+
+class LeaseHeartbeat:
+    """
+    Renueva en segundo plano los arrendamientos de los elementos en vuelo del runner,
+    así un elemento lento (o esperando al circuit breaker) no vence mientras se procesa
+    """
+
+    def __init__(self, queue: WorkQueue, runner_id: str, interval: Optional[float] = None):
+        self.queue = queue
+        self.runner_id = runner_id
+        # Tres renovaciones por período: una que falle no alcanza a vencer el arrendamiento
+        self.interval = interval or queue.lease_timeout / 3
+        self._items = set()
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name='lease-heartbeat', daemon=True)
+
+    def start(self) -> 'LeaseHeartbeat':
+        self._thread.start()
+        return self
+
+    def track(self, item_id: str) -> None:
+        with self._lock:
+            self._items.add(str(item_id))
+
+    def untrack(self, item_id: str) -> None:
+        with self._lock:
+            self._items.discard(str(item_id))
+
+    def beat(self) -> None:
+        """Renueva todos los elementos en vuelo; los que ya no son del runner dejan de seguirse"""
+        with self._lock:
+            items = list(self._items)
+        for item_id in items:
+            if not self.queue.extend_lease(item_id, self.runner_id):
+                self.untrack(item_id)
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            self.beat()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread.is_alive():
+            self._thread.join()
+
+
+def from_config(config: Dict[str, Any]) -> WorkQueue:
+    """Crea la cola de trabajo a partir de la sección 'queue' de la configuración"""
+    queue_config = config.get('queue', {})
+    return WorkQueue(
+        queue_config.get('sqlite_path', 'data/queue/work_queue.db'),
+        lease_timeout=queue_config.get('lease_timeout_seconds', 900),
+        max_retries=config.get('processing', {}).get('max_retries', 3))
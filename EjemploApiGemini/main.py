@@ -3,23 +3,441 @@ Punto de entrada principal para la automatización de generación de prompts con
 Basado en el REFramework de UiPath
 
 Uso:
-    python main.py
+    python main.py [--quiet | --verbose] [--record | --replay [--replay-pace fast]] [--profile] [--retry-failed [--only SystemException]]
+                   [--deadline HH:MM | --max-duration 2h] [--input archivo.csv] [--watch [carpeta]]
 
 Variables de entorno requeridas:
     GEMINI_API_KEY: Clave API de Google Gemini
 """
 
+import argparse
+import signal
 import sys
+import threading
+import time
 import logging
-from datetime import datetime
-from typing import List, Dict, Any
+from contextlib import nullcontext
+from datetime import datetime, timedelta
+from typing import List, Dict, Any, Optional, Tuple
 
 # Importar módulos del framework
-from framework import init, get_transaction, process, handle_error, end
+from framework import (init, get_transaction, process, handle_error, end, condense, daemon, deadline,
+                       results_store, scheduler, tokens, tracing, work_queue)
+from framework.progress import ProgressReporter
+from framework.stats import RunStats
+from framework.utils import classify_error
 
 
-def main():
+def process_item(item: Dict[str, Any], config: Dict[str, Any], label: str,
+                 progress: Optional[ProgressReporter] = None,
+                 queued_at: Optional[float] = None, log_failures: bool = True) -> Tuple[str, Any, float]:
+    """
+    Ejecuta las fases de obtención y procesamiento para un elemento de la cola
+
+    Args:
+        queued_at: Momento (perf_counter) en que el elemento entró a la cola, para el span de espera
+        log_failures: Registra los fallos en results_failed.csv; la cola SQLite lo hace solo con el fallo final
+
+    Returns:
+        Tupla con (status, resultado o mensaje de error, duración en segundos)
+    """
+    profiler = tracing.get_profiler()
+    with tracing.get_tracer().transaction(item.get('id'), queued_at), \
+            (profiler.worker() if profiler else nullcontext()):
+        return _run_item(item, config, label, progress or ProgressReporter(verbose=True), log_failures)
+
+
+def _run_item(item: Dict[str, Any], config: Dict[str, Any], label: str,
+              progress: ProgressReporter, log_failures: bool = True) -> Tuple[str, Any, float]:
+    progress.item_started()
+    started = time.perf_counter()
+    try:
+        progress.message(f"🔄 Procesando elemento {label}: {item.get('id', 'unknown')}")
+        with tracing.span('get_transaction'):
+            transaction = get_transaction.run(item)
+        status, result = process.run(transaction, config)
+
+        if status == 'Success':
+            progress.message(f"✅ Elemento {transaction['id']} procesado exitosamente")
+        else:
+            progress.message(f"❌ Elemento {transaction['id']} falló: {status}")
+            if log_failures:
+                handle_error.log_failed_result(item, status, result, config)
+        return status, result, time.perf_counter() - started
+
+    except Exception as e:
+        progress.message(f"💥 Error en elemento {item.get('id', 'unknown')}: {e}")
+        if log_failures:
+            handle_error.run(item, e, config)
+        return classify_error(e), str(e), time.perf_counter() - started
+
+
+def preflight_error(preflight: Optional[tokens.PromptPreflight], item: Dict[str, Any],
+                    config: Dict[str, Any]) -> Optional[tokens.PromptTooLargeError]:
+    """
+    Error si el prompt del elemento supera max_prompt_tokens (se verifica antes de despachar)
+
+    Los elementos cuyo contexto se va a resumir no se verifican: su prompt final es más corto
+    """
+    if preflight is None or condense.applies(item, config):
+        return None
+    try:
+        preflight.check(process.build_prompt(item), item)
+    except tokens.PromptTooLargeError as e:
+        return e
+    return None
+
+
+def run_csv_queue(config: Dict[str, Any], logger: logging.Logger, options: Dict[str, Any],
+                  queue: Optional[List[Dict[str, Any]]] = None, merge_results: bool = False,
+                  shutdown: Optional[daemon.Shutdown] = None) -> Optional[Tuple[int, int, int]]:
+    """
+    Procesa la cola leyendo el CSV de entrada (un único proceso, uno o varios workers)
+
+    Args:
+        queue: Elementos ya cargados (por ejemplo, los fallidos a reintentar); por defecto el archivo de entrada
+        merge_results: Combina los exitosos con el archivo de resultados existente en lugar de reemplazarlo
+        shutdown: Pedido de apagado del modo daemon; al activarse lo no despachado queda en shutdown.deferred
+    """
+    if queue is None:
+        queue = init.load_queue(config['paths']['input_data'], config)
+
+    if not queue:
+        return None
+
+    start_time = datetime.now()
+    # Los resultados se escriben a medida que llegan; el reporte sale de las estadísticas
+    stats = RunStats()
+    writer = end.ResultWriter(config, stats, merge=merge_results)
+    store = results_store.from_config(config)
+    if store:
+        store.start_run()
+    total = len(queue)
+    workers = config.get('processing', {}).get('workers', 1)
+    calibration = scheduler.CalibrationLog(config, logger)
+    print(f"📋 Procesando {total} elementos con {workers} worker(s)...")
+    progress = ProgressReporter(total, workers=workers, **options).start()
+    # Todos los elementos están en cola desde el inicio del despacho
+    queued_at = time.perf_counter()
+    budget = tokens.get_budget(config)
+    preflight = process.create_preflight(config)
+    guard = deadline.active_deadline()
+    # Posición de cada elemento en la entrada: el planificador despacha en otro orden
+    sequence = {id(item): position for position, item in enumerate(queue, 1)}
+
+    def admitted(entries):
+        """
+        Corta el despacho al agotarse el presupuesto de tokens, deja para la próxima
+        ventana lo que no alcanza a terminar antes de la hora límite y rechaza prompts
+        demasiado grandes
+        """
+        for position, entry in enumerate(entries):
+            if shutdown and shutdown.requested:
+                # Lo que sigue en `entries` tampoco se despacha: vuelve entero a la entrada
+                shutdown.defer([item for _, (item, _) in [entry, *entries]])
+                print(f"🛑 Apagado pedido: {len(shutdown.deferred)} elementos sin despachar")
+                return
+            if budget and budget.exhausted:
+                budget.skip(total - position)
+                print(f"🪙 Presupuesto de tokens agotado ({budget.used}/{budget.limit}): "
+                      f"{total - position} elementos sin despachar")
+                return
+            _, (item, estimated_cost) = entry
+            # El orden es del más largo al más corto: uno que no entra no descarta a los siguientes
+            if guard and not guard.allows(estimated_cost):
+                guard.skip(item)
+                writer.skip(sequence[id(item)])
+                continue
+            error = preflight_error(preflight, item, config)
+            if error:
+                handle_error.log_error(item, error, config)
+                writer.skip(sequence[id(item)])
+                stats.add_failure(classify_error(error))
+                progress.item_rejected()
+                if store:
+                    store.add_failure(item, classify_error(error), str(error))
+                continue
+            yield entry
+
+    def handle(entry):
+        index, (item, _) = entry
+        return process_item(item, config, f"{index}/{total}", progress, queued_at)
+
+    def on_done(entry, outcome):
+        _, (item, estimated_cost) = entry
+        status, result, seconds = outcome
+        calibration.record(item, estimated_cost, seconds, status)
+        progress.item_finished(status, seconds)
+        if guard:
+            guard.record(estimated_cost, seconds)
+        response_hash = None
+        if status == 'Success':
+            response_hash = writer.write(result, sequence[id(item)])
+        else:
+            writer.skip(sequence[id(item)])
+            stats.add_failure(status)
+        if store and status == 'Success':
+            store.add_result(result, response_hash)
+        elif store:
+            store.add_failure(item, status, result)
+
+    try:
+        scheduler.dispatch(admitted(enumerate(scheduler.schedule(queue, config), 1)), handle, on_done, workers)
+    finally:
+        progress.close()
+        writer.close()
+        if store:
+            store.flush()
+
+    if guard and guard.skipped:
+        path = guard.write_unprocessed()
+        print(f"⏰ Hora límite {guard.deadline_at:%H:%M}: {guard.skipped} elementos sin despachar guardados en {path}")
+
+    print("🏁 Finalizando proceso...")
+    report = end.run(start_time=start_time, stats=stats, config=config)
+    if store:
+        store.finish_run(report)
+    return total, stats.successful, stats.failed
+
+
+def run_work_queue(config: Dict[str, Any], logger: logging.Logger,
+                   options: Dict[str, Any]) -> Optional[Tuple[int, int, int]]:
+    """
+    Procesa la cola SQLite arrendando elementos; varios procesos pueden ejecutarla a la vez.
+    El último runner en vaciar la cola escribe los resultados y el reporte consolidados.
+    """
+    queue = work_queue.from_config(config)
+    imported = queue.import_items(init.load_queue(config['paths']['input_data'], config),
+                                  rank=lambda item: scheduler.rank(item, config))
+    runner_id = work_queue.default_runner_id()
+    workers = config.get('processing', {}).get('workers', 1)
+    calibration = scheduler.CalibrationLog(config, logger)
+    print(f"📥 Cola SQLite: {imported} elementos nuevos importados (runner {runner_id}, {workers} worker(s))")
+
+    start_time = datetime.now()
+    processed = 0
+    # Otros runners consumen la misma cola: el total pendiente es solo una estimación
+    counts = queue.counts()
+    progress = ProgressReporter(counts[work_queue.NEW] + counts[work_queue.IN_PROGRESS], estimated=True,
+                                workers=workers, **options).start()
+
+    budget = tokens.get_budget(config)
+    preflight = process.create_preflight(config)
+    guard = deadline.active_deadline()
+    # Cada runner registra su propia ejecución en el almacén de resultados
+    store = results_store.from_config(config)
+    if store:
+        store.start_run()
+    heartbeat = work_queue.LeaseHeartbeat(queue, runner_id).start()
+
+    def stop_for_deadline():
+        # Lo pendiente sigue en la cola SQLite para la próxima ventana
+        guard.skip(count=queue.counts()[work_queue.NEW])
+        print(f"⏰ Hora límite {guard.deadline_at:%H:%M}: se deja de arrendar; "
+              f"{guard.skipped} elementos quedan pendientes en la cola")
+
+    def leased_items():
+        nonlocal processed
+        while True:
+            if guard and guard.expired:
+                return stop_for_deadline()
+            # Sin presupuesto se deja de arrendar: lo pendiente queda en la cola para otra ejecución
+            if budget and budget.exhausted:
+                budget.skip(queue.counts()[work_queue.NEW])
+                print(f"🪙 Presupuesto de tokens agotado ({budget.used}/{budget.limit}): "
+                      f"{budget.skipped} elementos quedan pendientes en la cola")
+                return
+            item = queue.lease(runner_id)
+            if item is None:
+                return
+            # Se arrienda por rango (el más largo primero): si este no alcanza, se devuelve y se para
+            if guard and not guard.allows(scheduler.estimate_cost(item, config)):
+                queue.release(item['id'], runner_id)
+                return stop_for_deadline()
+            error = preflight_error(preflight, item, config)
+            if error:
+                queue.nack(item['id'], runner_id, str(error), retry=False, error_type=classify_error(error))
+                progress.item_rejected()
+                if store:
+                    store.add_failure(item, classify_error(error), str(error))
+                continue
+            processed += 1
+            heartbeat.track(item['id'])
+            yield processed, item, time.perf_counter()
+
+    def handle(entry):
+        index, item, leased_at = entry
+        return process_item(item, config, f"#{index}", progress, leased_at, log_failures=False)
+
+    def on_done(entry, outcome):
+        _, item, _ = entry
+        status, result, seconds = outcome
+        heartbeat.untrack(item['id'])
+        if status == 'Success':
+            owned = queue.ack(item['id'], runner_id, result)
+        else:
+            # Los errores de negocio no se reintentan, los de sistema vuelven a la cola
+            if status == 'SystemException':
+                tracing.get_tracer().instant('retry', id=item['id'], error=str(result)[:200])
+            owned = queue.nack(item['id'], runner_id, str(result), retry=status == 'SystemException',
+                               error_type=status)
+        if not owned:
+            # Otro runner retomó el elemento: su resultado es el que vale
+            logger.warning("Arrendamiento perdido para el elemento %s; se descarta el resultado (%s)",
+                           item['id'], status)
+            status = 'LeaseLost'
+        estimated_cost = scheduler.estimate_cost(item, config)
+        calibration.record(item, estimated_cost, seconds, status)
+        progress.item_finished(status, seconds)
+        if guard:
+            guard.record(estimated_cost, seconds)
+        if store and status == 'Success':
+            store.add_result(result)
+        # Un fallo que vuelve a la cola todavía puede terminar bien: solo se registra el definitivo
+        elif owned and status != 'Success' and queue.status(item['id']) == work_queue.FAILED:
+            handle_error.log_failed_result(item, status, result, config)
+            if store:
+                store.add_failure(item, status, result)
+
+    try:
+        scheduler.dispatch(leased_items(), handle, on_done, workers)
+    finally:
+        heartbeat.stop()
+        progress.close()
+        if store:
+            store.flush()
+
+    if not processed and not queue.counts()[work_queue.SUCCESSFUL]:
+        if store:
+            store.finish_run()
+        return None
+
+    # Al cortar por hora límite se consolida lo procesado hasta ahora
+    if queue.is_drained() or (guard and guard.stopped):
+        print("🏁 Cola vacía, consolidando resultados..." if queue.is_drained() else
+              "🏁 Consolidando los resultados procesados antes de la hora límite...")
+        stats = RunStats()
+        stats.add_retry(queue.retries())
+        report = end.run(results=queue.results(), failed_items=queue.failed_items(), start_time=start_time,
+                         stats=stats, config=config)
+        if store:
+            store.finish_run(report)
+        return stats.total, stats.successful, stats.failed
+
+    print("⏳ Otros runners siguen procesando; ellos consolidarán los resultados")
+    if store:
+        store.finish_run()
+    counts = queue.counts()
+    return sum(counts.values()), counts[work_queue.SUCCESSFUL], counts[work_queue.FAILED]
+
+
+def run_retry_failed(config: Dict[str, Any], logger: logging.Logger, options: Dict[str, Any],
+                     only: Optional[List[str]] = None) -> Optional[Tuple[int, int, int]]:
+    """Reprocesa solo las filas de results_failed.csv y compacta ese archivo al terminar"""
+    queue = init.load_failed_queue(config, only)
+    if not queue:
+        return None
+
+    print(f"🔁 Reintentando {len(queue)} elementos fallidos" + (f" ({', '.join(only)})" if only else ""))
+    summary = run_csv_queue(config, logger, options, queue=queue, merge_results=True)
+    before, after = handle_error.compact_failed(config)
+    print(f"🧹 Archivo de fallidos compactado: {before} → {after} filas")
+    return summary
+
+
+def run_daemon(config: Dict[str, Any], logger: logging.Logger, options: Dict[str, Any],
+               directory: Optional[str] = None,
+               shutdown: Optional[daemon.Shutdown] = None) -> Optional[Tuple[int, int, int]]:
+    """
+    Modo daemon: procesa cada archivo que llega a la carpeta de entrada hasta SIGTERM/SIGINT
+
+    Un solo GeminiProcessor atiende todos los lotes. Cada archivo tiene sus propios
+    resultados, fallidos y reporte en watch.output_dir/<archivo>/; al pedir el apagado
+    termina lo que está en vuelo y devuelve lo no despachado a la carpeta de entrada
+
+    Returns:
+        Totales acumulados (total, exitosos, fallidos) o None si no llegó ningún archivo
+    """
+    spool = daemon.spool_from_config(config, directory)
+    shutdown = shutdown or daemon.Shutdown()
+    previous = {}
+    # Las señales solo se pueden instalar desde el hilo principal
+    if threading.current_thread() is threading.main_thread():
+        previous = {sig: signal.signal(sig, shutdown.request) for sig in (signal.SIGTERM, signal.SIGINT)}
+    process.warm_up(config)
+    print(f"👀 Esperando archivos en {spool.directory} (Ctrl+C o SIGTERM para terminar)...")
+    totals = None
+    try:
+        while not shutdown.requested:
+            claimed = spool.claim()
+            if claimed is None:
+                shutdown.wait(spool.poll_seconds)
+                continue
+            batch_config = spool.batch_config(config, claimed)
+            # Presupuesto y hora límite son por lote; cachés, conexiones y circuit breaker se comparten
+            tokens.reset()
+            deadline.reset()
+            process.warm_up(batch_config)
+            print(f"\n📥 {claimed.name}")
+            try:
+                summary = run_csv_queue(batch_config, logger, options,
+                                        queue=init.load_queue(str(claimed), batch_config), shutdown=shutdown)
+            except Exception as e:
+                logger.error("Error procesando %s: %s", claimed.name, e, exc_info=True)
+                print(f"💥 {claimed.name}: {e}")
+                spool.finish(claimed, failed=True)
+                continue
+            if shutdown.deferred:
+                print(f"↩️  Pendientes devueltos a la entrada: {spool.requeue(claimed, shutdown.deferred)}")
+            spool.finish(claimed)
+            if summary:
+                totals = tuple(a + b for a, b in zip(totals or (0, 0, 0), summary))
+    finally:
+        process.cool_down()
+        for sig, handler in previous.items():
+            signal.signal(sig, handler)
+    print("🛑 Daemon detenido")
+    return totals
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    """Interpreta los argumentos de línea de comandos"""
+    parser = argparse.ArgumentParser(add_help=False)
+    parser.add_argument('--quiet', '-q', action='store_true',
+                        help='Modo throughput: solo una línea de progreso compacta cada pocos segundos')
+    parser.add_argument('--verbose', '-v', action='store_true',
+                        help='Imprime además una línea por elemento')
+    parser.add_argument('--retry-failed', action='store_true',
+                        help='Procesa solo las filas de results_failed.csv y combina los exitosos con los resultados')
+    parser.add_argument('--only', action='append', choices=['SystemException', 'BusinessException'],
+                        help='Con --retry-failed, reintenta solo este tipo de error (se puede repetir)')
+    parser.add_argument('--profile', action='store_true',
+                        help='Guarda un volcado cProfile y spans muestreados en formato Chrome trace')
+    cassette_mode = parser.add_mutually_exclusive_group()
+    cassette_mode.add_argument('--record', dest='cassette_mode', action='store_const', const='record',
+                               help='Graba cada respuesta de Gemini (chunks y tiempos) en el almacén de cassettes')
+    cassette_mode.add_argument('--replay', dest='cassette_mode', action='store_const', const='replay',
+                               help='Reproduce las respuestas grabadas sin llamar a la API')
+    parser.add_argument('--replay-pace', choices=['original', 'fast'],
+                        help='Ritmo del replay: tiempos originales o lo más rápido posible')
+    window = parser.add_mutually_exclusive_group()
+    window.add_argument('--deadline', type=deadline.parse_deadline,
+                        help='Hora límite (HH:MM o fecha ISO): no despacha lo que no alcanza a terminar')
+    window.add_argument('--max-duration', type=deadline.parse_duration,
+                        help='Duración máxima de la ejecución (90m, 2h, 1h30m o segundos)')
+    parser.add_argument('--input', help='CSV de entrada en lugar de paths.input_data (por ejemplo, unprocessed.csv)')
+    parser.add_argument('--watch', nargs='?', const='', metavar='CARPETA',
+                        help='Modo daemon: procesa los archivos que llegan a la carpeta (por defecto watch.directory)')
+    args = parser.parse_args(argv)
+    if args.watch is not None and (args.deadline or args.max_duration):
+        # El daemon reinicia la ventana en cada lote: un límite global no tendría efecto
+        parser.error('--watch no admite --deadline ni --max-duration')
+    return args
+
+
+def main(argv: Optional[List[str]] = None):
     """Función principal de la automatización"""
+    args = parse_args(argv)
     try:
         print("🚀 Iniciando automatización de generación de prompts con Gemini...")
         
@@ -27,39 +445,54 @@ def main():
             sys.exit("❌ Faltan dependencias requeridas. Instala con: pip install -r requirements.txt")
         
         config = init.load_config()
+        if args.cassette_mode or args.replay_pace:
+            cassette_config = config.setdefault('cassettes', {})
+            cassette_config['mode'] = args.cassette_mode or cassette_config.get('mode')
+            cassette_config['pace'] = args.replay_pace or cassette_config.get('pace', 'original')
+        if args.input:
+            config['paths']['input_data'] = args.input
+        deadline.reset()
+        if args.deadline or args.max_duration:
+            deadline.configure(config, args.deadline or datetime.now() + timedelta(seconds=args.max_duration))
         logger = init.setup_logging(config)
-        queue = init.load_queue(config['paths']['input_data'])
-        
-        if not queue:
-            return print("⚠️  No hay elementos para procesar en la cola")
+        health_report = init.check_api_health(config)
+        if health_report:
+            for probe in health_report['models']:
+                detail = (f"conexión {probe['connect_seconds']}s, primer chunk {probe['first_chunk_seconds']}s"
+                          if probe['healthy'] else f"{probe['error_type']}: {probe['error']}")
+                print(f"{'✅' if probe['healthy'] else '❌'} {probe['model']}: {detail}")
+            print(f"🩺 Modelo: {health_report['selected_model'] or 'ninguno sano'}")
+        log_config = config.get('logging', {})
+        progress_config = dict(config.get('progress', {}))
+        quiet = args.quiet or log_config.get('quiet', False)
+        if quiet:
+            progress_config['line_interval_seconds'] = log_config.get('summary_interval_seconds', 10)
+        options = {'config': progress_config, 'verbose': args.verbose and not quiet,
+                   'line_mode': True if quiet else None}
 
-        start_time = datetime.now()
-        successful_results, failed_items = [], []
-        print(f"📋 Procesando {len(queue)} elementos...")
-        
-        for i, item in enumerate(queue, 1):
-            try:
-                print(f"🔄 Procesando elemento {i}/{len(queue)}: {item.get('id', 'unknown')}")
-                transaction = get_transaction.run(item)
-                status, result = process.run(transaction, config)
-                
-                if status == 'Success':
-                    successful_results.append(result)
-                    print(f"✅ Elemento {transaction['id']} procesado exitosamente")
-                else:
-                    failed_items.append(item)
-                    print(f"❌ Elemento {transaction['id']} falló: {status}")
-                    
-            except Exception as e:
-                failed_items.append(item)
-                print(f"💥 Error en elemento {item.get('id', 'unknown')}: {e}")
-                handle_error.run(item, e)
+        if args.profile:
+            tracing.configure(config)
+            tracing.get_profiler().start()
+        try:
+            if args.watch is not None:
+                summary = run_daemon(config, logger, options, args.watch or None)
+            elif args.retry_failed:
+                summary = run_retry_failed(config, logger, options, args.only)
+            elif config.get('queue', {}).get('backend', 'csv') == 'sqlite':
+                summary = run_work_queue(config, logger, options)
+            else:
+                summary = run_csv_queue(config, logger, options)
+        finally:
+            if args.profile:
+                tracing.get_profiler().stop()
+                for kind, path in tracing.finish(config).items():
+                    print(f"🔬 Perfil ({kind}): {path}")
 
-        print("🏁 Finalizando proceso...")
-        end.run(results=successful_results, failed_items=failed_items, start_time=start_time)
+        if summary is None:
+            return print("⚠️  No hay elementos para procesar en la cola")
         
         # Resumen final
-        total, success, failed = len(queue), len(successful_results), len(failed_items)
+        total, success, failed = summary
         rate = (success / total * 100) if total > 0 else 0
         
         print(f"\n📊 RESUMEN: {success}/{total} exitosos ({rate:.1f}%)")
@@ -70,8 +503,10 @@ def main():
         sys.exit(1)
     except Exception as e:
         print(f"💥 Error crítico: {e}")
-        logging.error(f"Error crítico: {e}")
+        logging.getLogger('gemini_automation').error("Error crítico: %s", e, exc_info=True)
         sys.exit(1)
+    finally:
+        init.shutdown_logging()
 
 
 def show_usage():
@@ -80,7 +515,22 @@ def show_usage():
 🤖 Automatización de Generación de Prompts con Gemini
 
 Uso:
-    python main.py
+    python main.py [--quiet | --verbose] [--record | --replay [--replay-pace fast]] [--profile] [--retry-failed [--only SystemException]]
+                   [--deadline HH:MM | --max-duration 2h] [--input archivo.csv] [--watch [carpeta]]
+
+Opciones:
+    --quiet, -q     Modo throughput: solo una línea de progreso compacta cada pocos segundos
+    --verbose, -v   Imprime además una línea por elemento
+    --record        Graba las respuestas de Gemini en data/cassettes/
+    --replay        Reproduce las respuestas grabadas sin red ni cuota
+    --replay-pace   original (tiempos grabados) o fast (sin esperas)
+    --retry-failed  Reprocesa solo results_failed.csv, combina los exitosos y compacta los fallidos
+    --only TIPO     Con --retry-failed: SystemException o BusinessException
+    --profile       Volcado cProfile (profile.pstats) y spans muestreados (trace.json, Perfetto)
+    --deadline      Hora límite (HH:MM o ISO): no despacha lo que no termina a tiempo
+    --max-duration  Duración máxima (90m, 2h, 1h30m); lo no despachado va a unprocessed.csv
+    --input         CSV de entrada alternativo (por ejemplo, data/output/unprocessed.csv)
+    --watch [DIR]   Modo daemon: procesa cada archivo que llega a la carpeta hasta SIGTERM/Ctrl+C
 
 Configuración requerida:
     1. Establecer variable de entorno GEMINI_API_KEY
@@ -0,0 +1,72 @@
+#!/usr/bin/env python3
+"""
+Consulta y exportación del almacén de resultados SQLite (results_store)
+
+Uso:
+    python results_db.py lookup 4711                       # historial de una transacción
+    python results_db.py runs                              # ejecuciones registradas
+    python results_db.py export csv salida.csv --status failed --since 2024-05-01
+    python results_db.py export excel --run-id 20240501T060000-1234
+"""
+
+import argparse
+import sys
+
+from framework import blobs
+from framework.init import load_config
+from framework.results_store import DEFAULT_RESULTS_STORE_CONFIG, ResultsStore
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Almacén de resultados SQLite")
+    parser.add_argument('--db', help='Archivo SQLite (por defecto, results_store.path de settings.json)')
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    lookup = commands.add_parser('lookup', help='Historial de una transacción, del más reciente al más antiguo')
+    lookup.add_argument('transaction_id')
+
+    commands.add_parser('runs', help='Ejecuciones registradas con sus totales')
+
+    export = commands.add_parser('export', help='Exporta filas a CSV o Excel')
+    export.add_argument('format', choices=['csv', 'excel'])
+    export.add_argument('output', nargs='?', default='data/output/results_export.csv',
+                        help='Archivo CSV de salida (excel usa data/output/resultados_completos.xlsx)')
+    export.add_argument('--run-id', help='Solo esta ejecución (excel: por defecto, la última)')
+    export.add_argument('--status', choices=['completed', 'failed'])
+    export.add_argument('--model')
+    export.add_argument('--since', help='Fecha ISO inicial (inclusive)')
+    export.add_argument('--until', help='Fecha ISO final (exclusive)')
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    config = load_config()
+    db_path = args.db or config.get('results_store', {}).get('path', DEFAULT_RESULTS_STORE_CONFIG['path'])
+    store = ResultsStore(db_path, blobs=blobs.reader_from_config(config))
+
+    if args.command == 'lookup':
+        rows = store.lookup(args.transaction_id)
+        if not rows:
+            sys.exit(f"❌ No hay resultados para la transacción {args.transaction_id}")
+        for row in rows:
+            detail = row['model_used'] if row['status'] == 'completed' else f"{row['error_type']}: {row['error_message']}"
+            print(f"\n🕒 {row['processed_at']} · ejecución {row['run_id']} · {row['status']} · {detail}")
+            print(store.response(row) if row['status'] == 'completed' else '')
+
+    elif args.command == 'runs':
+        for run in store.runs():
+            print(f"{run['run_id']}  {run['started_at']}  ✅ {run['completed']}  ❌ {run['failed']}")
+
+    elif args.format == 'csv':
+        count = store.export_csv(args.output, run_id=args.run_id, status=args.status, model=args.model,
+                                 since=args.since, until=args.until)
+        print(f"✅ {count} filas exportadas a {args.output}")
+
+    else:
+        from csv_to_excel import create_excel_report
+        create_excel_report(db_path, args.run_id)
+
+
+if __name__ == "__main__":
+    main()
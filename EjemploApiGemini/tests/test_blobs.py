@@ -0,0 +1,111 @@
+"""
+Pruebas unitarias para el almacén de respuestas direccionado por contenido
+"""
+
+import csv
+import gzip
+import logging
+
+import pytest
+
+import main
+from framework import blobs
+from framework.end import ResultWriter
+from framework.models import Result
+from framework.results_store import ResultsStore
+
+
+@pytest.fixture(autouse=True)
+def clean_store():
+    blobs.reset()
+    yield
+    blobs.reset()
+
+
+@pytest.fixture
+def store(tmp_path):
+    return blobs.BlobStore(str(tmp_path / 'blobs'))
+
+
+class TestBlobStore:
+    """Un blob comprimido por contenido, repartido en subdirectorios"""
+
+    def test_same_content_is_stored_once(self, store):
+        text = 'Flujo de facturación ' * 500
+        digest = store.put(text)
+
+        assert store.put(text) == digest == blobs.content_hash(text)
+        path = store.path_for(digest)
+        assert path.relative_to(store.root).parts[:2] == (digest[:2], digest[2:4])
+        assert path.stat().st_size < len(text) / 10
+        assert gzip.decompress(path.read_bytes()).decode('utf-8') == text
+        assert (store.written, store.deduplicated) == (1, 1)
+        assert store.get(digest) == text
+
+    def test_missing_blob_raises(self, store):
+        with pytest.raises(FileNotFoundError):
+            store.get('0' * 64)
+
+    def test_zstd_requires_the_optional_package(self, tmp_path, monkeypatch):
+        monkeypatch.setattr(blobs, 'zstandard', None)
+        with pytest.raises(ImportError, match='zstandard'):
+            blobs.BlobStore(str(tmp_path), compression='zstd')
+
+
+class TestOutputs:
+    """results.csv y el almacén SQLite guardan hash y longitud"""
+
+    def test_outputs_carry_hash_and_length(self, tmp_path):
+        config = {'blobs': {'enabled': True, 'path': str(tmp_path / 'blobs')},
+                  'paths': {'output_data': str(tmp_path / 'results.csv')}}
+        result = Result('1', 'Prompt', 'x' * 40000, model_used='gemini-2.5-pro')
+
+        writer = ResultWriter(config)
+        writer.write(result)
+        writer.close()
+        with open(tmp_path / 'results.csv', encoding='utf-8', newline='') as f:
+            row = next(csv.DictReader(f))
+        assert 'generated_response' not in row
+        assert row['response_length'] == '40000'
+        assert blobs.active_store().get(row['response_hash']) == 'x' * 40000
+
+        db = ResultsStore(str(tmp_path / 'results.db'), batch_size=1, blobs=blobs.get_store(config))
+        db.start_run('run-1')
+        db.add_result(result)
+        stored = db.lookup('1')[0]
+        assert stored['generated_response'] is None
+        assert stored['response_hash'] == row['response_hash']
+        assert db.response(stored) == 'x' * 40000
+        assert blobs.active_store().written == 1
+
+    def test_csv_run_with_results_store_puts_each_response_once(self, tmp_path, monkeypatch):
+        def fake_run(transaction, config):
+            return 'Success', Result(transaction['id'], transaction['prompt'], f"respuesta {transaction['id']}")
+        monkeypatch.setattr(main.process, 'run', fake_run)
+        config = {'processing': {'workers': 2}, 'scheduler': {'calibration_file': None},
+                  'blobs': {'enabled': True, 'path': str(tmp_path / 'blobs')},
+                  'results_store': {'enabled': True, 'path': str(tmp_path / 'results.db')},
+                  'paths': {'input_data': str(tmp_path / 'prompts.csv'),
+                            'output_data': str(tmp_path / 'results.csv'), 'logs': str(tmp_path)}}
+        queue = [{'id': str(i), 'prompt': f'Prompt {i}'} for i in range(1, 4)]
+
+        main.run_csv_queue(config, logging.getLogger('test'), {'line_mode': True}, queue=queue)
+
+        summary = blobs.active_store().summary()
+        assert (summary['written'], summary['deduplicated']) == (3, 0)
+
+    def test_store_without_blob_writes_still_exports_full_responses(self, tmp_path):
+        from framework import results_store
+        config = {'blobs': {'enabled': True, 'path': str(tmp_path / 'blobs')},
+                  'results_store': {'enabled': True, 'path': str(tmp_path / 'results.db'), 'batch_size': 1}}
+        writer = results_store.from_config(config)
+        writer.start_run('run-1')
+        writer.add_result(Result('1', 'Prompt', 'respuesta completa'))
+
+        # Herramienta de exportación: la escritura de blobs está apagada
+        blobs.reset()
+        reader = results_store.from_config({**config, 'blobs': {**config['blobs'], 'enabled': False}})
+        assert reader.blobs is None
+        assert reader.export_csv(str(tmp_path / 'export.csv')) == 1
+        with open(tmp_path / 'export.csv', encoding='utf-8', newline='') as f:
+            assert next(csv.DictReader(f))['generated_response'] == 'respuesta completa'
@@ -0,0 +1,84 @@
+"""
+Pruebas unitarias para la grabación y reproducción de respuestas (cassettes)
+"""
+
+import time
+from types import SimpleNamespace
+from unittest.mock import patch
+
+import pytest
+
+from framework.cassettes import CassetteNotFoundError, CassetteStore
+from framework.process import GeminiProcessor
+
+
+@pytest.fixture
+def cassette_config(tmp_path):
+    """Configuración mínima con el almacén de cassettes en un directorio temporal"""
+    return {
+        'gemini': {
+            'model': 'gemini-2.5-pro',
+            'thinking_budget': -1,
+            'system_instruction': 'Eres un agente especializado en flujos de UiPath'
+        },
+        'cassettes': {'mode': 'record', 'path': str(tmp_path / 'cassettes'), 'pace': 'fast'}
+    }
+
+
+def slow_stream(*texts, delay=0.02):
+    for text in texts:
+        time.sleep(delay)
+        yield SimpleNamespace(text=text)
+
+
+class TestCassetteStore:
+    """Pruebas para CassetteStore"""
+
+    def test_record_keeps_chunks_and_timing(self, tmp_path):
+        """La grabación conserva los límites de chunk y el tiempo entre ellos"""
+        store = CassetteStore(str(tmp_path), 'record')
+        texts = [chunk.text for chunk in store.record('abc', 'flash', slow_stream('Hola ', 'mundo'))]
+
+        cassette = store.load('abc')
+        assert texts == ['Hola ', 'mundo']
+        assert [chunk['text'] for chunk in cassette['chunks']] == ['Hola ', 'mundo']
+        assert all(chunk['delay'] >= 0.015 for chunk in cassette['chunks'])
+
+    def test_replay_pace(self, tmp_path):
+        """El replay original respeta los tiempos; el rápido no espera"""
+        CassetteStore(str(tmp_path), 'record').save('abc', {'chunks': [
+            {'text': 'a', 'delay': 0.05}, {'text': 'b', 'delay': 0.05}]})
+
+        started = time.perf_counter()
+        assert [c.text for c in CassetteStore(str(tmp_path), 'replay', 'original').replay('abc')] == ['a', 'b']
+        assert time.perf_counter() - started >= 0.09
+
+        started = time.perf_counter()
+        list(CassetteStore(str(tmp_path), 'replay', 'fast').replay('abc'))
+        assert time.perf_counter() - started < 0.05
+
+    def test_missing_cassette(self, tmp_path):
+        with pytest.raises(CassetteNotFoundError):
+            list(CassetteStore(str(tmp_path), 'replay').replay('nada'))
+
+
+class TestProcessorCassettes:
+    """Grabación y reproducción desde GeminiProcessor"""
+
+    @patch('framework.process.genai.Client')
+    def test_record_then_replay_without_client(self, mock_client, cassette_config):
+        """Lo grabado se reproduce sin crear el cliente ni llamar a la API"""
+        recorder = GeminiProcessor(cassette_config, {'gemini_api_key': 'test'})
+        recorder.client.models.generate_content_stream.return_value = slow_stream('Paso 1. ', 'Paso 2.', delay=0)
+        recorded = recorder._generate_with_gemini('prompt', 'gemini-2.5-flash', {'thinking_budget': 0})
+
+        cassette_config['cassettes']['mode'] = 'replay'
+        mock_client.reset_mock()
+        player = GeminiProcessor(cassette_config, {})
+
+        assert player.client is None
+        assert player._generate_with_gemini('prompt', 'gemini-2.5-flash', {'thinking_budget': 0}) == recorded
+        assert recorded == 'Paso 1. Paso 2.'
+        mock_client.assert_not_called()
+        with pytest.raises(CassetteNotFoundError):
+            player._generate_with_gemini('otro prompt', 'gemini-2.5-flash', {'thinking_budget': 0})
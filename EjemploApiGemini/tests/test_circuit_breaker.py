@@ -0,0 +1,110 @@
+"""
+Pruebas unitarias para el circuit breaker de las llamadas a Gemini
+"""
+
+import threading
+import time
+from unittest.mock import patch
+
+import pytest
+
+from framework import circuit_breaker
+from framework.circuit_breaker import CLOSED, HALF_OPEN, OPEN, CircuitBreaker
+from framework.process import GeminiProcessor
+
+
+class TestCircuitBreaker:
+    """Pruebas para las transiciones de estado"""
+
+    def test_opens_on_consecutive_failures(self):
+        breaker = CircuitBreaker(consecutive_failures=3, min_calls=100)
+        for _ in range(2):
+            breaker.record(True)
+        assert breaker.state == CLOSED
+
+        breaker.record(True)
+        assert breaker.state == OPEN
+
+    def test_opens_on_failure_rate(self):
+        """Fallos intercalados no son consecutivos pero sí superan la tasa"""
+        breaker = CircuitBreaker(consecutive_failures=10, failure_rate=0.5, window=10, min_calls=6)
+        for failure in [True, False, True, False, True, True]:
+            breaker.record(failure)
+
+        assert breaker.state == OPEN
+        assert 'Tasa' in breaker.transitions[-1]['reason']
+
+    def test_half_open_probe_closes_or_reopens(self):
+        """Tras la pausa una prueba exitosa cierra; una fallida reabre con pausa mayor"""
+        now = [0.0]
+        breaker = CircuitBreaker(consecutive_failures=1, open_seconds=10, clock=lambda: now[0])
+        breaker.record(True)
+
+        now[0] = 11
+        assert breaker.acquire() is True
+        assert breaker.state == HALF_OPEN
+        breaker.record(True, probe=True)
+        assert breaker.state == OPEN and breaker._cooldown == 20
+
+        now[0] = 32
+        probe = breaker.acquire()
+        breaker.record(False, probe=probe)
+        assert breaker.state == CLOSED
+        assert [t['to'] for t in breaker.transitions] == [OPEN, HALF_OPEN, OPEN, HALF_OPEN, CLOSED]
+        assert breaker.summary()['times_opened'] == 2
+
+    def test_open_breaker_pauses_callers(self):
+        """Mientras está abierto acquire espera en lugar de fallar"""
+        breaker = CircuitBreaker(consecutive_failures=1, open_seconds=0.1)
+        breaker.record(True)
+
+        started = time.monotonic()
+        probe = breaker.acquire()
+        assert time.monotonic() - started >= 0.09
+        assert probe is True
+
+        # Un segundo worker espera a que la prueba termine
+        released = threading.Event()
+        waiter = threading.Thread(target=lambda: (breaker.acquire(), released.set()))
+        waiter.start()
+        assert not released.wait(0.05)
+        breaker.record(False, probe=True)
+        assert released.wait(1)
+        waiter.join()
+        assert breaker.summary()['paused_worker_seconds'] > 0
+
+
+class TestProcessorBreaker:
+    """Integración con GeminiProcessor"""
+
+    @pytest.fixture(autouse=True)
+    def fresh_breaker(self):
+        circuit_breaker.reset()
+        yield
+        circuit_breaker.reset()
+
+    @patch('framework.process.genai.Client')
+    def test_system_errors_open_shared_breaker(self, mock_client):
+        """Los procesadores de distintas transacciones comparten el breaker del proceso"""
+        config = {'gemini': {'model': 'gemini-2.5-pro', 'thinking_budget': 0, 'system_instruction': 'x'},
+                  'circuit_breaker': {'enabled': True, 'consecutive_failures': 2, 'open_seconds': 60}}
+
+        for transaction_id in ('1', '2'):
+            processor = GeminiProcessor(config, {'gemini_api_key': 'test'})
+            with patch.object(processor, '_generate_with_gemini', side_effect=ConnectionError('caído')):
+                status, _ = processor.process_transaction({'id': transaction_id, 'prompt': 'Cómo leer un Excel'})
+            assert status == 'SystemException'
+
+        assert processor.breaker is circuit_breaker.get_breaker(config)
+        assert processor.breaker.state == OPEN
+
+    @patch('framework.process.genai.Client')
+    def test_business_errors_do_not_open(self, mock_client):
+        config = {'gemini': {'model': 'gemini-2.5-pro', 'thinking_budget': 0, 'system_instruction': 'x'},
+                  'circuit_breaker': {'enabled': True, 'consecutive_failures': 1}}
+        processor = GeminiProcessor(config, {'gemini_api_key': 'test'})
+
+        with patch.object(processor, '_generate_with_gemini', side_effect=ValueError('prompt inválido')):
+            processor.process_transaction({'id': '1', 'prompt': 'Cómo leer un Excel'})
+
+        assert processor.breaker.state == CLOSED
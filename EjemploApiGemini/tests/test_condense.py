@@ -0,0 +1,105 @@
+"""
+Pruebas unitarias para el resumen map-reduce de contextos largos
+"""
+
+from types import SimpleNamespace
+from unittest.mock import patch
+
+from framework import condense
+from framework.process import GeminiProcessor
+from framework.stats import RunStats
+
+
+def document(paragraphs, size=900):
+    return '\n'.join(f"Paso {i}: " + 'x' * size for i in range(paragraphs))
+
+
+class TestSplitText:
+    """Partes acotadas que respetan los saltos de línea"""
+
+    def test_chunks_are_bounded_and_lossless(self):
+        text = document(10) + '\n' + 'y' * 2500
+        chunks = condense.split_text(text, 2000)
+        assert all(len(chunk) <= 2000 for chunk in chunks)
+        assert ''.join(chunks) == text
+        assert chunks[0].startswith('Paso 0') and chunks[1].startswith('Paso 2')
+
+
+class TestContextCondenser:
+    """Resúmenes en paralelo, contabilizados y guardados en caché"""
+
+    def test_chunks_are_summarized_in_parallel_and_cached(self, tmp_path):
+        calls = []
+
+        def summarize(prompt, model, thinking_budget):
+            calls.append(model)
+            return f"resumen {len(calls)}", {'total_tokens': 10}
+
+        condenser = condense.ContextCondenser(summarize, threshold_chars=3000, chunk_chars=2000,
+                                              model='rapido', cache_path=str(tmp_path))
+        text, detail = condenser.condense(document(8))
+
+        assert detail['chunks'] == detail['calls'] == 4
+        assert detail['usage']['total_tokens'] == 40
+        assert text.count('[Parte') == 4
+        assert detail['condensed_chars'] == len(text) < 3000
+        assert set(calls) == {'rapido'}
+
+        _, again = condenser.condense(document(8))
+        assert (again['calls'], again['cached_chunks']) == (0, 4)
+        assert len(calls) == 4
+
+    def test_short_context_is_left_alone(self):
+        condenser = condense.ContextCondenser(lambda *args: ('', None), threshold_chars=3000)
+        assert condenser.condense('corto') == ('corto', {
+            'original_chars': 5, 'rounds': 0, 'chunks': 0, 'calls': 0, 'cached_chunks': 0, 'usage': None,
+            'seconds': 0.0, 'condensed_chars': 5})
+
+
+class TestProcessorIntegration:
+    """La llamada principal recibe el contexto resumido y el resultado lleva el detalle"""
+
+    @patch('framework.process.genai.Client')
+    def test_long_context_is_condensed_before_the_main_call(self, mock_client, tmp_path):
+        config = {'gemini': {'model': 'gemini-2.5-pro', 'thinking_budget': -1, 'system_instruction': 'x'},
+                  'context_condensing': {'enabled': True, 'threshold_chars': 3000, 'chunk_chars': 2000,
+                                         'cache_path': str(tmp_path)}}
+        processor = GeminiProcessor(config, {'gemini_api_key': 'test'})
+        prompts = []
+
+        def generate(model, contents, config):
+            prompt = contents[0].parts[0].text
+            prompts.append((model, prompt))
+            text = 'resumen breve' if model == 'gemini-2.5-flash' else 'respuesta final'
+            usage = SimpleNamespace(prompt_token_count=5, candidates_token_count=5, thoughts_token_count=0,
+                                    cached_content_token_count=0, total_token_count=10)
+            return [SimpleNamespace(text=text, usage_metadata=usage)]
+
+        processor.client.models.generate_content_stream.side_effect = generate
+        status, result = processor.process_transaction({'id': '1', 'prompt': 'Automatizar', 'context': document(8)})
+
+        assert status == 'Success'
+        assert [model for model, _ in prompts] == ['gemini-2.5-flash'] * 4 + ['gemini-2.5-pro']
+        assert 'x' * 900 not in prompts[-1][1] and '[Parte 4] resumen breve' in prompts[-1][1]
+        assert result.metadata['context_summary']['calls'] == 4
+        assert result.usage['total_tokens'] == 10
+
+        report = RunStats.from_results([result]).report()
+        assert report['context_condensing']['calls'] == 4
+        assert report['context_condensing']['total_tokens'] == 40
+        assert report['tokens']['total_tokens'] == 50
+
+    @patch('framework.process.genai.Client')
+    def test_summary_budget_is_fitted_to_the_condense_model(self, mock_client, tmp_path):
+        config = {'gemini': {'model': 'gemini-2.5-pro', 'thinking_budget': -1, 'system_instruction': 'x'},
+                  'context_condensing': {'enabled': True, 'model': 'gemini-2.5-pro', 'cache_path': str(tmp_path)}}
+        processor = GeminiProcessor(config, {'gemini_api_key': 'test'})
+        budgets = []
+
+        def call_model(prompt_text, model, options):
+            budgets.append((model, options['thinking_budget']))
+            return 'resumen'
+        processor._call_model = call_model
+
+        processor._summarize('Resumir', 'gemini-2.5-pro', 0)
+        assert budgets == [('gemini-2.5-pro', 128)]
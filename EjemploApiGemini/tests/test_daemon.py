@@ -0,0 +1,141 @@
+"""
+Pruebas unitarias para el modo daemon (--watch)
+"""
+
+import csv
+import logging
+import os
+import threading
+import time
+
+import pytest
+
+import main
+from framework import daemon
+from framework.models import Result
+
+
+def write_csv(path, ids, age=10):
+    with open(path, 'w', encoding='utf-8', newline='') as f:
+        writer = csv.DictWriter(f, fieldnames=['id', 'prompt'])
+        writer.writeheader()
+        writer.writerows({'id': str(i), 'prompt': f'Prompt número {i}'} for i in ids)
+    # Archivo "asentado": modificado hace `age` segundos
+    modified = time.time() - age
+    os.utime(path, (modified, modified))
+
+
+def result_ids(path):
+    with open(path, encoding='utf-8', newline='') as f:
+        return sorted(row['id'] for row in csv.DictReader(f))
+
+
+def make_spool(tmp_path, **overrides):
+    settings = {'directory': str(tmp_path / 'inbox'), 'processing_dir': str(tmp_path / 'processing'),
+                'done_dir': str(tmp_path / 'done'), 'failed_dir': str(tmp_path / 'failed'),
+                'output_dir': str(tmp_path / 'batches'), 'settle_seconds': 0, 'poll_seconds': 0.05}
+    settings.update(overrides)
+    return settings
+
+
+class TestSpool:
+    """Toma atómica y espera a que el archivo termine de copiarse"""
+
+    def test_claim_moves_settled_files_only(self, tmp_path):
+        spool = daemon.spool_from_config({'watch': make_spool(tmp_path, settle_seconds=5)})
+        write_csv(tmp_path / 'inbox' / 'viejo.csv', [1])
+        write_csv(tmp_path / 'inbox' / 'reciente.csv', [2], age=0)
+        write_csv(tmp_path / 'inbox' / 'copiando.csv.part', [3])
+
+        claimed = spool.claim()
+        assert claimed.parent == tmp_path / 'processing' and claimed.name.endswith('-viejo.csv')
+        assert not (tmp_path / 'inbox' / 'viejo.csv').exists()
+        assert spool.claim() is None
+
+        batch = spool.batch_config({'paths': {'input_data': 'x.csv'}}, claimed)
+        assert batch['paths']['input_data'] == str(claimed)
+        assert batch['paths']['output_data'] == str(tmp_path / 'batches' / claimed.name[:-4] / 'results.csv')
+
+
+    def test_requeue_does_not_overwrite_an_unclaimed_remaining_file(self, tmp_path):
+        spool = daemon.spool_from_config({'watch': make_spool(tmp_path)})
+        write_csv(tmp_path / 'inbox' / 'lote.csv', [1, 2])
+        claimed = spool.claim()
+        # Sobrante de una toma anterior, todavía sin tomar
+        write_csv(tmp_path / 'inbox' / 'lote.remaining.csv', [9])
+
+        target = spool.requeue(claimed, [{'id': '2', 'prompt': 'Prompt número 2'}])
+
+        assert target == str(tmp_path / 'inbox' / 'lote-2.remaining.csv')
+        assert result_ids(tmp_path / 'inbox' / 'lote.remaining.csv') == ['9']
+        assert result_ids(target) == ['2']
+
+
+class TestArguments:
+    """El daemon no tiene ventana de ejecución global"""
+
+    def test_watch_rejects_deadline_and_max_duration(self):
+        assert main.parse_args(['--watch']).watch == ''
+        for window in (['--deadline', '23:00'], ['--max-duration', '2h']):
+            with pytest.raises(SystemExit):
+                main.parse_args(['--watch', *window])
+
+
+class TestRunDaemon:
+    """Lotes con salidas propias y apagado ordenado"""
+
+    def prepare(self, tmp_path, monkeypatch, fake_run):
+        config = {'processing': {'workers': 1}, 'scheduler': {'calibration_file': None},
+                  'paths': {'input_data': 'data/input/prompts.csv', 'output_data': 'data/output/results.csv',
+                            'logs': 'data/output/'},
+                  'watch': make_spool(tmp_path)}
+        monkeypatch.chdir(tmp_path)
+        monkeypatch.setattr(main.process, 'warm_up', lambda config: None)
+        monkeypatch.setattr(main.process, 'run', fake_run)
+        return config
+
+    def test_each_file_is_processed_into_its_own_outputs(self, tmp_path, monkeypatch):
+        def fake_run(transaction, config):
+            return 'Success', Result(transaction['id'], transaction['prompt'], 'ok')
+
+        config = self.prepare(tmp_path, monkeypatch, fake_run)
+        shutdown = daemon.Shutdown()
+        runner = threading.Thread(target=main.run_daemon,
+                                  args=(config, logging.getLogger('test'), {'line_mode': True}),
+                                  kwargs={'shutdown': shutdown})
+        runner.start()
+        (tmp_path / 'inbox').mkdir(exist_ok=True)
+        write_csv(tmp_path / 'inbox' / 'lunes.csv', [1, 2])
+        write_csv(tmp_path / 'inbox' / 'martes.csv', [3, 4, 5])
+        for _ in range(200):
+            if len(list((tmp_path / 'done').glob('*.csv'))) == 2:
+                break
+            time.sleep(0.05)
+        shutdown.request()
+        runner.join(timeout=10)
+
+        assert not runner.is_alive()
+        outputs = {path.name.split('-', 2)[2]: path for path in (tmp_path / 'batches').iterdir()}
+        assert result_ids(outputs['lunes'] / 'results.csv') == ['1', '2']
+        assert result_ids(outputs['martes'] / 'results.csv') == ['3', '4', '5']
+        assert (outputs['martes'] / 'execution_report.json').exists()
+        assert not list((tmp_path / 'processing').iterdir())
+
+    def test_shutdown_drains_in_flight_and_requeues_the_rest(self, tmp_path, monkeypatch):
+        shutdown = daemon.Shutdown()
+
+        def fake_run(transaction, config):
+            # SIGTERM llega mientras se procesa el primer elemento
+            shutdown.request()
+            return 'Success', Result(transaction['id'], transaction['prompt'], 'ok')
+
+        config = self.prepare(tmp_path, monkeypatch, fake_run)
+        (tmp_path / 'inbox').mkdir()
+        write_csv(tmp_path / 'inbox' / 'lote.csv', [1, 2, 3, 4])
+        summary = main.run_daemon(config, logging.getLogger('test'), {'line_mode': True}, shutdown=shutdown)
+
+        assert summary == (4, 1, 0)
+        assert len(result_ids(next((tmp_path / 'batches').iterdir()) / 'results.csv')) == 1
+        remaining = list((tmp_path / 'inbox').iterdir())
+        assert [path.name for path in remaining] == ['lote.remaining.csv']
+        assert len(result_ids(remaining[0])) == 3
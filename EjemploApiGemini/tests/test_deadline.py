@@ -0,0 +1,94 @@
+"""
+Pruebas unitarias para las ejecuciones con hora límite
+"""
+
+import csv
+import json
+import logging
+from datetime import datetime, timedelta
+
+import pytest
+
+import main
+from framework import deadline
+from framework.deadline import Deadline, parse_deadline, parse_duration
+from framework.models import Result
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+class TestParsing:
+    """Formatos de --deadline y --max-duration"""
+
+    @pytest.mark.parametrize('text,seconds', [('3600', 3600), ('90m', 5400), ('2h', 7200), ('1h30m', 5400)])
+    def test_durations(self, text, seconds):
+        assert parse_duration(text) == seconds
+
+    def test_invalid_duration(self):
+        with pytest.raises(ValueError):
+            parse_duration('dos horas')
+
+    def test_clock_time_rolls_to_tomorrow(self):
+        now = datetime(2024, 5, 1, 22, 0)
+        assert parse_deadline('06:00', now) == datetime(2024, 5, 2, 6, 0)
+        assert parse_deadline('23:30', now) == datetime(2024, 5, 1, 23, 30)
+        assert parse_deadline('2024-05-03T01:00', now) == datetime(2024, 5, 3, 1, 0)
+
+
+class TestDeadline:
+    """Estimación con el rendimiento observado"""
+
+    def test_uses_observed_seconds_per_cost_unit(self):
+        clock = FakeClock()
+        guard = Deadline(datetime.now() + timedelta(seconds=100), safety_factor=1.5,
+                         initial_estimate_seconds=30, clock=clock)
+        assert guard.expected_seconds(5000) == 30
+
+        guard.record(1000, 10)
+        assert guard.expected_seconds(2000) == pytest.approx(30)
+        clock.now += 80
+        assert guard.allows(1000) and not guard.allows(2000)
+
+
+class TestDeadlineRun:
+    """El despacho se corta a tiempo, lo en vuelo termina y lo pendiente queda guardado"""
+
+    def test_csv_run_stops_dispatch_and_persists_unprocessed(self, tmp_path, monkeypatch):
+        config = {
+            'processing': {'workers': 1},
+            'scheduler': {'calibration_file': None},
+            'paths': {'input_data': 'data/input/prompts.csv', 'output_data': 'data/output/results.csv',
+                      'logs': 'data/output/'}
+        }
+        (tmp_path / 'config').mkdir()
+        (tmp_path / 'config' / 'settings.json').write_text(json.dumps(config), encoding='utf-8')
+        monkeypatch.chdir(tmp_path)
+
+        clock = FakeClock()
+        guard = Deadline(datetime.now() + timedelta(seconds=35), safety_factor=1.2, initial_estimate_seconds=5,
+                         unprocessed_file='data/output/unprocessed.csv', clock=clock)
+        monkeypatch.setattr(deadline, '_deadline', guard)
+        monkeypatch.setattr(main.time, 'perf_counter', clock)
+
+        def fake_run(transaction, config):
+            clock.now += 10
+            return 'Success', Result(transaction['id'], transaction['prompt'], 'ok')
+        monkeypatch.setattr(main.process, 'run', fake_run)
+
+        queue = [{'id': str(i), 'prompt': f'Prompt número {i}'} for i in range(1, 6)]
+        summary = main.run_csv_queue(config, logging.getLogger('test'), {'line_mode': True}, queue=queue)
+
+        # 10 s por elemento con margen 1.2: a los 30 s quedan 5 s y no alcanza para otro
+        assert summary == (5, 3, 0)
+        with open('data/output/unprocessed.csv', encoding='utf-8', newline='') as f:
+            assert [row['id'] for row in csv.DictReader(f)] == ['4', '5']
+        with open('data/output/execution_report.json', encoding='utf-8') as f:
+            report = json.load(f)['deadline']
+        assert report['stopped_dispatch'] and report['finished_before_deadline']
+        assert report['unprocessed_items'] == 2
@@ -0,0 +1,113 @@
+"""
+Pruebas unitarias para la verificación de salud de la API
+"""
+
+import threading
+import time
+from types import SimpleNamespace
+from unittest.mock import MagicMock
+
+import pytest
+
+from framework import health
+
+
+class FakeModels:
+    """Cliente simulado: demora de primer chunk y error por modelo"""
+
+    def __init__(self, delays=None, errors=None):
+        self.delays = delays or {}
+        self.errors = errors or {}
+        self.release = threading.Event()
+
+    def get(self, model):
+        if model in self.errors:
+            raise self.errors[model]
+        return SimpleNamespace(name=model)
+
+    def generate_content_stream(self, model, contents, config):
+        delay = self.delays.get(model, 0)
+        if delay is None:
+            self.release.wait(5)
+        else:
+            time.sleep(delay)
+        yield SimpleNamespace(text='OK')
+
+
+@pytest.fixture(autouse=True)
+def clean_report():
+    health.reset()
+    yield
+    health.reset()
+
+
+def make_config(**settings):
+    return {'gemini': {'model': 'gemini-2.5-pro'},
+            'health_check': {'enabled': True, 'timeout_seconds': 2, **settings}}
+
+
+class TestProbes:
+    """Mediciones y errores de cada prueba"""
+
+    def test_probe_measures_connect_and_first_chunk(self):
+        probe = health.probe_model(SimpleNamespace(models=FakeModels({'m': 0.05})), 'm', 'ping')
+        assert probe['healthy']
+        assert probe['connect_seconds'] < probe['first_chunk_seconds']
+        assert probe['first_chunk_seconds'] >= 0.05
+
+    def test_probe_records_error_type(self):
+        client = SimpleNamespace(models=FakeModels(errors={'m': ConnectionError('sin red')}))
+        probe = health.probe_model(client, 'm', 'ping')
+        assert not probe['healthy']
+        assert (probe['error_type'], probe['error']) == ('SystemException', 'sin red')
+
+    def test_probe_closes_the_stream_after_the_first_chunk(self):
+        stream = MagicMock()
+        stream.__iter__.return_value = iter([SimpleNamespace(text='OK'), SimpleNamespace(text='más')])
+        client = SimpleNamespace(models=SimpleNamespace(get=lambda model: None,
+                                                        generate_content_stream=lambda **kwargs: stream))
+        assert health.probe_model(client, 'm', 'ping')['healthy']
+        stream.close.assert_called_once_with()
+
+    def test_models_are_probed_concurrently_with_timeout(self):
+        models = FakeModels({'lento': None, 'a': 0.2, 'b': 0.2})
+        started = time.perf_counter()
+        probes = health.probe_models(SimpleNamespace(models=models), ['lento', 'a', 'b'], 'ping', timeout=0.5)
+        elapsed = time.perf_counter() - started
+        models.release.set()
+
+        assert elapsed < 0.45 + 0.2
+        assert [probe['healthy'] for probe in probes] == [False, True, True]
+        assert probes[0]['error'] == 'Sin respuesta en 0.5s'
+
+
+class TestCheck:
+    """Abortar de entrada o elegir el modelo más rápido"""
+
+    def test_select_fastest_updates_the_model(self):
+        config = make_config(models=['gemini-2.5-pro', 'gemini-2.5-flash'], select_fastest=True)
+        client = SimpleNamespace(models=FakeModels({'gemini-2.5-pro': 0.3, 'gemini-2.5-flash': 0.01}))
+
+        report = health.check(config, {}, client=client)
+
+        assert config['gemini']['model'] == 'gemini-2.5-flash'
+        assert report['selected_model'] == 'gemini-2.5-flash'
+        assert health.active_report() is report
+
+    def test_unhealthy_configured_model_fails_fast(self):
+        config = make_config(models=['gemini-2.5-flash'])
+        client = SimpleNamespace(models=FakeModels(errors={'gemini-2.5-pro': RuntimeError('503 UNAVAILABLE')}))
+
+        with pytest.raises(health.HealthCheckError, match='gemini-2.5-pro: 503 UNAVAILABLE'):
+            health.check(config, {}, client=client)
+        assert config['gemini']['model'] == 'gemini-2.5-pro'
+
+    def test_without_fail_fast_the_run_continues(self):
+        config = make_config(fail_fast=False)
+        client = SimpleNamespace(models=FakeModels(errors={'gemini-2.5-pro': RuntimeError('503')}))
+        assert health.check(config, {}, client=client)['selected_model'] is None
+
+    def test_disabled_check_makes_no_calls(self):
+        client = MagicMock()
+        assert health.check({'gemini': {'model': 'm'}}, {}, client=client) is None
+        client.models.get.assert_not_called()
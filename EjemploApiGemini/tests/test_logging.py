@@ -0,0 +1,73 @@
+"""
+Pruebas unitarias para el pipeline de logging asíncrono
+"""
+
+import json
+import logging
+import logging.handlers
+
+import pytest
+
+from framework import init
+from framework.utils import JsonFormatter, setup_logger
+
+
+@pytest.fixture
+def log_config(tmp_path):
+    """Configuración de logging apuntando a un directorio temporal"""
+    config = {'logging': {'level': 'INFO', 'file': str(tmp_path / 'automation.log'),
+                          'max_bytes': 2000, 'backup_count': 2}}
+    yield config
+    init.shutdown_logging()
+
+
+class TestLoggingPipeline:
+    """Pruebas para setup_logging y el formateador JSON"""
+
+    def test_json_formatter_includes_extra_fields(self):
+        """Cada registro es una línea JSON con el contexto pasado en extra"""
+        record = logging.LogRecord('gemini_automation', logging.INFO, __file__, 1,
+                                   "Transacción %s procesada", ('42',), None)
+        record.transaction_id = '42'
+
+        entry = json.loads(JsonFormatter().format(record))
+
+        assert entry['message'] == 'Transacción 42 procesada'
+        assert entry['level'] == 'INFO'
+        assert entry['transaction_id'] == '42'
+
+    def test_records_written_by_listener_as_json_lines(self, log_config):
+        """Los loggers hijos escriben en el archivo a través del QueueListener"""
+        init.setup_logging(log_config)
+        setup_logger('process').info("Transacción %s procesada", '7')
+        init.shutdown_logging()
+
+        with open(log_config['logging']['file'], encoding='utf-8') as f:
+            entries = [json.loads(line) for line in f]
+        assert entries[-1]['message'] == 'Transacción 7 procesada'
+        assert entries[-1]['logger'] == 'gemini_automation.process'
+
+    def test_message_formatted_lazily(self, log_config):
+        """Los mensajes por debajo del nivel configurado no se formatean"""
+        class Expensive:
+            formatted = False
+
+            def __str__(self):
+                Expensive.formatted = True
+                return 'costoso'
+
+        init.setup_logging(log_config)
+        setup_logger('process').debug("Detalle %s", Expensive())
+
+        assert Expensive.formatted is False
+
+    def test_log_file_rotates_by_size(self, log_config, tmp_path):
+        """El archivo rota al superar max_bytes en lugar de crecer sin límite"""
+        init.setup_logging(log_config)
+        logger = setup_logger('process')
+        for i in range(100):
+            logger.info("Mensaje de relleno número %d para forzar la rotación", i)
+        init.shutdown_logging()
+
+        assert (tmp_path / 'automation.log.1').exists()
+        assert not (tmp_path / 'automation.log.3').exists()
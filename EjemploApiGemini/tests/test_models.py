@@ -0,0 +1,60 @@
+"""
+Pruebas unitarias para los registros compactos Transaction, Result y FailedItem
+"""
+
+import json
+
+import pytest
+
+from framework.models import Transaction, Result, FailedItem
+
+
+class TestRecords:
+    """Pruebas de compatibilidad tipo dict de los registros"""
+
+    def test_transaction_from_item(self):
+        """Las columnas vacías quedan en None y se comportan como ausentes en get"""
+        transaction = Transaction.from_item({'id': '1', 'prompt': 'Prompt', 'model': '', 'priority': 'High'})
+
+        assert transaction['id'] == '1'
+        assert transaction.get('model') is None
+        assert transaction.get('model', 'x') == 'x'
+        assert transaction['priority'] == 'High'
+        assert 'prompt' in transaction
+        assert not hasattr(transaction, '__dict__')
+
+    def test_unknown_key_raises_key_error(self):
+        """Las claves desconocidas se comportan como en un dict"""
+        transaction = Transaction('1', 'Prompt')
+
+        with pytest.raises(KeyError):
+            transaction['no_existe']
+        assert transaction.get('no_existe', 'default') == 'default'
+
+    def test_result_metadata_view(self):
+        """La metadata anidada del formato anterior se reconstruye desde los slots"""
+        result = Result('1', 'Prompt', 'Respuesta', model_used='gemini-2.5-pro',
+                        model_attempts=[{'model': 'gemini-2.5-pro', 'latency_seconds': 1.0, 'accepted': True}])
+
+        assert result['metadata']['model_used'] == 'gemini-2.5-pro'
+        assert result['metadata']['response_length'] == len('Respuesta')
+        assert result['metadata']['escalated'] is False
+        assert json.loads(json.dumps(result.to_dict()))['metadata']['model_used'] == 'gemini-2.5-pro'
+
+    def test_metadata_is_read_only_and_records_are_unhashable(self):
+        """Escribir en la vista de metadata falla en lugar de perderse en silencio"""
+        result = Result('1', 'Prompt', 'Respuesta')
+
+        with pytest.raises(TypeError):
+            result.metadata['cache_hit'] = {'transaction_id': '0'}
+        result.cache_hit = {'transaction_id': '0'}
+        assert result.metadata['cache_hit'] == {'transaction_id': '0'}
+        with pytest.raises(TypeError):
+            hash(result)
+
+    def test_failed_item_equals_dict(self):
+        """Un registro se compara igual a su representación dict"""
+        failed = FailedItem('1', error_type='BusinessException', failed_at='2025-01-01T00:00:00')
+
+        assert failed == failed.to_dict()
+        assert failed['status'] == 'failed'
@@ -0,0 +1,59 @@
+"""
+Pruebas unitarias para el reporte de progreso en vivo
+"""
+
+import io
+
+from framework.progress import ProgressReporter, format_duration
+
+
+class TestProgressReporter:
+    """Pruebas para contadores, ETA y presentación"""
+
+    def test_counts_and_eta(self):
+        """Cuenta exitosos, fallidos y en curso; la ETA usa la tasa medida"""
+        progress = ProgressReporter(total=10, stream=io.StringIO(), line_mode=True)
+        for _ in range(3):
+            progress.item_started()
+        progress.item_finished('Success', 2.0)
+        progress.item_finished('BusinessException', 4.0)
+
+        stats = progress.snapshot()
+        assert (stats['successful'], stats['failed'], stats['in_flight']) == (1, 1, 1)
+        assert stats['ewma_latency_seconds'] == 2.4
+        assert stats['items_per_minute'] > 0
+        assert stats['eta_seconds'] > 0
+
+    def test_rate_limited_rendering(self):
+        """Fuera de una terminal se imprime como máximo una línea por intervalo"""
+        stream = io.StringIO()
+        progress = ProgressReporter(total=100, stream=stream, line_mode=True,
+                                    config={'line_interval_seconds': 60})
+        for _ in range(50):
+            progress.item_started()
+            progress.item_finished('Success', 0.1)
+        progress.close()
+
+        lines = stream.getvalue().splitlines()
+        assert len(lines) == 2
+        assert lines[-1].startswith('⏳ 50/100 (50.0%)')
+
+    def test_tty_renders_in_place_with_estimated_total(self):
+        """En una terminal se redibuja con \\r y el total estimado se marca con ~"""
+        stream = io.StringIO()
+        progress = ProgressReporter(total=8, estimated=True, stream=stream, line_mode=False, verbose=True)
+        progress.item_started()
+        progress.item_finished('Success', 1.0)
+        progress.message('✅ Elemento 1 procesado exitosamente')
+        progress.close()
+
+        output = stream.getvalue()
+        assert output.startswith('\r⏳ 1/~8')
+        assert '✅ Elemento 1 procesado exitosamente\n' in output
+        assert output.endswith('\n')
+
+    def test_format_duration(self):
+        assert format_duration(None) == '--'
+        assert format_duration(12) == '12s'
+        assert format_duration(185) == '3m05s'
+        assert format_duration(3720) == '1h02m'
@@ -0,0 +1,108 @@
+"""
+Pruebas unitarias para los lectores de la cola y la validación masiva
+"""
+
+import csv
+import gzip
+import json
+
+import pytest
+
+from framework import readers
+from framework.init import load_queue
+
+
+def _config(tmp_path):
+    return {'paths': {'output_data': str(tmp_path / 'results.csv')}}
+
+
+class TestReaders:
+    """Pruebas para los lectores por formato"""
+
+    def test_csv_and_gzip_jsonl_are_equivalent(self, tmp_path):
+        """CSV y JSONL comprimido producen las mismas filas"""
+        rows = [{'id': '1', 'prompt': 'Automatizar facturación'}, {'id': '2', 'prompt': 'Procesar emails'}]
+        csv_path = tmp_path / 'prompts.csv'
+        with open(csv_path, 'w', newline='', encoding='utf-8') as f:
+            writer = csv.DictWriter(f, fieldnames=['id', 'prompt'])
+            writer.writeheader()
+            writer.writerows(rows)
+        jsonl_path = tmp_path / 'prompts.jsonl.gz'
+        with gzip.open(jsonl_path, 'wt', encoding='utf-8') as f:
+            f.write('\n'.join(json.dumps(row) for row in rows))
+
+        assert list(readers.read_rows(str(csv_path))) == rows
+        assert list(readers.read_rows(str(jsonl_path))) == rows
+
+    def test_xlsx_reader(self, tmp_path):
+        """Las filas de Excel se normalizan a texto como en el CSV"""
+        openpyxl = pytest.importorskip('openpyxl')
+        workbook = openpyxl.Workbook()
+        workbook.active.append(['id', 'prompt', 'context'])
+        workbook.active.append([1, 'Automatizar facturación', None])
+        path = tmp_path / 'prompts.xlsx'
+        workbook.save(path)
+
+        assert list(readers.read_rows(str(path))) == [
+            {'id': '1', 'prompt': 'Automatizar facturación', 'context': ''}]
+
+    def test_unsupported_format(self):
+        """Una extensión sin lector registrado se rechaza"""
+        with pytest.raises(ValueError, match="no soportado"):
+            readers.get_reader('prompts.parquet')
+
+
+class TestValidation:
+    """Pruebas para la validación compilada"""
+
+    def test_validate_rows(self):
+        """Cada fila inválida trae su motivo"""
+        rows = [
+            {'id': '1', 'prompt': 'Prompt válido y largo'},
+            {'id': '', 'prompt': 'Prompt válido y largo'},
+            {'id': '3', 'prompt': 'Corto'},
+            {'id': '1', 'prompt': 'Prompt válido y largo'},
+            {'_parse_error': 'Línea 5: JSON inválido'},
+        ]
+
+        errors = [error for _, error in readers.validate_rows(rows, readers.compile_schema())]
+
+        assert errors[0] is None
+        assert "Campo requerido 'id'" in errors[1]
+        assert 'al menos 10' in errors[2]
+        assert 'duplicado' in errors[3]
+        assert 'JSON inválido' in errors[4]
+
+    def test_load_queue_sends_invalid_rows_to_failed_file(self, tmp_path):
+        """Las filas inválidas van directo al archivo de fallidos y no llegan a la cola"""
+        path = tmp_path / 'prompts.jsonl'
+        path.write_text('{"id": "1", "prompt": "Automatizar facturación"}\n{"id": "2", "prompt": "Corto"}\n',
+                        encoding='utf-8')
+        config = _config(tmp_path)
+
+        queue = load_queue(str(path), config)
+
+        assert [item['id'] for item in queue] == ['1']
+        with open(tmp_path / 'results_failed.csv', encoding='utf-8') as f:
+            failed = list(csv.DictReader(f))
+        assert failed[0]['id'] == '2'
+        assert failed[0]['error_type'] == 'BusinessException'
+
+    def test_reloading_does_not_duplicate_rejections(self, tmp_path):
+        """Cada runner de la cola SQLite recarga el archivo sin volver a registrar las mismas filas"""
+        path = tmp_path / 'prompts.jsonl'
+        path.write_text('{"id": "1", "prompt": "Automatizar facturación"}\n{"id": "2", "prompt": "Corto"}\n'
+                        '{"prompt": "Automatizar sin id"}\n', encoding='utf-8')
+        config = _config(tmp_path)
+
+        load_queue(str(path), config)
+        load_queue(str(path), config)
+
+        with open(tmp_path / 'results_failed.csv', encoding='utf-8') as f:
+            assert len(list(csv.DictReader(f))) == 2
+
+    def test_missing_non_csv_input_is_an_error(self, tmp_path):
+        """Solo se crea un ejemplo para entradas CSV"""
+        with pytest.raises(FileNotFoundError):
+            load_queue(str(tmp_path / 'prompts.jsonl'))
+        assert not (tmp_path / 'prompts.jsonl').exists()
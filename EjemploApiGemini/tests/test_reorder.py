@@ -0,0 +1,99 @@
+"""
+Pruebas unitarias para el reensamblado de resultados en orden de entrada
+"""
+
+import csv
+import logging
+import random
+
+import main
+from framework.end import ResultWriter
+from framework.models import Result
+from framework.reorder import ReorderBuffer, SEQUENCE_COLUMN
+from framework.stats import RunStats
+
+
+def row(sequence):
+    return {'id': str(sequence)}
+
+
+class TestReorderBuffer:
+    """Se libera el prefijo completo; los huecos no frenan al resto"""
+
+    def test_rows_are_released_as_soon_as_the_prefix_is_complete(self):
+        emitted = []
+        buffer = ReorderBuffer(lambda r: emitted.append(r['id']), max_rows=10)
+        buffer.add(3, row(3))
+        buffer.add(2, row(2))
+        assert emitted == []
+        buffer.add(1, row(1))
+        assert emitted == ['1', '2', '3']
+        buffer.add(5, row(5))
+        buffer.skip(4)
+        assert emitted == ['1', '2', '3', '5']
+        assert buffer.buffered == 0
+
+    def test_spill_keeps_memory_bounded_and_order_exact(self, tmp_path):
+        emitted = []
+        buffer = ReorderBuffer(lambda r: emitted.append(int(r['id'])), max_rows=20, spill_dir=str(tmp_path))
+        order = list(range(2, 501))
+        random.Random(7).shuffle(order)
+        for sequence in order:
+            buffer.add(sequence, row(sequence))
+            # En memoria: hasta max_rows filas más la primera de cada tramo en disco
+            assert buffer.buffered <= 20 + buffer.summary()['spill_runs']
+        assert emitted == []
+        buffer.add(1, row(1))
+        buffer.close()
+
+        assert emitted == list(range(1, 501))
+        assert buffer.summary()['spilled_rows'] > 0
+        assert not list(tmp_path.iterdir())
+
+    def test_unordered_overflow_flushes_and_passes_rows_through(self):
+        emitted = []
+        buffer = ReorderBuffer(lambda r: emitted.append(r['id']), max_rows=2, overflow='unordered')
+        for sequence in (4, 2, 3):
+            buffer.add(sequence, row(sequence))
+        assert emitted == ['2', '3', '4']
+        buffer.add(1, row(1))
+        assert emitted == ['2', '3', '4', '1']
+        assert buffer.summary()['switched_to_unordered']
+
+
+class TestOrderedOutput:
+    """results.csv sale en el orden del archivo de entrada aunque el planificador despache en otro"""
+
+    def config(self, tmp_path, **order):
+        return {'processing': {'workers': 4}, 'scheduler': {'calibration_file': None},
+                'output_order': order,
+                'paths': {'input_data': str(tmp_path / 'prompts.csv'),
+                          'output_data': str(tmp_path / 'results.csv'), 'logs': str(tmp_path)}}
+
+    def test_csv_run_writes_rows_in_input_order(self, tmp_path, monkeypatch):
+        def fake_run(transaction, config):
+            if transaction['id'] == '3':
+                return 'BusinessException', 'inválido'
+            return 'Success', Result(transaction['id'], transaction['prompt'], 'ok')
+        monkeypatch.setattr(main.process, 'run', fake_run)
+
+        # Prompts cada vez más largos: el planificador despacha del último al primero
+        queue = [{'id': str(i), 'prompt': 'x' * (i * 50)} for i in range(1, 13)]
+        config = self.config(tmp_path, max_buffered_rows=4)
+        summary = main.run_csv_queue(config, logging.getLogger('test'), {'line_mode': True}, queue=queue)
+
+        assert summary == (12, 11, 1)
+        with open(tmp_path / 'results.csv', encoding='utf-8', newline='') as f:
+            assert [r['id'] for r in csv.DictReader(f)] == [str(i) for i in range(1, 13) if i != 3]
+
+    def test_unordered_overflow_adds_a_sequence_column(self, tmp_path):
+        stats = RunStats()
+        writer = ResultWriter(self.config(tmp_path, max_buffered_rows=1, overflow='unordered'), stats)
+        for sequence in (3, 2, 1):
+            writer.write(Result(f"id-{sequence}", 'p', 'ok'), sequence)
+        writer.close()
+
+        with open(tmp_path / 'results.csv', encoding='utf-8', newline='') as f:
+            rows = [(r['id'], r[SEQUENCE_COLUMN]) for r in csv.DictReader(f)]
+        assert rows == [('id-2', '2'), ('id-3', '3'), ('id-1', '1')]
+        assert stats.report()['output_order']['switched_to_unordered']
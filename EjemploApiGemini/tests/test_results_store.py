@@ -0,0 +1,87 @@
+"""
+Pruebas unitarias para el almacén de resultados SQLite
+"""
+
+import csv
+import json
+import logging
+
+import pytest
+
+import main
+import results_db
+from framework.models import Result
+from framework.results_store import ResultsStore
+
+
+@pytest.fixture
+def store(tmp_path):
+    return ResultsStore(str(tmp_path / 'results.db'), batch_size=2)
+
+
+class TestResultsStore:
+    """Pruebas para escritura por lotes, consultas y exportación"""
+
+    def test_history_is_kept_across_runs(self, store):
+        store.start_run('run-1')
+        store.add_result(Result('4711', 'Prompt', 'primera respuesta', model_used='gemini-2.5-flash',
+                                usage={'total_tokens': 90}))
+        store.add_failure({'id': '7', 'prompt': 'Otro'}, 'SystemException', 'timeout')
+        store.finish_run({'execution_summary': {'total_items': 2}})
+
+        store.start_run('run-2')
+        store.add_result(Result('4711', 'Prompt', 'segunda respuesta', model_used='gemini-2.5-pro'))
+        store.finish_run()
+
+        history = store.lookup('4711')
+        assert [row['generated_response'] for row in history] == ['segunda respuesta', 'primera respuesta']
+        assert history[1]['total_tokens'] == 90
+        assert [row['transaction_id'] for row in store.query(status='failed')] == ['7']
+        assert store.latest_run_id() == 'run-2'
+        assert store.run_report('run-1') == {'execution_summary': {'total_items': 2}}
+        assert {run['run_id']: (run['completed'], run['failed']) for run in store.runs()} == \
+            {'run-1': (1, 1), 'run-2': (1, 0)}
+
+    def test_rows_are_written_in_batches(self, store):
+        store.start_run('run-1')
+        store.add_result(Result('1', 'Prompt', 'ok'))
+        assert store.lookup('1') == []
+
+        store.add_result(Result('2', 'Prompt', 'ok'))
+        assert len(store.lookup('1')) == 1
+
+    def test_export_csv(self, store, tmp_path):
+        store.start_run('run-1')
+        store.add_result(Result('1', 'Prompt', 'ok', model_used='gemini-2.5-flash'))
+        store.add_failure({'id': '2', 'prompt': 'Otro'}, 'BusinessException', 'dato inválido')
+        store.flush()
+
+        out = tmp_path / 'export.csv'
+        assert results_db.main(['--db', store.db_path, 'export', 'csv', str(out), '--status', 'completed']) is None
+        with open(out, encoding='utf-8', newline='') as f:
+            rows = list(csv.DictReader(f))
+        assert [(row['id'], row['model_used'], row['run_id']) for row in rows] == [('1', 'gemini-2.5-flash', 'run-1')]
+
+
+def test_csv_run_writes_to_store(tmp_path, monkeypatch):
+    config = {
+        'processing': {'workers': 2},
+        'scheduler': {'calibration_file': None},
+        'results_store': {'enabled': True, 'path': 'data/output/results.db', 'batch_size': 100},
+        'paths': {'input_data': 'data/input/prompts.csv', 'output_data': 'data/output/results.csv',
+                  'logs': 'data/output/'}
+    }
+    (tmp_path / 'config').mkdir()
+    (tmp_path / 'config' / 'settings.json').write_text(json.dumps(config), encoding='utf-8')
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(main.process, 'run', lambda t, c: ('Success', Result(t['id'], t['prompt'], 'ok'))
+                        if t['id'] != '3' else ('BusinessException', 'dato inválido'))
+
+    queue = [{'id': str(i), 'prompt': f'Prompt número {i}'} for i in range(1, 5)]
+    main.run_csv_queue(config, logging.getLogger('test'), {'line_mode': True}, queue=queue)
+
+    store = ResultsStore('data/output/results.db')
+    run_id = store.latest_run_id()
+    assert sorted(row['transaction_id'] for row in store.query(run_id=run_id, status='completed')) == ['1', '2', '4']
+    assert store.lookup('3')[0]['error_message'] == 'dato inválido'
+    assert store.run_report(run_id)['execution_summary']['successful_items'] == 3
@@ -0,0 +1,137 @@
+"""
+Pruebas unitarias para el reintento de elementos fallidos (--retry-failed)
+"""
+
+import csv
+import json
+import logging
+import threading
+
+import pytest
+
+import main
+from framework import end, handle_error, init
+
+
+def read_csv(path):
+    with open(path, 'r', encoding='utf-8', newline='') as f:
+        return list(csv.DictReader(f))
+
+
+@pytest.fixture
+def workspace(tmp_path, monkeypatch):
+    """Directorio de trabajo con configuración, resultados previos y un archivo de fallidos"""
+    config = {
+        'processing': {'workers': 1},
+        'scheduler': {'calibration_file': None},
+        'paths': {'input_data': 'data/input/prompts.csv', 'output_data': 'data/output/results.csv',
+                  'logs': 'data/output/'}
+    }
+    (tmp_path / 'config').mkdir()
+    (tmp_path / 'config' / 'settings.json').write_text(json.dumps(config), encoding='utf-8')
+    (tmp_path / 'data' / 'output').mkdir(parents=True)
+    monkeypatch.chdir(tmp_path)
+
+    end.save_results([{'transaction_id': '1', 'original_prompt': 'Prompt uno', 'generated_response': 'ok',
+                       'status': 'completed', 'metadata': {}}], config)
+    handle_error.log_errors([
+        ({'id': '2', 'prompt': 'Prompt número dos'}, ConnectionError('caído')),
+        ({'id': '3', 'prompt': 'Prompt número tres'}, ValueError('dato inválido')),
+        ({'id': '2', 'prompt': 'Prompt número dos'}, TimeoutError('lento')),
+    ], config)
+    return config
+
+
+class TestRetryFailed:
+    """Pruebas para load_failed_queue, compact_failed y el modo --retry-failed"""
+
+    def test_failed_queue_dedupes_and_filters(self, workspace):
+        queue = init.load_failed_queue(workspace)
+        assert [row['id'] for row in queue] == ['3', '2']
+        assert queue[1]['error_message'] == 'lento'
+
+        assert [row['id'] for row in init.load_failed_queue(workspace, ['SystemException'])] == ['2']
+
+    def test_retry_merges_results_and_compacts(self, workspace, monkeypatch):
+        """Los exitosos se agregan a los resultados y salen del archivo de fallidos"""
+        def fake_run(transaction, config):
+            return 'Success', {'transaction_id': transaction['id'], 'original_prompt': transaction['prompt'],
+                               'generated_response': 'reintento', 'status': 'completed', 'metadata': {}}
+        monkeypatch.setattr(main.process, 'run', fake_run)
+
+        summary = main.run_retry_failed(workspace, logging.getLogger('test'),
+                                        {'line_mode': True}, only=['SystemException'])
+
+        assert summary == (1, 1, 0)
+        assert [row['id'] for row in read_csv('data/output/results.csv')] == ['1', '2']
+        failed = read_csv(handle_error.failed_items_path(workspace))
+        assert [row['id'] for row in failed] == ['3']
+
+    def test_failed_retry_stays_once(self, workspace, monkeypatch):
+        """Un elemento que vuelve a fallar queda una sola vez, con el último error"""
+        monkeypatch.setattr(main.process, 'run', lambda t, c: ('SystemException', 'sigue caído'))
+
+        main.run_retry_failed(workspace, logging.getLogger('test'), {'line_mode': True})
+
+        failed = {row['id']: row for row in read_csv(handle_error.failed_items_path(workspace))}
+        assert sorted(failed) == ['2', '3']
+        assert failed['2']['error_message'] == 'sigue caído'
+        assert [row['id'] for row in read_csv('data/output/results.csv')] == ['1']
+
+    def test_retry_keeps_the_original_row_columns(self, workspace, monkeypatch):
+        """template, priority, model... de la fila original llegan intactos al reintento"""
+        row = {'id': '4', 'prompt': 'Novedades del orquestador', 'template': 'investigacion', 'priority': 'high',
+               'model': 'gemini-2.5-flash', 'thinking_budget': '2048'}
+        handle_error.log_failed_result(row, 'SystemException', 'caído', workspace)
+        retried = []
+
+        def fake_run(transaction, config):
+            retried.append(transaction)
+            return 'SystemException', 'sigue caído'
+        monkeypatch.setattr(main.process, 'run', fake_run)
+
+        queue = {item['id']: item for item in init.load_failed_queue(workspace)}
+        assert {key: queue['4'][key] for key in row} == row
+        main.run_retry_failed(workspace, logging.getLogger('test'), {'line_mode': True}, only=['SystemException'])
+
+        again = {item['id']: item for item in init.load_failed_queue(workspace)}
+        assert again['4']['template'] == 'investigacion' and again['4']['error_message'] == 'sigue caído'
+
+    def test_old_failed_files_are_upgraded(self, workspace):
+        """Un archivo sin la columna payload se reescribe antes de agregar filas nuevas"""
+        path = handle_error.failed_items_path(workspace)
+        rows = read_csv(path)
+        with open(path, 'w', encoding='utf-8', newline='') as f:
+            writer = csv.DictWriter(f, fieldnames=[key for key in rows[0] if key != 'payload'],
+                                    extrasaction='ignore')
+            writer.writeheader()
+            writer.writerows(rows)
+
+        handle_error.log_failed_result({'id': '5', 'prompt': 'Prompt cinco', 'template': 'diagrama'},
+                                       'SystemException', 'caído', workspace)
+
+        assert [row['id'] for row in read_csv(path)] == ['2', '3', '2', '5']
+        assert init.load_failed_queue(workspace)[-1]['template'] == 'diagrama'
+
+
+class TestFailedFile:
+    """Los workers registran fallos en paralelo sin encabezados duplicados ni filas mezcladas"""
+
+    def test_concurrent_appends_keep_one_header(self, tmp_path):
+        config = {'paths': {'output_data': str(tmp_path / 'results.csv')}}
+
+        def worker(n):
+            for i in range(50):
+                handle_error.log_failed_result({'id': f'{n}-{i}', 'prompt': 'p' * 200}, 'SystemException',
+                                               'caído', config)
+
+        threads = [threading.Thread(target=worker, args=(n,)) for n in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        with open(tmp_path / 'results_failed.csv', encoding='utf-8', newline='') as f:
+            lines = list(csv.reader(f))
+        assert lines[0][0] == 'id' and sum(line[0] == 'id' for line in lines) == 1
+        assert sorted(line[0] for line in lines[1:]) == sorted(f'{n}-{i}' for n in range(8) for i in range(50))
@@ -0,0 +1,224 @@
+"""
+Pruebas unitarias para el enrutamiento de modelos y la cascada
+"""
+
+import json
+from pathlib import Path
+from types import SimpleNamespace
+
+import pytest
+from unittest.mock import patch
+
+from framework.process import GeminiProcessor
+from framework.routing import ModelRouter, fit_thinking_budget
+from framework.end import model_breakdown
+
+
+@pytest.fixture
+def routing_config():
+    """Configuración con reglas y cascada activas"""
+    return {
+        'gemini': {
+            'model': 'gemini-2.5-pro',
+            'thinking_budget': -1,
+            'system_instruction': 'Eres un agente especializado en flujos de UiPath'
+        },
+        'routing': {
+            'enabled': True,
+            'rules': [{'model': 'gemini-2.5-flash', 'complexity': 'simple'}],
+            'cascade': {
+                'enabled': True,
+                'models': ['gemini-2.5-flash', 'gemini-2.5-pro'],
+                'min_response_chars': 20
+            }
+        }
+    }
+
+
+class TestModelRouter:
+    """Pruebas para la clase ModelRouter"""
+
+    def test_simple_prompt_goes_to_fast_model(self, routing_config):
+        """Un prompt corto sin palabras clave se enruta al modelo rápido y puede escalar"""
+        router = ModelRouter(routing_config)
+        transaction = {'prompt': 'Cómo leer un Excel', 'context': ''}
+
+        assert router.route(transaction) == 'gemini-2.5-flash'
+        assert router.chain(transaction) == ['gemini-2.5-flash', 'gemini-2.5-pro']
+
+    def test_complex_prompt_skips_fast_model(self, routing_config):
+        """Un prompt con palabras clave de complejidad va directo al modelo grande"""
+        router = ModelRouter(routing_config)
+        transaction = {'prompt': 'Diseña la integración con SAP', 'context': ''}
+
+        assert router.chain(transaction) == ['gemini-2.5-pro']
+
+    def test_row_model_column_wins(self, routing_config):
+        """La columna 'model' de la fila tiene prioridad y no escala"""
+        router = ModelRouter(routing_config)
+        transaction = {'prompt': 'Cómo leer un Excel', 'model': 'gemini-2.5-flash-lite'}
+
+        assert router.chain(transaction) == ['gemini-2.5-flash-lite']
+
+    def test_disabled_routing_uses_default_model(self):
+        """Sin sección 'routing' se mantiene el comportamiento original"""
+        router = ModelRouter({'gemini': {'model': 'gemini-2.5-pro'}})
+
+        assert router.chain({'prompt': 'Hola'}) == ['gemini-2.5-pro']
+
+
+class TestCascade:
+    """Pruebas de la cascada dentro de GeminiProcessor"""
+
+    @patch('framework.process.genai.Client')
+    def test_escalates_when_validation_fails(self, mock_client, routing_config):
+        """Una respuesta corta del modelo rápido escala al modelo grande"""
+        processor = GeminiProcessor(routing_config, {'gemini_api_key': 'test'})
+        responses = {'gemini-2.5-flash': 'corta', 'gemini-2.5-pro': 'Respuesta completa y detallada'}
+
+        with patch.object(processor, '_generate_with_gemini', side_effect=lambda p, m, o: responses[m]):
+            status, result = processor.process_transaction({'id': '1', 'prompt': 'Cómo leer un Excel'})
+
+        assert status == 'Success'
+        assert result['metadata']['model_used'] == 'gemini-2.5-pro'
+        assert result['metadata']['escalated'] is True
+        assert [a['model'] for a in result['metadata']['model_attempts']] == \
+            ['gemini-2.5-flash', 'gemini-2.5-pro']
+
+    @patch('framework.process.genai.Client')
+    def test_fast_answer_accepted(self, mock_client, routing_config):
+        """Si la respuesta rápida es válida no se llama al modelo grande"""
+        processor = GeminiProcessor(routing_config, {'gemini_api_key': 'test'})
+
+        with patch.object(processor, '_generate_with_gemini', return_value='Respuesta suficientemente larga') as gen:
+            status, result = processor.process_transaction({'id': '1', 'prompt': 'Cómo leer un Excel'})
+
+        assert result['metadata']['model_used'] == 'gemini-2.5-flash'
+        gen.assert_called_once()
+
+    def test_model_breakdown_in_report(self):
+        """El reporte agrega llamadas y latencia por modelo"""
+        results = [{'metadata': {'model_attempts': [
+            {'model': 'flash', 'latency_seconds': 1.0, 'accepted': False},
+            {'model': 'pro', 'latency_seconds': 3.0, 'accepted': True}]}},
+            {'metadata': {'model_attempts': [{'model': 'flash', 'latency_seconds': 2.0, 'accepted': True}]}}]
+
+        models = model_breakdown(results)
+
+        assert models['flash']['calls'] == 2
+        assert models['flash']['avg_latency_seconds'] == 1.5
+        assert models['pro']['accepted'] == 1
+
+
+class TestGenerationOptions:
+    """Pruebas para thinking budget y Google Search por transacción"""
+
+    @pytest.fixture
+    def generation_config(self, routing_config):
+        routing_config['generation'] = {
+            'templates': {
+                'default': {'thinking_budget': 1024, 'google_search': False},
+                'investigacion': {'thinking_budget': -1, 'google_search': True}
+            },
+            'rules': [{'when': {'keywords': ['novedades']}, 'google_search': True}]
+        }
+        return routing_config
+
+    def test_template_defaults(self, generation_config):
+        """La plantilla de la fila define los valores por defecto"""
+        router = ModelRouter(generation_config)
+
+        assert router.generation_options({'prompt': 'Hola'}) == \
+            {'template': 'default', 'thinking_budget': 1024, 'google_search': False, 'search_dropped': False}
+        assert router.generation_options({'prompt': 'Hola', 'template': 'investigacion'})['google_search'] is True
+
+    def test_rules_and_columns_override(self, generation_config):
+        """Las reglas sobrescriben la plantilla y las columnas del CSV sobrescriben todo"""
+        router = ModelRouter(generation_config)
+
+        assert router.generation_options({'prompt': 'Novedades de UiPath'})['google_search'] is True
+        options = router.generation_options(
+            {'prompt': 'Novedades de UiPath', 'google_search': 'no', 'thinking_budget': '0'})
+        assert options['google_search'] is False
+        assert options['thinking_budget'] == 0
+
+    @patch('framework.process.genai.Client')
+    def test_search_tool_is_opt_in(self, mock_client, generation_config):
+        """Sin google_search no se adjunta la herramienta de búsqueda"""
+        processor = GeminiProcessor(generation_config, {'gemini_api_key': 'test'})
+        stream = processor.client.models.generate_content_stream
+        stream.return_value = []
+
+        processor._generate_with_gemini('prompt', 'gemini-2.5-pro', {'thinking_budget': 0, 'google_search': False})
+        config = stream.call_args.kwargs['config']
+        assert not config.tools
+        assert config.thinking_config.thinking_budget == 0
+
+        processor._generate_with_gemini('prompt', 'gemini-2.5-pro', {'thinking_budget': 0, 'google_search': True})
+        assert len(stream.call_args.kwargs['config'].tools) == 1
+
+
+    @patch('framework.process.genai.Client')
+    def test_structured_output_drops_search(self, mock_client, generation_config):
+        """JSON mode y herramientas no se combinan: la fila se genera sin búsqueda y queda registrado"""
+        generation_config['gemini']['structured_output'] = True
+        processor = GeminiProcessor(generation_config, {'gemini_api_key': 'test'})
+        transaction = {'id': '1', 'prompt': 'Novedades del orquestador', 'template': 'investigacion'}
+
+        options = processor.router.generation_options(transaction)
+        assert (options['google_search'], options['search_dropped']) == (False, True)
+
+        sections = {'analysis': 'a', 'flow_diagram': 'b', 'steps': ['c'], 'considerations': [], 'exceptions': []}
+        stream = processor.client.models.generate_content_stream
+        stream.return_value = [SimpleNamespace(text=json.dumps(sections), usage_metadata=None)]
+        processor._generate_with_gemini('prompt', 'gemini-2.5-pro', {'thinking_budget': -1, 'google_search': True})
+        config = stream.call_args.kwargs['config']
+        assert not config.tools and config.response_mime_type == 'application/json'
+
+        result = processor._process_response(json.dumps(sections), transaction)
+        assert result.metadata['search_dropped'] is True and result.metadata['google_search'] is False
+
+
+class TestThinkingLimits:
+    """El thinking_budget resuelto siempre es válido para el modelo que lo recibe"""
+
+    def test_fit_to_model_ranges(self):
+        assert fit_thinking_budget('gemini-2.5-pro', 0) == 128
+        assert fit_thinking_budget('gemini-2.5-pro', -1) == -1
+        assert fit_thinking_budget('gemini-2.5-pro', 50000) == 32768
+        assert fit_thinking_budget('gemini-2.5-flash', 0) == 0
+        assert fit_thinking_budget('gemini-2.5-flash-lite', 100) == 512
+        assert fit_thinking_budget('modelo-nuevo', 0) == 0
+
+    def test_shipped_settings_keep_dynamic_thinking(self):
+        config = json.loads((Path(__file__).parent.parent / 'config' / 'settings.json').read_text(encoding='utf-8'))
+        short = {'id': '1', 'prompt': 'Automatizar el envío de un correo diario'}
+        long_prompt = {'id': '2', 'prompt': 'Integración con SAP ' + 'x' * 500}
+        router = ModelRouter(config)
+
+        assert router.chain(short) == ['gemini-2.5-pro']
+        assert router.generation_options(short)['thinking_budget'] == -1
+        assert router.generation_options(long_prompt)['thinking_budget'] == -1
+
+    def test_opt_in_simple_rule_uses_the_pro_minimum(self):
+        config = json.loads((Path(__file__).parent.parent / 'config' / 'settings.json').read_text(encoding='utf-8'))
+        config['generation']['rules'].insert(0, {'when': {'complexity': 'simple'}, 'thinking_budget': 0})
+        short = {'id': '1', 'prompt': 'Automatizar el envío de un correo diario'}
+        router = ModelRouter(config)
+
+        assert router.generation_options(short)['thinking_budget'] == 128
+        assert router.generation_options({**short, 'model': 'gemini-2.5-flash'})['thinking_budget'] == 0
+
+    @patch('framework.process.genai.Client')
+    def test_escalation_refits_the_budget(self, mock_client, routing_config):
+        routing_config['generation'] = {'rules': [{'when': {'complexity': 'simple'}, 'thinking_budget': 0}]}
+        processor = GeminiProcessor(routing_config, {'gemini_api_key': 'test'})
+        budgets = []
+
+        def call_model(prompt_text, model, options):
+            budgets.append((model, options['thinking_budget']))
+            return 'corta'
+        processor._call_model = call_model
+
+        processor._generate_routed('prompt', {'id': '1', 'prompt': 'Hola'})
+        assert budgets == [('gemini-2.5-flash', 0), ('gemini-2.5-pro', 128)]
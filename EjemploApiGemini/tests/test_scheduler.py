@@ -0,0 +1,69 @@
+"""
+Pruebas unitarias para el planificador de la cola
+"""
+
+import threading
+import time
+
+from framework import scheduler
+
+
+class TestScheduler:
+    """Pruebas para el orden de despacho y la estimación de costo"""
+
+    def test_parse_priority(self):
+        """Acepta bandas con nombre, enteros y valores vacíos"""
+        assert scheduler.parse_priority('High') == 0
+        assert scheduler.parse_priority('baja') == 2
+        assert scheduler.parse_priority('5') == 5
+        assert scheduler.parse_priority('') == scheduler.DEFAULT_PRIORITY
+        assert scheduler.parse_priority(None) == scheduler.DEFAULT_PRIORITY
+
+    def test_estimate_cost_grows_with_input_and_output_type(self):
+        """Prompts más largos y salidas tipo diagrama cuestan más"""
+        short = {'prompt': 'Corto', 'expected_output': ''}
+        long = {'prompt': 'Largo ' * 200, 'expected_output': ''}
+        diagram = {'prompt': 'Corto', 'expected_output': 'Diagrama de flujo'}
+
+        assert scheduler.estimate_cost(long, {}) > scheduler.estimate_cost(short, {})
+        assert scheduler.estimate_cost(diagram, {}) > scheduler.estimate_cost(short, {})
+
+    def test_schedule_orders_by_priority_then_longest_first(self):
+        """Dentro de cada banda se despacha primero el elemento más costoso"""
+        queue = [
+            {'id': '1', 'prompt': 'a' * 10},
+            {'id': '2', 'prompt': 'a' * 500},
+            {'id': '3', 'prompt': 'a' * 10, 'priority': 'High'},
+            {'id': '4', 'prompt': 'a' * 5000, 'priority': 'Low'},
+        ]
+
+        order = [item['id'] for item, _ in scheduler.schedule(queue, {})]
+
+        assert order == ['3', '2', '1', '4']
+
+    def test_dispatch_bounds_in_flight_items(self):
+        """Nunca hay más elementos en vuelo que workers y on_done corre en el hilo llamador"""
+        lock = threading.Lock()
+        state = {'in_flight': 0, 'max': 0}
+        done_threads = set()
+
+        def handler(item):
+            with lock:
+                state['in_flight'] += 1
+                state['max'] = max(state['max'], state['in_flight'])
+            time.sleep(0.01)
+            with lock:
+                state['in_flight'] -= 1
+            return item * 2
+
+        results = []
+
+        def on_done(item, outcome):
+            done_threads.add(threading.current_thread())
+            results.append(outcome)
+
+        scheduler.dispatch(range(20), handler, on_done, workers=3)
+
+        assert sorted(results) == [i * 2 for i in range(20)]
+        assert state['max'] <= 3
+        assert done_threads == {threading.current_thread()}
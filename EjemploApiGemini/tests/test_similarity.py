@@ -0,0 +1,114 @@
+"""
+Pruebas unitarias para la caché de prompts casi duplicados
+"""
+
+import time
+from types import SimpleNamespace
+from unittest.mock import patch
+
+import pytest
+
+from framework import similarity
+from framework.process import GeminiProcessor
+from framework.stats import RunStats
+
+CONTEXT = 'Sistema ERP con interfaz web y aprobaciones por correo'
+
+
+@pytest.fixture(autouse=True)
+def clean_cache():
+    similarity.reset()
+    yield
+    similarity.reset()
+
+
+@pytest.fixture
+def cache():
+    return similarity.SimilarityCache(threshold=0.75)
+
+
+class TestSimilarityCache:
+    """Paráfrasis, scope, límite de memoria y persistencia"""
+
+    def test_paraphrase_hits_and_other_scope_misses(self, cache):
+        cache.add('Automatizar facturación mensual de clientes', 'scope', 'respuesta',
+                  {'transaction_id': '1', 'model': 'm'})
+
+        hit = cache.lookup('Automatizar la facturación mensual de los clientes nuevos', 'scope')
+        assert hit['response'] == 'respuesta'
+        assert hit['source'] == {'transaction_id': '1', 'model': 'm'}
+        assert 0.75 <= hit['similarity'] < 1
+
+        assert cache.lookup('Automatizar conciliación bancaria de clientes', 'scope') is None
+        assert cache.lookup('Automatizar facturación mensual de clientes', 'otro scope') is None
+        assert cache.summary()['hits'] == 1
+
+    def test_entries_are_bounded(self):
+        cache = similarity.SimilarityCache(max_entries=2)
+        for i in range(3):
+            cache.add(f'pedido número {i} sobre conciliación bancaria diaria', 's', str(i), {'transaction_id': str(i)})
+        assert len(cache._entries) == 2
+        assert cache.lookup('pedido número 0 sobre conciliación bancaria diaria', 's') is None
+        assert cache.lookup('pedido número 2 sobre conciliación bancaria diaria', 's')['response'] == '2'
+
+    def test_index_survives_restart(self, tmp_path):
+        path = str(tmp_path / 'similar.jsonl')
+        similarity.SimilarityCache(path=path).add('leer correos entrantes y clasificar adjuntos', 's', 'ok',
+                                                  {'transaction_id': '7'})
+        hit = similarity.SimilarityCache(path=path).lookup('Leer los correos entrantes y clasificar adjuntos', 's')
+        assert hit['source']['transaction_id'] == '7'
+
+    def test_lookup_is_fast_with_many_entries(self, cache):
+        for i in range(2000):
+            cache.add(f'Automatizar tarea {i} del área {i % 37}', 's', 'r',
+                      {'transaction_id': str(i)})
+        started = time.perf_counter()
+        for i in range(200):
+            cache.lookup(f'Automatizar la tarea {i} del área {i % 37}', 's')
+        assert (time.perf_counter() - started) / 200 < 0.002
+
+
+class TestProcessorIntegration:
+    """La segunda paráfrasis no llama a la API y queda marcada en la metadata"""
+
+    @patch('framework.process.genai.Client')
+    def test_hit_is_flagged_in_metadata(self, mock_client):
+        config = {'gemini': {'model': 'gemini-2.5-flash', 'thinking_budget': 0, 'system_instruction': 'x'},
+                  'similarity_cache': {'enabled': True, 'path': None, 'threshold': 0.75}}
+        processor = GeminiProcessor(config, {'gemini_api_key': 'test'})
+        generate = processor.client.models.generate_content_stream
+        generate.return_value = [SimpleNamespace(text='Flujo de facturación', usage_metadata=None)]
+
+        _, first = processor.process_transaction(
+            {'id': '1', 'prompt': 'Automatizar la facturación de clientes', 'context': CONTEXT})
+        status, second = processor.process_transaction(
+            {'id': '2', 'prompt': 'Automatizar facturación a los clientes', 'context': CONTEXT})
+
+        assert status == 'Success'
+        assert generate.call_count == 1
+        assert first.metadata['cache_hit'] is None
+        assert second.generated_response == 'Flujo de facturación'
+        assert second.metadata['cache_hit']['transaction_id'] == '1'
+        assert second.model_used == 'gemini-2.5-flash'
+        assert RunStats.from_results([first, second]).report()['models']['gemini-2.5-flash']['calls'] == 1
+
+    @patch('framework.process.genai.Client')
+    def test_long_shared_context_does_not_make_different_prompts_similar(self, mock_client):
+        config = {'gemini': {'model': 'gemini-2.5-flash', 'thinking_budget': 0, 'system_instruction': 'x'},
+                  'similarity_cache': {'enabled': True, 'path': None}}
+        processor = GeminiProcessor(config, {'gemini_api_key': 'test'})
+        generate = processor.client.models.generate_content_stream
+        generate.return_value = [SimpleNamespace(text='respuesta', usage_metadata=None)]
+        context = ' '.join(f'módulo{i} del ERP corporativo con aprobaciones y auditoría' for i in range(40))
+
+        processor.process_transaction(
+            {'id': '1', 'prompt': 'Automatizar la conciliación de facturas de proveedores', 'context': context})
+        _, second = processor.process_transaction(
+            {'id': '2', 'prompt': 'Automatizar el envío de recordatorios de pago a clientes morosos',
+             'context': context})
+        _, third = processor.process_transaction(
+            {'id': '3', 'prompt': 'Automatizar la conciliación de facturas de proveedores', 'context': 'Portal SAP'})
+
+        assert generate.call_count == 3
+        assert second.metadata['cache_hit'] is None
+        assert third.metadata['cache_hit'] is None
@@ -0,0 +1,185 @@
+"""
+Prueba de resistencia (soak) y de fugas de memoria para corridas largas
+
+Empuja 100k+ transacciones sintéticas por main.main() completo contra un cliente
+de Gemini simulado y mide tracemalloc y RSS cada 10k elementos. Falla si el
+crecimiento por cada 10k elementos supera el umbral e informa los sitios que más
+memoria acumularon (resultados, loggers, clientes...)
+
+Es lenta, así que solo corre con SOAK_TEST=1:
+    SOAK_TEST=1 python -m pytest tests/test_soak.py -s
+
+Variables opcionales: SOAK_ITEMS (100000), SOAK_WORKERS (4), SOAK_CHECKPOINT (10000),
+SOAK_MAX_GROWTH_KB (256, tracemalloc por checkpoint), SOAK_MAX_RSS_GROWTH_KB (2048),
+SOAK_TOP (15) y SOAK_FRAMES (1, profundidad de traceback de tracemalloc)
+"""
+
+import csv
+import json
+import os
+import shutil
+import sys
+import threading
+import time
+import tracemalloc
+from pathlib import Path
+from types import SimpleNamespace
+from unittest.mock import patch
+
+import pytest
+
+import main
+from framework import circuit_breaker
+
+pytestmark = pytest.mark.skipif(not os.environ.get('SOAK_TEST'),
+                                reason="Prueba de resistencia: activar con SOAK_TEST=1")
+
+ITEMS = int(os.environ.get('SOAK_ITEMS', 100_000))
+WORKERS = int(os.environ.get('SOAK_WORKERS', 4))
+CHECKPOINT = int(os.environ.get('SOAK_CHECKPOINT', 10_000))
+MAX_GROWTH_KB = float(os.environ.get('SOAK_MAX_GROWTH_KB', 256))
+MAX_RSS_GROWTH_KB = float(os.environ.get('SOAK_MAX_RSS_GROWTH_KB', 2048))
+TOP = int(os.environ.get('SOAK_TOP', 15))
+FRAMES = int(os.environ.get('SOAK_FRAMES', 1))
+
+CONFIG_DIR = Path(__file__).resolve().parent.parent / 'config'
+RESPONSE = ("1. **Análisis:** proceso de lectura de facturas.\n"
+            "2. **Pasos:** abrir el archivo, recorrer las filas y registrar el resultado.\n") * 4
+
+# Trazas de tracemalloc que no son del proceso medido
+IGNORED_FILES = (tracemalloc.__file__, '<frozen importlib._bootstrap>', '<unknown>')
+
+
+def current_rss() -> int:
+    """RSS actual en bytes; 0 si la plataforma no permite medirlo"""
+    try:
+        import psutil
+        return psutil.Process().memory_info().rss
+    except ImportError:
+        pass
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, AttributeError):
+        return 0
+
+
+def growth_per_checkpoint(samples):
+    """Pendiente (mínimos cuadrados) de la memoria en bytes por cada CHECKPOINT elementos"""
+    n = len(samples)
+    if n < 2:
+        return 0.0
+    xs = [count / CHECKPOINT for count, _ in samples]
+    ys = [value for _, value in samples]
+    mean_x, mean_y = sum(xs) / n, sum(ys) / n
+    var = sum((x - mean_x) ** 2 for x in xs)
+    return sum((x - mean_x) * (y - mean_y) for x, y in zip(xs, ys)) / var if var else 0.0
+
+
+class MemoryMonitor:
+    """Toma una muestra de tracemalloc y RSS cada CHECKPOINT llamadas al cliente"""
+
+    def __init__(self):
+        self.calls = 0
+        self.samples = []  # (elementos, memoria trazada, rss, segundos)
+        self.baseline = None
+        self.started = time.perf_counter()
+        self._lock = threading.Lock()
+
+    def tick(self) -> None:
+        with self._lock:
+            self.calls += 1
+            if self.calls % CHECKPOINT:
+                return
+            traced, _ = tracemalloc.get_traced_memory()
+            self.samples.append((self.calls, traced, current_rss(), time.perf_counter() - self.started))
+            # El primer checkpoint es el calentamiento (imports, cachés, pools); se compara desde ahí
+            if self.baseline is None:
+                self.baseline = tracemalloc.take_snapshot()
+
+    def top_allocations(self):
+        """Sitios que más crecieron desde el primer checkpoint"""
+        snapshot = tracemalloc.take_snapshot()
+        filters = [tracemalloc.Filter(False, name) for name in IGNORED_FILES]
+        baseline = (self.baseline or snapshot).filter_traces(filters)
+        stats = snapshot.filter_traces(filters).compare_to(baseline, 'lineno')
+        return [stat for stat in stats if stat.size_diff > 0][:TOP]
+
+    def report(self, top) -> str:
+        lines = ["", f"{'elementos':>10} {'tracemalloc KB':>15} {'RSS KB':>10} {'segundos':>9}"]
+        lines += [f"{count:>10} {traced / 1024:>15.0f} {rss / 1024:>10.0f} {seconds:>9.1f}"
+                  for count, traced, rss, seconds in self.samples]
+        lines.append(f"Principales sitios de asignación desde el checkpoint {CHECKPOINT}:")
+        lines += [f"  {stat.size_diff / 1024:+10.1f} KB {stat.count_diff:+8d} bloques  {stat.traceback}"
+                  for stat in top]
+        return '\n'.join(lines)
+
+
+class FakeModels:
+    def __init__(self, monitor):
+        self.monitor = monitor
+
+    def generate_content_stream(self, model, contents, config):
+        self.monitor.tick()
+        return iter([SimpleNamespace(text=RESPONSE[i:i + 64]) for i in range(0, len(RESPONSE), 64)])
+
+
+@pytest.fixture
+def workspace(tmp_path, monkeypatch):
+    """Configuración real con ITEMS transacciones sintéticas en un directorio temporal"""
+    shutil.copytree(CONFIG_DIR, tmp_path / 'config')
+    settings_path = tmp_path / 'config' / 'settings.json'
+    settings = json.loads(settings_path.read_text(encoding='utf-8'))
+    settings['processing']['workers'] = WORKERS
+    settings['logging']['quiet'] = True
+    settings_path.write_text(json.dumps(settings), encoding='utf-8')
+
+    input_path = tmp_path / 'data' / 'input' / 'prompts.csv'
+    input_path.parent.mkdir(parents=True)
+    with open(input_path, 'w', newline='', encoding='utf-8') as f:
+        writer = csv.writer(f)
+        writer.writerow(['id', 'prompt', 'context', 'expected_output'])
+        for i in range(ITEMS):
+            writer.writerow([f"T{i:07d}", f"Automatizar la conciliación de facturas del lote {i}",
+                             'Facturas en Excel con columnas fecha, monto y proveedor', 'Pasos detallados'])
+
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setenv('GEMINI_API_KEY', 'soak')
+    circuit_breaker.reset()
+    yield tmp_path
+    circuit_breaker.reset()
+
+
+def test_memory_is_flat_over_long_run(workspace, capsys):
+    monitor = MemoryMonitor()
+    models = FakeModels(monitor)
+    tracemalloc.start(FRAMES)
+    try:
+        with patch('framework.process.genai.Client', lambda api_key: SimpleNamespace(models=models)):
+            main.main(['--quiet'])
+        top = monitor.top_allocations()
+    finally:
+        tracemalloc.stop()
+
+    report = monitor.report(top)
+    with capsys.disabled():
+        print(report, file=sys.stderr)
+
+    assert monitor.calls == ITEMS
+    # Sin el checkpoint de calentamiento
+    measured = monitor.samples[1:]
+    assert len(measured) >= 2, "Se necesitan al menos 3 checkpoints: subir SOAK_ITEMS o bajar SOAK_CHECKPOINT"
+
+    traced_growth = growth_per_checkpoint([(count, traced) for count, traced, _, _ in measured]) / 1024
+    assert traced_growth <= MAX_GROWTH_KB, (
+        f"tracemalloc crece {traced_growth:.1f} KB cada {CHECKPOINT} elementos "
+        f"(máximo {MAX_GROWTH_KB} KB)" + report)
+
+    if measured[0][2]:
+        rss_growth = growth_per_checkpoint([(count, rss) for count, _, rss, _ in measured]) / 1024
+        assert rss_growth <= MAX_RSS_GROWTH_KB, (
+            f"RSS crece {rss_growth:.1f} KB cada {CHECKPOINT} elementos "
+            f"(máximo {MAX_RSS_GROWTH_KB} KB)" + report)
+
+    with open(workspace / 'data' / 'output' / 'results.csv', encoding='utf-8', newline='') as f:
+        assert sum(1 for _ in csv.DictReader(f)) == ITEMS
@@ -0,0 +1,88 @@
+"""
+Pruebas unitarias para los agregadores en streaming del reporte
+"""
+
+import json
+import random
+
+from framework import end
+from framework.models import Result
+from framework.stats import QuantileSketch, RunStats
+
+
+class TestQuantileSketch:
+    """Pruebas para el sketch de cuantiles"""
+
+    def test_relative_error_is_bounded(self):
+        """Los cuantiles quedan dentro del error relativo configurado"""
+        rng = random.Random(7)
+        values = [rng.lognormvariate(1.5, 0.8) for _ in range(20000)]
+        sketch = QuantileSketch(relative_accuracy=0.01)
+        for value in values:
+            sketch.add(value)
+
+        values.sort()
+        for q in (0.5, 0.9, 0.99):
+            exact = values[int(q * (len(values) - 1))]
+            assert abs(sketch.quantile(q) - exact) / exact < 0.02
+        assert len(sketch.buckets) < 500
+
+    def test_bucket_limit(self):
+        """Con max_buckets la memoria queda acotada aunque el rango sea enorme"""
+        sketch = QuantileSketch(max_buckets=16)
+        for exponent in range(-5, 30):
+            sketch.add(10 ** exponent)
+
+        assert len(sketch.buckets) <= 16
+        assert abs(sketch.quantile(1.0) - sketch.max) / sketch.max < 0.01
+
+    def test_collapsed_tail_absorbs_lower_values(self):
+        """Tras colapsar, los valores más bajos caen en el bucket piso sin crear buckets nuevos"""
+        sketch = QuantileSketch(max_buckets=16)
+        for exponent in range(30, -10, -1):
+            sketch.add(10 ** exponent)
+            sketch.add(10 ** exponent)
+
+        assert len(sketch.buckets) == len(sketch._keys) <= 16
+        assert sum(sketch.buckets.values()) + sketch.zeros == sketch.count == 80
+        assert abs(sketch.quantile(1.0) - 1e30) / 1e30 < 0.01
+
+    def test_empty(self):
+        assert QuantileSketch().to_dict() == {'count': 0}
+
+
+class TestRunStats:
+    """Pruebas para las estadísticas de la ejecución"""
+
+    def test_breakdowns_and_errors(self):
+        """Agrupa por modelo y plantilla, cuenta escalamientos y errores por tipo"""
+        stats = RunStats()
+        stats.add_result(Result('1', 'p', 'x' * 100, model_used='pro', template='diagrama', latency_seconds=4.0,
+                                model_attempts=[{'model': 'flash', 'latency_seconds': 1.0, 'accepted': False},
+                                                {'model': 'pro', 'latency_seconds': 3.0, 'accepted': True}]))
+        stats.add_result({'generated_response': 'y' * 50, 'metadata': {
+            'model_attempts': [{'model': 'flash', 'latency_seconds': 2.0, 'accepted': True}]}})
+        stats.add_failure('SystemException')
+        stats.add_failed_item({'id': '9', 'error_type': 'BusinessException'})
+
+        report = stats.report()
+        assert (stats.successful, stats.failed, stats.escalated) == (2, 2, 1)
+        assert report['errors'] == {'SystemException': 1, 'BusinessException': 1}
+        assert report['models']['flash']['calls'] == 2
+        assert report['models']['flash']['avg_latency_seconds'] == 1.5
+        assert report['generation']['by_template']['diagrama']['calls'] == 2
+        assert report['response_length']['max'] == 100
+
+    def test_report_from_streamed_results(self, tmp_path):
+        """save_results alimenta las estadísticas mientras escribe el CSV"""
+        config = {'paths': {'output_data': str(tmp_path / 'results.csv'), 'logs': str(tmp_path)}}
+        stats = RunStats()
+        results = (Result(str(i), 'p', 'r' * i, model_used='pro') for i in range(1, 101))
+
+        end.save_results(results, config, stats)
+        end.save_report(stats, None, config)
+
+        report = json.loads((tmp_path / 'execution_report.json').read_text(encoding='utf-8'))
+        assert report['execution_summary']['successful_items'] == 100
+        assert abs(report['response_length']['p50'] - 50) <= 1
+        assert len((tmp_path / 'results.csv').read_text(encoding='utf-8').splitlines()) == 101
@@ -0,0 +1,97 @@
+"""
+Pruebas unitarias para la salida estructurada en JSON
+"""
+
+import csv
+import json
+from types import SimpleNamespace
+from unittest.mock import patch
+
+import pytest
+
+from framework import end
+from framework.process import GeminiProcessor
+from framework.structured import StreamingJsonValidator, StructuredOutputError
+
+SECTIONS = {
+    'analysis': 'Proceso de lectura de facturas',
+    'flow_diagram': 'Inicio -> Leer Excel -> Fin',
+    'steps': ['Abrir el archivo', 'Recorrer filas'],
+    'considerations': ['Usar Workbook activities'],
+    'exceptions': ['Archivo bloqueado: reintentar']
+}
+
+
+def chunked(text, size=7):
+    return [SimpleNamespace(text=text[i:i + size]) for i in range(0, len(text), size)]
+
+
+class TestStreamingJsonValidator:
+    """Pruebas para la validación incremental"""
+
+    def test_valid_stream(self):
+        validator = StreamingJsonValidator()
+        for chunk in chunked(json.dumps(SECTIONS, ensure_ascii=False)):
+            validator.feed(chunk.text)
+
+        assert validator.result() == SECTIONS
+
+    @pytest.mark.parametrize('first_chunk', ['Aquí tienes el JSON', '{"steps": [}', '{} {'])
+    def test_rejects_in_the_offending_chunk(self, first_chunk):
+        """Los errores estructurales se detectan sin esperar el final del streaming"""
+        with pytest.raises(StructuredOutputError):
+            StreamingJsonValidator().feed(first_chunk)
+
+    def test_braces_inside_strings_are_ignored(self):
+        validator = StreamingJsonValidator()
+        validator.feed('{"analysis": "usa } y \\" dentro", ')
+        with pytest.raises(StructuredOutputError, match='incompleto'):
+            validator.result()
+
+    def test_missing_or_mistyped_section(self):
+        validator = StreamingJsonValidator()
+        validator.feed(json.dumps({**SECTIONS, 'steps': 'uno, dos'}))
+        with pytest.raises(StructuredOutputError, match="'steps'"):
+            validator.result()
+
+
+class TestStructuredProcessing:
+    """Integración con GeminiProcessor y el CSV de resultados"""
+
+    @pytest.fixture
+    def config(self, tmp_path):
+        return {
+            'gemini': {'model': 'gemini-2.5-pro', 'thinking_budget': 0, 'system_instruction': 'x',
+                       'structured_output': True},
+            'paths': {'output_data': str(tmp_path / 'results.csv')}
+        }
+
+    @patch('framework.process.genai.Client')
+    def test_sections_flow_to_result_columns(self, mock_client, config, tmp_path):
+        processor = GeminiProcessor(config, {'gemini_api_key': 'test'})
+        stream = processor.client.models.generate_content_stream
+        stream.return_value = chunked(json.dumps(SECTIONS, ensure_ascii=False))
+
+        status, result = processor.process_transaction({'id': '1', 'prompt': 'Cómo leer un Excel'})
+
+        request_config = stream.call_args.kwargs['config']
+        assert request_config.response_mime_type == 'application/json'
+        assert request_config.response_schema.required == list(SECTIONS)
+        assert status == 'Success'
+        assert result.sections == SECTIONS
+
+        end.save_results([result], config)
+        with open(tmp_path / 'results.csv', encoding='utf-8', newline='') as f:
+            row = next(csv.DictReader(f))
+        assert row['flow_diagram'] == SECTIONS['flow_diagram']
+        assert row['steps'] == 'Abrir el archivo\nRecorrer filas'
+
+    @patch('framework.process.genai.Client')
+    def test_invalid_json_is_business_error(self, mock_client, config):
+        processor = GeminiProcessor(config, {'gemini_api_key': 'test'})
+        processor.client.models.generate_content_stream.return_value = chunked('1. Análisis: ...')
+
+        status, message = processor.process_transaction({'id': '1', 'prompt': 'Cómo leer un Excel'})
+
+        assert status == 'BusinessException'
+        assert 'objeto JSON' in message
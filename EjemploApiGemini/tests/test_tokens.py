@@ -0,0 +1,152 @@
+"""
+Pruebas unitarias para el uso de tokens, el presupuesto y la verificación previa
+"""
+
+import csv
+import json
+import logging
+from types import SimpleNamespace
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+import main
+from framework import tokens
+from framework.models import Result
+from framework.process import GeminiProcessor
+from framework.stats import RunStats
+
+
+def usage(prompt, output, thoughts=0, cached=0):
+    return SimpleNamespace(prompt_token_count=prompt, candidates_token_count=output,
+                           thoughts_token_count=thoughts, cached_content_token_count=cached,
+                           total_token_count=prompt + output + thoughts)
+
+
+@pytest.fixture(autouse=True)
+def clean_budget():
+    tokens.reset()
+    yield
+    tokens.reset()
+
+
+class TestUsageAccounting:
+    """usage_metadata del streaming -> metadata del resultado -> reporte"""
+
+    @patch('framework.process.genai.Client')
+    def test_usage_flows_to_result_and_report(self, mock_client):
+        config = {'gemini': {'model': 'gemini-2.5-flash', 'thinking_budget': 0, 'system_instruction': 'x'},
+                  'tokens': {'budget': 10_000}}
+        processor = GeminiProcessor(config, {'gemini_api_key': 'test'})
+        # El conteo es acumulado: solo vale el último chunk que lo trae
+        processor.client.models.generate_content_stream.return_value = [
+            SimpleNamespace(text='Hola ', usage_metadata=usage(120, 2)),
+            SimpleNamespace(text='mundo', usage_metadata=usage(120, 30, thoughts=50, cached=100)),
+            SimpleNamespace(text='', usage_metadata=None)
+        ]
+
+        status, result = processor.process_transaction({'id': '1', 'prompt': 'Cómo leer un Excel'})
+
+        assert status == 'Success'
+        assert result.metadata['usage'] == {'prompt_tokens': 120, 'cached_tokens': 100, 'thoughts_tokens': 50,
+                                            'output_tokens': 30, 'total_tokens': 200}
+        assert tokens.active_budget().used == 200
+
+        result.latency_seconds = 2.0
+        report = RunStats.from_results([result]).report()
+        assert report['tokens']['total_tokens'] == 200
+        assert report['tokens']['output_tokens_per_second'] == 40.0
+        assert report['models']['gemini-2.5-flash']['total_tokens'] == 200
+
+
+class TestTokenBudget:
+    """El presupuesto corta el despacho; lo no despachado queda contado en el reporte"""
+
+    def test_dispatch_stops_when_budget_is_spent(self, tmp_path, monkeypatch):
+        config = {
+            'processing': {'workers': 1},
+            'scheduler': {'calibration_file': None},
+            'tokens': {'budget': 250},
+            'paths': {'input_data': 'data/input/prompts.csv', 'output_data': 'data/output/results.csv',
+                      'logs': 'data/output/'}
+        }
+        (tmp_path / 'config').mkdir()
+        (tmp_path / 'config' / 'settings.json').write_text(json.dumps(config), encoding='utf-8')
+        monkeypatch.chdir(tmp_path)
+        queue = [{'id': str(i), 'prompt': f'Prompt número {i}'} for i in range(5)]
+
+        def fake_run(transaction, config):
+            tokens.get_budget(config).add(100)
+            return 'Success', Result(transaction['id'], transaction['prompt'], 'ok',
+                                     usage={'total_tokens': 100})
+        monkeypatch.setattr(main.process, 'run', fake_run)
+
+        summary = main.run_csv_queue(config, logging.getLogger('test'), {'line_mode': True}, queue=queue)
+
+        assert summary == (5, 3, 0)
+        with open('data/output/results.csv', encoding='utf-8', newline='') as f:
+            assert len(list(csv.DictReader(f))) == 3
+        with open('data/output/execution_report.json', encoding='utf-8') as f:
+            report = json.load(f)
+        assert report['token_budget'] == {'limit': 250, 'used': 300, 'exhausted': True, 'skipped_items': 2}
+        assert report['execution_summary']['total_tokens'] == 300
+
+
+class TestPromptPreflight:
+    """Rechazo de prompts demasiado grandes antes de despachar"""
+
+    def test_only_long_prompts_are_counted(self):
+        client = MagicMock()
+        client.models.count_tokens.return_value = SimpleNamespace(total_tokens=80)
+        preflight = tokens.PromptPreflight(client, 'gemini-2.5-pro', max_prompt_tokens=50)
+
+        preflight.check('corto')
+        assert preflight.counted == 0
+
+        with pytest.raises(tokens.PromptTooLargeError, match='80 tokens'):
+            preflight.check('x' * 60)
+        client.models.count_tokens.assert_called_once_with(model='gemini-2.5-pro', contents='x' * 60)
+
+    def test_multibyte_prompts_are_counted_with_the_real_call_settings(self):
+        """Emoji y CJK pueden ser más tokens que caracteres: el atajo usa bytes, no caracteres"""
+        client = MagicMock()
+        client.models.count_tokens.return_value = SimpleNamespace(total_tokens=80)
+        preflight = tokens.PromptPreflight(client, 'gemini-2.5-pro', max_prompt_tokens=60,
+                                           system_instruction='Eres un agente', route=lambda t: t['model'])
+
+        preflight.check('🤖' * 10, {'model': 'gemini-2.5-flash'})
+        assert preflight.counted == 0
+        with pytest.raises(tokens.PromptTooLargeError, match='gemini-2.5-flash'):
+            preflight.check('自動化' * 10, {'model': 'gemini-2.5-flash'})
+        client.models.count_tokens.assert_called_once_with(model='gemini-2.5-flash',
+                                                           contents=['Eres un agente', '自動化' * 10])
+
+    def test_count_errors_do_not_block(self):
+        client = MagicMock()
+        client.models.count_tokens.side_effect = ConnectionError('caído')
+        tokens.PromptPreflight(client, 'gemini-2.5-pro', max_prompt_tokens=10).check('x' * 60)
+
+    def test_rejected_item_never_reaches_a_worker(self, tmp_path, monkeypatch):
+        config = {'processing': {'workers': 2}, 'scheduler': {'calibration_file': None},
+                  'paths': {'output_data': str(tmp_path / 'results.csv'), 'logs': str(tmp_path)}}
+
+        def check(prompt_text, transaction=None):
+            if 'enorme' in prompt_text:
+                raise tokens.PromptTooLargeError('demasiado grande')
+
+        preflight = SimpleNamespace(check=check)
+        monkeypatch.setattr(main.process, 'create_preflight', lambda config: preflight)
+        monkeypatch.setattr(main.end, 'run', lambda **kwargs: None)
+        processed = []
+        monkeypatch.setattr(main.process, 'run', lambda t, c: processed.append(t['id']) or
+                            ('Success', Result(t['id'], t['prompt'], 'ok')))
+
+        queue = [{'id': '1', 'prompt': 'Prompt normal'}, {'id': '2', 'prompt': 'Prompt enorme'}]
+        summary = main.run_csv_queue(config, logging.getLogger('test'), {'line_mode': True}, queue=queue)
+
+        assert processed == ['1']
+        assert summary == (2, 1, 1)
+        with open(tmp_path / 'results_failed.csv', encoding='utf-8', newline='') as f:
+            failed = list(csv.DictReader(f))
+        assert [row['id'] for row in failed] == ['2']
+        assert failed[0]['error_type'] == 'BusinessException'
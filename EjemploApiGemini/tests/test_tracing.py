@@ -0,0 +1,92 @@
+"""
+Pruebas unitarias para los spans muestreados y el volcado de perfiles
+"""
+
+import json
+import pstats
+import threading
+from types import SimpleNamespace
+from unittest.mock import patch
+
+from framework import tracing
+from framework.process import GeminiProcessor
+from framework.tracing import Profiler, Tracer
+
+
+class TestTracer:
+    """Pruebas para Tracer"""
+
+    def test_spans_only_for_sampled_transactions(self):
+        """Sin muestreo no se registra nada; con muestreo completo se registra cada etapa"""
+        idle = Tracer(sample_rate=0)
+        with idle.transaction('1'), idle.span('prepare_prompt'):
+            pass
+        assert idle.events == []
+
+        tracer = Tracer(sample_rate=1.0)
+        with tracer.transaction('1', queued_at=tracer.origin):
+            with tracer.span('generate', model='flash') as args:
+                args['chunks'] = 3
+        names = [event['name'] for event in tracer.events]
+        assert names == ['queue_wait', 'generate', 'transaction']
+        assert tracer.events[1]['args'] == {'model': 'flash', 'chunks': 3}
+        assert all(event['ph'] == 'X' and event['dur'] >= 0 for event in tracer.events)
+
+    def test_max_events(self):
+        tracer = Tracer(sample_rate=1.0, max_events=2)
+        for _ in range(3):
+            tracer.instant('retry')
+        assert len(tracer.events) == 2 and tracer.dropped == 1
+
+    def test_chrome_trace_export(self, tmp_path):
+        tracer = Tracer(sample_rate=1.0)
+        tracer.instant('retry', id='7')
+        tracer.write(str(tmp_path / 'trace.json'))
+
+        trace = json.loads((tmp_path / 'trace.json').read_text(encoding='utf-8'))
+        assert trace['traceEvents'][0]['name'] == 'retry'
+        assert trace['displayTimeUnit'] == 'ms'
+
+
+class TestProfiling:
+    """Perfilado de la ejecución completa"""
+
+    def test_profiler_merges_worker_threads(self, tmp_path):
+        """Los perfiles del hilo principal y de los workers se combinan en un volcado"""
+        profiler = Profiler()
+        profiler.start()
+
+        def busy():
+            return sum(range(1000))
+
+        def work():
+            with profiler.worker():
+                busy()
+        thread = threading.Thread(target=work)
+        thread.start()
+        thread.join()
+        profiler.stop()
+
+        profiler.dump(str(tmp_path / 'profile.pstats'))
+        stats = pstats.Stats(str(tmp_path / 'profile.pstats'))
+        assert any(function[2] == 'busy' for function in stats.stats)
+
+    @patch('framework.process.genai.Client')
+    def test_process_transaction_stages(self, mock_client, tmp_path):
+        """process_transaction emite spans de preparación, generación, streaming y respuesta"""
+        config = {'gemini': {'model': 'gemini-2.5-pro', 'thinking_budget': 0, 'system_instruction': 'x'},
+                  'profiling': {'sample_rate': 1.0, 'trace_file': str(tmp_path / 'trace.json'),
+                                'pstats_file': str(tmp_path / 'profile.pstats')}}
+        tracer = tracing.configure(config)
+        processor = GeminiProcessor(config, {'gemini_api_key': 'test'})
+        processor.client.models.generate_content_stream.return_value = [SimpleNamespace(text='Hola')]
+
+        with tracer.transaction('1'):
+            status, _ = processor.process_transaction({'id': '1', 'prompt': 'Cómo leer un Excel'})
+        paths = tracing.finish(config)
+
+        assert status == 'Success'
+        names = [event['name'] for event in tracer.events]
+        assert names == ['prepare_prompt', 'stream', 'generate', 'process_response', 'transaction']
+        assert 'first_chunk_seconds' in tracer.events[1]['args']
+        assert 'trace' in paths
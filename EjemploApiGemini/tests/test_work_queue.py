@@ -0,0 +1,201 @@
+"""
+Pruebas unitarias para la cola de trabajo SQLite
+"""
+
+import csv
+import logging
+import threading
+import time
+
+import pytest
+
+import main
+from framework import work_queue
+from framework.models import Result
+from framework.work_queue import LeaseHeartbeat, WorkQueue
+
+
+@pytest.fixture
+def queue(tmp_path):
+    """Cola con tres elementos importados"""
+    wq = WorkQueue(str(tmp_path / 'queue.db'), lease_timeout=60, max_retries=1)
+    wq.import_items([
+        {'id': '1', 'prompt': 'Prompt uno'},
+        {'id': '2', 'prompt': 'Prompt dos'},
+        {'id': '3', 'prompt': 'Prompt tres'},
+    ])
+    return wq
+
+
+class TestWorkQueue:
+    """Pruebas para la clase WorkQueue"""
+
+    def test_import_ignores_existing_ids(self, queue):
+        """Reimportar el mismo CSV no duplica elementos"""
+        inserted = queue.import_items([{'id': '1', 'prompt': 'Otro'}, {'id': '4', 'prompt': 'Nuevo'}])
+
+        assert inserted == 1
+        assert queue.counts()[work_queue.NEW] == 4
+
+    def test_lease_ack_flow(self, queue):
+        """Un elemento arrendado y confirmado queda como Successful con su resultado"""
+        item = queue.lease('runner-a')
+
+        assert item['id'] == '1'
+        assert queue.ack('1', 'runner-a', {'transaction_id': '1'})
+        assert queue.counts()[work_queue.SUCCESSFUL] == 1
+        assert list(queue.results()) == [{'transaction_id': '1'}]
+
+    def test_nack_retries_then_fails(self, queue):
+        """Los errores de sistema se reintentan hasta max_retries"""
+        queue.lease('runner-a')
+        queue.nack('1', 'runner-a', 'timeout', retry=True)
+        assert queue.lease('runner-a')['id'] == '1'
+
+        queue.nack('1', 'runner-a', 'timeout', retry=True, error_type='SystemException')
+        failed = queue.failed_items()
+        assert [f['id'] for f in failed] == ['1']
+        assert failed[0]['retry_count'] == 2
+        assert failed[0]['error_type'] == 'SystemException'
+        assert queue.retries() == 1
+
+    def test_business_error_not_retried(self, queue):
+        """Los errores de negocio pasan directo a Failed"""
+        queue.lease('runner-a')
+        queue.nack('1', 'runner-a', 'dato inválido', retry=False)
+
+        assert queue.counts()[work_queue.FAILED] == 1
+
+    def test_release_does_not_count_a_retry(self, queue):
+        """Un elemento devuelto sin procesar (hora límite) vuelve a New sin consumir reintentos"""
+        queue.lease('runner-a')
+        assert queue.release('1', 'runner-a')
+
+        assert queue.counts()[work_queue.NEW] == 3
+        assert queue.retries() == 0
+        assert queue.lease('runner-b')['id'] == '1'
+
+    def test_expired_lease_is_requeued(self, queue):
+        """Los elementos de un runner caído vuelven a la cola al vencer el arrendamiento"""
+        queue.lease('runner-caido', lease_timeout=0.01)
+        time.sleep(0.05)
+
+        item = queue.lease('runner-b')
+        assert item['id'] == '1'
+        # El runner caído ya no puede confirmar un elemento que perdió
+        assert queue.ack('1', 'runner-caido') is False
+
+    def test_lease_expired_twice_fails_with_its_own_error_type(self, queue):
+        for runner in ('runner-a', 'runner-b'):
+            queue.lease(runner, lease_timeout=0.01)
+            time.sleep(0.05)
+        queue.lease('runner-c')
+
+        failed = {item['id']: item for item in queue.failed_items()}
+        assert failed['1']['error_type'] == 'LeaseExpired'
+        assert failed['1']['error_message'] == 'Arrendamiento vencido'
+
+    def test_concurrent_runners_do_not_duplicate(self, tmp_path):
+        """Varios runners concurrentes nunca arriendan el mismo elemento"""
+        wq = WorkQueue(str(tmp_path / 'queue.db'))
+        wq.import_items({'id': str(i), 'prompt': 'p'} for i in range(50))
+        leased = []
+
+        def runner(name):
+            while True:
+                item = wq.lease(name)
+                if item is None:
+                    return
+                leased.append(item['id'])
+                wq.ack(item['id'], name)
+
+        threads = [threading.Thread(target=runner, args=(f'r{i}',)) for i in range(4)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+
+        assert sorted(leased) == sorted(str(i) for i in range(50))
+        assert wq.is_drained()
+
+
+def run_queue(tmp_path, monkeypatch, fake_run, lease_timeout=60):
+    config = {'processing': {'workers': 2, 'max_retries': 1}, 'scheduler': {'calibration_file': None},
+              'queue': {'sqlite_path': str(tmp_path / 'queue.db'), 'lease_timeout_seconds': lease_timeout},
+              'paths': {'input_data': str(tmp_path / 'prompts.csv'),
+                        'output_data': str(tmp_path / 'results.csv'), 'logs': str(tmp_path)}}
+    (tmp_path / 'prompts.csv').write_text('id,prompt\n1,Prompt lento uno\n2,Prompt dos\n', encoding='utf-8')
+    monkeypatch.setattr(main.process, 'run', fake_run)
+    return main.run_work_queue(config, logging.getLogger('test'), {'line_mode': True})
+
+
+def failed_ids(tmp_path):
+    path = tmp_path / 'results_failed.csv'
+    if not path.exists():
+        return []
+    with open(path, encoding='utf-8', newline='') as f:
+        return [row['id'] for row in csv.DictReader(f)]
+
+
+class TestFailedLog:
+    """results_failed.csv recibe solo el fallo definitivo de cada elemento"""
+
+    def test_retried_item_that_succeeds_is_not_logged(self, tmp_path, monkeypatch):
+        attempts = []
+
+        def fake_run(transaction, config):
+            attempts.append(transaction['id'])
+            if transaction['id'] == '1' and attempts.count('1') == 1:
+                return 'SystemException', '503 UNAVAILABLE'
+            return 'Success', Result(transaction['id'], transaction['prompt'], 'ok')
+
+        assert run_queue(tmp_path, monkeypatch, fake_run) == (2, 2, 0)
+        assert failed_ids(tmp_path) == []
+
+    def test_item_is_logged_once_when_retries_are_used_up(self, tmp_path, monkeypatch):
+        def fake_run(transaction, config):
+            if transaction['id'] == '1':
+                return 'SystemException', '503 UNAVAILABLE'
+            return 'Success', Result(transaction['id'], transaction['prompt'], 'ok')
+
+        assert run_queue(tmp_path, monkeypatch, fake_run) == (2, 1, 1)
+        assert failed_ids(tmp_path) == ['1']
+
+
+class TestLeaseHeartbeat:
+    """Un elemento lento no vence mientras se procesa; un resultado sin arrendamiento se descarta"""
+
+    def test_slow_item_keeps_its_lease(self, tmp_path, monkeypatch):
+        def fake_run(transaction, config):
+            # Más largo que el arrendamiento: el otro worker vuelve a arrendar mientras tanto
+            time.sleep(0.8 if transaction['id'] == '1' else 0.4)
+            return 'Success', Result(transaction['id'], transaction['prompt'], 'ok')
+
+        assert run_queue(tmp_path, monkeypatch, fake_run, lease_timeout=0.2) == (2, 2, 0)
+        assert WorkQueue(str(tmp_path / 'queue.db')).retries() == 0
+
+    def test_result_of_a_lost_lease_is_not_counted(self, tmp_path, monkeypatch):
+        def fake_run(transaction, config):
+            if transaction['id'] == '1':
+                # El arrendamiento vence y otro runner retoma el elemento
+                wq = WorkQueue(str(tmp_path / 'queue.db'))
+                conn = wq._connect()
+                conn.execute("UPDATE queue_items SET lease_expires_at = 0 WHERE item_id = '1'")
+                conn.close()
+                assert wq.lease('otro-runner')['id'] == '1'
+            return 'Success', Result(transaction['id'], transaction['prompt'], 'ok')
+
+        summary = run_queue(tmp_path, monkeypatch, fake_run, lease_timeout=60)
+        wq = WorkQueue(str(tmp_path / 'queue.db'))
+        assert summary == (2, 1, 0)
+        assert [r['transaction_id'] for r in wq.results()] == ['2']
+        assert wq.counts()[work_queue.IN_PROGRESS] == 1
+
+    def test_heartbeat_stops_tracking_items_owned_by_others(self, queue):
+        heartbeat = LeaseHeartbeat(queue, 'runner-a')
+        queue.lease('runner-a', lease_timeout=0.01)
+        heartbeat.track('1')
+        time.sleep(0.05)
+        assert queue.lease('runner-b')['id'] == '1'
+        heartbeat.beat()
+        assert not heartbeat._items
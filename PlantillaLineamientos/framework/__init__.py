@@ -0,0 +1,3 @@
+"""
+Framework REFramework de la plantilla
+"""
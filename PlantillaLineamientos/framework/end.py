@@ -1,3 +1,32 @@
-def run():
-    print('end')
+"""
+Finalización: resultados y reporte del runtime
+"""
 
+import csv
+import json
+import logging
+from pathlib import Path
+from typing import Dict, Any, List
+
+
+def save_results(results: List[Dict[str, Any]], path: str) -> None:
+    """Guarda las filas de resultado en CSV"""
+    if not results:
+        return
+    Path(path).parent.mkdir(parents=True, exist_ok=True)
+    columns = list(dict.fromkeys(key for row in results for key in row))
+    with open(path, 'w', encoding='utf-8', newline='') as f:
+        writer = csv.DictWriter(f, fieldnames=columns)
+        writer.writeheader()
+        writer.writerows(results)
+
+
+def run(results: List[Dict[str, Any]], report: Dict[str, Any], config: Dict[str, Any]) -> None:
+    """Guarda resultados y métricas del pipeline"""
+    save_results(results, config['paths']['output_data'])
+    report_path = Path(config['paths']['report'])
+    report_path.parent.mkdir(parents=True, exist_ok=True)
+    with open(report_path, 'w', encoding='utf-8') as f:
+        json.dump(report, f, indent=2, ensure_ascii=False)
+    logging.getLogger('end').info("Procesados %d de %d elementos en %.2fs (%s)", report['items_out'],
+                                  report['items_in'], report['duration_seconds'], report['executor'])
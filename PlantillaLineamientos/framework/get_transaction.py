@@ -1,3 +1,12 @@
-def run(x):
-    return x
+"""
+Obtención de transacciones: lee la entrada fila por fila
+"""
 
+import csv
+from typing import Dict, Iterator
+
+
+def run(path: str) -> Iterator[Dict[str, str]]:
+    """Genera las filas del CSV de entrada; el runtime las consume a medida que hay lugar"""
+    with open(path, 'r', encoding='utf-8', newline='') as f:
+        yield from csv.DictReader(f)
@@ -1,3 +1,11 @@
-def run(item,e):
-    print('err')
+"""
+Manejo de errores de las etapas del pipeline
+"""
 
+import logging
+from typing import Any
+
+
+def run(item: Any, e: Exception) -> None:
+    """Registra el error; el runtime lo llama desde el hilo del worker"""
+    logging.getLogger('handle_error').error("Error procesando %s: %s: %s", item, type(e).__name__, e)
@@ -1,3 +1,36 @@
-def load_config():
-    return {'env':'dev'}
+"""
+Inicialización: configuración y logging
+"""
 
+import json
+import logging
+from typing import Dict, Any
+
+from .runtime import DEFAULT_RUNTIME_CONFIG
+
+DEFAULT_CONFIG = {
+    'env': 'dev',
+    'log_level': 'INFO',
+    'retries': 1,
+    'runtime': DEFAULT_RUNTIME_CONFIG,
+    'paths': {
+        'input_data': 'data/input/data.csv',
+        'output_data': 'data/output/results.csv',
+        'report': 'data/output/runtime_report.json'
+    }
+}
+
+
+def load_config(path: str = 'config/settings.json') -> Dict[str, Any]:
+    """Carga settings.json sobre los valores por defecto (las secciones se combinan)"""
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            settings = json.load(f)
+    except FileNotFoundError:
+        settings = {}
+    config = {**DEFAULT_CONFIG, **settings}
+    for section in ('runtime', 'paths'):
+        config[section] = {**DEFAULT_CONFIG[section], **settings.get(section, {})}
+    logging.basicConfig(level=config['log_level'],
+                        format='%(asctime)s - %(threadName)s - %(levelname)s - %(message)s')
+    return config
@@ -1,3 +1,15 @@
-def run(tx,cfg):
-    return 'Success'
+"""
+Lógica de negocio de cada transacción
+"""
 
+from typing import Dict, Any
+
+
+def run(tx: Dict[str, Any], cfg: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Procesa una transacción y devuelve la fila de resultado
+
+    Se ejecuta como etapa del pipeline: debe ser una función de módulo (el
+    ejecutor 'process' la serializa) y lanzar una excepción ante un error
+    """
+    return {**tx, 'status': 'Success'}
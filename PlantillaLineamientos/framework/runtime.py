@@ -0,0 +1,330 @@
+"""
+Runtime del pipeline: etapas registradas una vez, ejecutores intercambiables,
+colas acotadas entre etapas y métricas comunes para todos los bots
+"""
+
+import asyncio
+import functools
+import inspect
+import logging
+import queue
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+SEQUENTIAL = 'sequential'
+THREAD = 'thread'
+PROCESS = 'process'
+ASYNCIO = 'asyncio'
+EXECUTORS = (SEQUENTIAL, THREAD, PROCESS, ASYNCIO)
+
+DEFAULT_RUNTIME_CONFIG = {
+    'executor': THREAD,
+    'workers': 4,
+    'queue_size': 100
+}
+
+# Marca de fin de la entrada; cada worker de una etapa consume una
+_DONE = object()
+
+
+class Stage:
+    """Una función del pipeline con su ejecutor y cantidad de workers"""
+
+    __slots__ = ('name', 'func', 'executor', 'workers')
+
+    def __init__(self, name: str, func: Callable, executor: str, workers: int):
+        if executor not in EXECUTORS:
+            raise ValueError(f"Ejecutor inválido para la etapa '{name}': {executor}")
+        if executor == ASYNCIO and not _is_coroutine(func):
+            raise TypeError(f"La etapa '{name}' usa asyncio y debe ser una función async")
+        self.name = name
+        self.func = func
+        self.executor = executor
+        self.workers = 1 if executor == SEQUENTIAL else max(1, int(workers))
+
+
+def _is_coroutine(func: Callable) -> bool:
+    while isinstance(func, functools.partial):
+        func = func.func
+    return inspect.iscoroutinefunction(func)
+
+
+class StageStats:
+    """
+    Métricas de una etapa
+
+    busy_seconds es el tiempo dentro de la función, blocked_seconds el tiempo
+    esperando lugar en la cola siguiente (backpressure) y max_queue el mayor
+    tamaño observado de la cola de entrada
+    """
+
+    __slots__ = ('processed', 'errors', 'dropped', 'busy_seconds', 'max_latency',
+                 'blocked_seconds', 'max_queue', '_lock')
+
+    def __init__(self):
+        self.processed = self.errors = self.dropped = self.max_queue = 0
+        self.busy_seconds = self.max_latency = self.blocked_seconds = 0.0
+        self._lock = threading.Lock()
+
+    def record(self, latency: float, error: bool = False, dropped: bool = False) -> None:
+        with self._lock:
+            self.processed += 1
+            self.errors += error
+            self.dropped += dropped
+            self.busy_seconds += latency
+            self.max_latency = max(self.max_latency, latency)
+
+    def blocked(self, seconds: float) -> None:
+        with self._lock:
+            self.blocked_seconds += seconds
+
+    def queued(self, size: int) -> None:
+        if size > self.max_queue:
+            with self._lock:
+                self.max_queue = max(self.max_queue, size)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'processed': self.processed,
+            'errors': self.errors,
+            'dropped': self.dropped,
+            'avg_latency_seconds': round(self.busy_seconds / self.processed, 4) if self.processed else 0,
+            'max_latency_seconds': round(self.max_latency, 4),
+            'busy_seconds': round(self.busy_seconds, 4),
+            'blocked_seconds': round(self.blocked_seconds, 4),
+            'max_queue': self.max_queue
+        }
+
+
+class Pipeline:
+    """
+    Encadena etapas registradas con stage()/add_stage() y las ejecuta con run()
+
+    Cada etapa recibe un elemento y devuelve el elemento para la siguiente;
+    si devuelve None el elemento se descarta. Una excepción se pasa a on_error
+    (desde el hilo del worker) y el elemento no sigue. La salida de la última
+    etapa va a on_result (o se devuelve en una lista), siempre desde el hilo
+    que llamó a run()
+    """
+
+    def __init__(self, config: Optional[Dict[str, Any]] = None,
+                 on_error: Optional[Callable[[Any, Exception], None]] = None,
+                 on_result: Optional[Callable[[Any], None]] = None):
+        self.config = {**DEFAULT_RUNTIME_CONFIG, **(config or {})}
+        if self.config['executor'] not in EXECUTORS:
+            raise ValueError(f"Ejecutor inválido: {self.config['executor']}")
+        self.on_error = on_error
+        self.on_result = on_result
+        self.stages: List[Stage] = []
+        self.stats: Dict[str, StageStats] = {}
+        self.items_in = self.items_out = 0
+        self.duration = 0.0
+
+    def add_stage(self, func: Callable, name: Optional[str] = None, executor: Optional[str] = None,
+                  workers: Optional[int] = None) -> Callable:
+        name = name or getattr(func, '__name__', f"stage_{len(self.stages)}")
+        if any(stage.name == name for stage in self.stages):
+            raise ValueError(f"La etapa '{name}' ya está registrada")
+        default_executor = self.config['executor']
+        if default_executor == SEQUENTIAL:
+            # En modo secuencial todo corre en el hilo llamador (útil para depurar)
+            executor = SEQUENTIAL
+        self.stages.append(Stage(name, func, executor or default_executor,
+                                 workers or self.config['workers']))
+        return func
+
+    def stage(self, name: Optional[str] = None, executor: Optional[str] = None,
+              workers: Optional[int] = None) -> Callable:
+        """Decorador equivalente a add_stage"""
+        def register(func: Callable) -> Callable:
+            return self.add_stage(func, name, executor, workers)
+        return register
+
+    def run(self, items: Iterable[Any]) -> List[Any]:
+        """Procesa todos los elementos; devuelve las salidas si no hay on_result"""
+        if not self.stages:
+            raise ValueError("El pipeline no tiene etapas registradas")
+        self.stats = {stage.name: StageStats() for stage in self.stages}
+        self.items_in = self.items_out = 0
+        results = []
+        sink = self.on_result or results.append
+
+        def emit(output: Any) -> None:
+            self.items_out += 1
+            sink(output)
+
+        started = time.perf_counter()
+        try:
+            if self.config['executor'] == SEQUENTIAL:
+                self._run_sequential(items, emit)
+            else:
+                self._run_concurrent(items, emit)
+        finally:
+            self.duration = time.perf_counter() - started
+        return results
+
+    def report(self) -> Dict[str, Any]:
+        """Métricas de la última ejecución"""
+        return {
+            'executor': self.config['executor'],
+            'items_in': self.items_in,
+            'items_out': self.items_out,
+            'duration_seconds': round(self.duration, 4),
+            'items_per_second': round(self.items_in / self.duration, 2) if self.duration else 0,
+            'stages': {name: stats.to_dict() for name, stats in self.stats.items()}
+        }
+
+    def _call(self, stage: Stage, item: Any, call: Callable[[Any], Any]) -> Any:
+        """Ejecuta una etapa sobre un elemento, midiendo y derivando errores a on_error"""
+        stats = self.stats[stage.name]
+        started = time.perf_counter()
+        try:
+            output = call(item)
+        except Exception as e:
+            stats.record(time.perf_counter() - started, error=True)
+            if self.on_error:
+                try:
+                    self.on_error(item, e)
+                except Exception:
+                    # Un handler que falla no debe detener al worker ni al pipeline
+                    logging.getLogger(__name__).exception("Error en on_error de la etapa '%s'", stage.name)
+            return None
+        stats.record(time.perf_counter() - started, dropped=output is None)
+        return output
+
+    def _run_sequential(self, items: Iterable[Any], emit: Callable[[Any], None]) -> None:
+        for item in items:
+            self.items_in += 1
+            for stage in self.stages:
+                item = self._call(stage, item, stage.func)
+                if item is None:
+                    break
+            else:
+                emit(item)
+
+    def _run_concurrent(self, items: Iterable[Any], emit: Callable[[Any], None]) -> None:
+        """
+        Un grupo de hilos por etapa, unidos por colas acotadas: una etapa lenta
+        llena su cola de entrada y frena a las anteriores en lugar de acumular
+        elementos en memoria. Los hilos de las etapas process/asyncio solo
+        delegan y esperan, así limitan también la concurrencia de esos ejecutores
+        """
+        size = self.config['queue_size']
+        queues = [queue.Queue(maxsize=size) for _ in range(len(self.stages) + 1)]
+        callers, cleanup = self._callers()
+        threads = []
+        failure: List[BaseException] = []
+
+        try:
+            for index, stage in enumerate(self.stages):
+                remaining = [stage.workers, threading.Lock()]
+                for n in range(stage.workers):
+                    thread = threading.Thread(target=self._worker, name=f"{stage.name}-{n}", daemon=True,
+                                              args=(index, callers[stage.name], queues, remaining))
+                    thread.start()
+                    threads.append(thread)
+
+            feeder = threading.Thread(target=self._feed, name='pipeline-feeder', daemon=True,
+                                      args=(items, queues[0], self.stages[0], failure))
+            feeder.start()
+
+            while True:
+                output = queues[-1].get()
+                if output is _DONE:
+                    break
+                emit(output)
+
+            feeder.join()
+            for thread in threads:
+                thread.join()
+        finally:
+            cleanup()
+        if failure:
+            raise failure[0]
+
+    def _feed(self, items: Iterable[Any], first: queue.Queue, stage: Stage,
+              failure: List[BaseException]) -> None:
+        stats = self.stats[stage.name]
+        try:
+            for item in items:
+                self.items_in += 1
+                self._put(first, item, None)
+                stats.queued(first.qsize())
+        except BaseException as e:
+            # Un error leyendo la entrada corta el pipeline pero deja drenar lo ya encolado
+            failure.append(e)
+        finally:
+            for _ in range(stage.workers):
+                first.put(_DONE)
+
+    def _put(self, target: queue.Queue, item: Any, stats: Optional[StageStats]) -> None:
+        if stats is None:
+            target.put(item)
+            return
+        started = time.perf_counter()
+        target.put(item)
+        stats.blocked(time.perf_counter() - started)
+
+    def _worker(self, index: int, call: Callable, queues: List[queue.Queue], remaining: List[Any]) -> None:
+        stage = self.stages[index]
+        stats = self.stats[stage.name]
+        downstream = self.stages[index + 1] if index + 1 < len(self.stages) else None
+        source, target = queues[index], queues[index + 1]
+        while True:
+            item = source.get()
+            if item is _DONE:
+                break
+            output = self._call(stage, item, call)
+            if output is not None:
+                self._put(target, output, stats)
+                if downstream:
+                    self.stats[downstream.name].queued(target.qsize())
+        with remaining[1]:
+            remaining[0] -= 1
+            last = remaining[0] == 0
+        if last:
+            # El último worker de la etapa propaga el cierre a la siguiente
+            for _ in range(downstream.workers if downstream else 1):
+                target.put(_DONE)
+
+    def _callers(self):
+        """Función de llamada por etapa según su ejecutor y la limpieza de los recursos"""
+        callers = {}
+        pools = []
+        loop = None
+        loop_thread = None
+
+        for stage in self.stages:
+            if stage.executor == PROCESS:
+                pool = ProcessPoolExecutor(max_workers=stage.workers)
+                pools.append(pool)
+                callers[stage.name] = functools.partial(_submit, pool, stage.func)
+            elif stage.executor == ASYNCIO:
+                if loop is None:
+                    loop = asyncio.new_event_loop()
+                    loop_thread = threading.Thread(target=loop.run_forever, name='pipeline-loop',
+                                                   daemon=True)
+                    loop_thread.start()
+                callers[stage.name] = functools.partial(_schedule, loop, stage.func)
+            else:
+                callers[stage.name] = stage.func
+
+        def cleanup() -> None:
+            for pool in pools:
+                pool.shutdown(wait=True)
+            if loop is not None:
+                loop.call_soon_threadsafe(loop.stop)
+                loop_thread.join()
+                loop.close()
+
+        return callers, cleanup
+
+
+def _submit(pool: ProcessPoolExecutor, func: Callable, item: Any) -> Any:
+    return pool.submit(func, item).result()
+
+
+def _schedule(loop: asyncio.AbstractEventLoop, func: Callable, item: Any) -> Any:
+    return asyncio.run_coroutine_threadsafe(func(item), loop).result()
@@ -1,2 +1,26 @@
-print('REFramework mock')
+"""
+Punto de entrada: arma el pipeline con las etapas del framework y lo ejecuta
+"""
 
+from functools import partial
+
+from framework import init, get_transaction, process, handle_error, end
+from framework.runtime import Pipeline
+
+
+def build_pipeline(config):
+    """Registra las etapas; agrega aquí las etapas propias del bot"""
+    pipeline = Pipeline(config['runtime'], on_error=handle_error.run)
+    pipeline.add_stage(partial(process.run, cfg=config), name='process')
+    return pipeline
+
+
+def main():
+    config = init.load_config()
+    pipeline = build_pipeline(config)
+    results = pipeline.run(get_transaction.run(config['paths']['input_data']))
+    end.run(results, pipeline.report(), config)
+
+
+if __name__ == '__main__':
+    main()
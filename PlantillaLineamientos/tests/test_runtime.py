@@ -0,0 +1,94 @@
+"""
+Pruebas unitarias para el runtime del pipeline
+"""
+
+import asyncio
+import threading
+import time
+
+import pytest
+
+from framework.runtime import Pipeline
+
+
+def double(item):
+    return item * 2
+
+
+def increment(item):
+    return item + 1
+
+
+async def add_one(item):
+    await asyncio.sleep(0)
+    return item + 1
+
+
+@pytest.mark.parametrize('executor', ['sequential', 'thread', 'process', 'asyncio'])
+def test_executors_produce_same_results(executor):
+    """Todos los ejecutores recorren las etapas en orden y descartan los None"""
+    pipeline = Pipeline({'executor': executor, 'workers': 2, 'queue_size': 4})
+    # Las etapas pueden usar otro ejecutor que el del pipeline
+    pipeline.add_stage(double, executor='thread' if executor == 'asyncio' else None)
+    pipeline.add_stage(add_one if executor == 'asyncio' else increment, name='add_one')
+    pipeline.add_stage(lambda x: x if x % 3 else None, name='filter',
+                       executor=None if executor == 'sequential' else 'thread')
+
+    results = pipeline.run(range(20))
+
+    expected = [x * 2 + 1 for x in range(20) if (x * 2 + 1) % 3]
+    assert sorted(results) == expected
+    report = pipeline.report()
+    assert (report['items_in'], report['items_out']) == (20, len(expected))
+    assert report['stages']['filter']['dropped'] == 20 - len(expected)
+
+
+def test_errors_go_to_handler_and_pipeline_continues():
+    errors = []
+    pipeline = Pipeline({'executor': 'thread', 'workers': 3},
+                        on_error=lambda item, e: errors.append((item, str(e))))
+
+    @pipeline.stage()
+    def check(item):
+        if item == 5:
+            raise ValueError('dato inválido')
+        return item
+
+    assert sorted(pipeline.run(range(10))) == [0, 1, 2, 3, 4, 6, 7, 8, 9]
+    assert errors == [(5, 'dato inválido')]
+    assert pipeline.report()['stages']['check']['errors'] == 1
+
+
+def test_bounded_queues_apply_backpressure():
+    """Con una etapa lenta la entrada se consume de a poco, no se acumula en memoria"""
+    read = []
+    ahead = []
+    processed = [0]
+    lock = threading.Lock()
+
+    def source():
+        for item in range(30):
+            with lock:
+                ahead.append(len(read) - processed[0])
+            read.append(item)
+            yield item
+
+    def slow(item):
+        time.sleep(0.002)
+        with lock:
+            processed[0] += 1
+        return item
+
+    pipeline = Pipeline({'executor': 'thread', 'workers': 1, 'queue_size': 2})
+    pipeline.add_stage(slow)
+    pipeline.run(source())
+
+    # Cola de 2 + 1 en proceso + 1 esperando lugar en put()
+    assert max(ahead) <= 4
+    stats = pipeline.report()['stages']['slow']
+    assert stats['processed'] == 30 and stats['max_queue'] <= 2
+
+
+def test_asyncio_stage_requires_coroutine():
+    with pytest.raises(TypeError):
+        Pipeline({'executor': 'asyncio'}).add_stage(double)